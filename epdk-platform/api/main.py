@@ -12,9 +12,21 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import structlog
 import hashlib
+import functools
+import threading
+import tracemalloc
+import cProfile
+import pstats
 import uuid
 import time
 import os
+import sys
+from pathlib import Path
+
+# Flame graph folding is shared with the ingest CLI; the Dockerfile copies the
+# module to the same place. Appended, so ingest modules never shadow the API's.
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'ingest' / 'src'))
+from profiling import cpu_stacks, allocation_stacks, write_folded
 
 load_dotenv()
 
@@ -39,6 +51,9 @@ JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'default-secret-key')
 JWT_ALGORITHM = os.getenv('JWT_ALGORITHM', 'HS256')
 JWT_EXPIRE_MINUTES = int(os.getenv('JWT_EXPIRE_MINUTES', '30'))
 RATE_LIMIT = os.getenv('RATE_LIMIT_PER_MINUTE', '100')
+# Per-request profiling (X-Profile: 1 or ?profile=1) is off unless this is set
+PROFILE_DIR = os.getenv('PROFILE_DIR')
+PROFILE_FRAMES = int(os.getenv('PROFILE_FRAMES', '32'))
 
 limiter = Limiter(key_func=get_remote_address)
 security = HTTPBearer(auto_error=False)
@@ -96,6 +111,46 @@ async def log_requests(request: Request, call_next):
     logger.info("request_completed", request_id=request_id, status_code=response.status_code, duration_ms=round(duration_ms, 2))
     return response
 
+_profile_lock = threading.Lock()
+
+def profiled(endpoint):
+    """Profile a request that asks for it with cProfile and tracemalloc.
+
+    Sync endpoints run in a threadpool thread, so the profiler is started
+    here rather than in a middleware. Writes <PROFILE_DIR>/<name>.cpu.folded
+    (microseconds) and .alloc.folded (bytes live when the endpoint returns),
+    collapsed stacks for flame graphs. One request is profiled at a time.
+    tracemalloc is process-wide, so allocations of requests served
+    concurrently (and on Python 3.12+ their calls too) show up in the
+    profile; profile an otherwise idle instance.
+    """
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        request = kwargs['request']
+        wanted = request.headers.get('x-profile') == '1' or request.query_params.get('profile') == '1'
+        if not PROFILE_DIR or not wanted or not _profile_lock.acquire(blocking=False):
+            return endpoint(*args, **kwargs)
+
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{endpoint.__name__}-{uuid.uuid4().hex[:8]}"
+        profile = cProfile.Profile()
+        try:
+            tracemalloc.start(PROFILE_FRAMES)
+            profile.enable()
+            result = endpoint(*args, **kwargs)
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()  # before the result is freed
+        finally:
+            profile.disable()
+            tracemalloc.stop()
+            _profile_lock.release()
+
+        prefix = os.path.join(PROFILE_DIR, name)
+        write_folded(f"{prefix}.cpu.folded", cpu_stacks(pstats.Stats(profile).stats), scale=1e6)
+        write_folded(f"{prefix}.alloc.folded", allocation_stacks(snapshot))
+        logger.info("request_profiled", path=request.url.path, profile=prefix)
+        return result
+    return wrapper
+
 @app.get("/")
 def root():
     return {"message": "EPDK Charging Stations API", "version": "1.0"}
@@ -120,6 +175,7 @@ def login(request: Request, username: str = Query(...), password: str = Query(..
 
 @app.get("/stats")
 @limiter.limit(f"{RATE_LIMIT}/minute")
+@profiled
 def stats(request: Request):
     conn = psycopg2.connect(DATABASE_DSN)
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -137,6 +193,7 @@ def stats(request: Request):
 
 @app.get("/map/stations")
 @limiter.limit(f"{RATE_LIMIT}/minute")
+@profiled
 def get_stations_for_map(request: Request, city: str = Query(None), brand: str = Query(None), limit: int = Query(1000, ge=1, le=5000)):
     conn = psycopg2.connect(DATABASE_DSN)
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -161,6 +218,7 @@ def get_stations_for_map(request: Request, city: str = Query(None), brand: str =
 
 @app.get("/map/cities")
 @limiter.limit(f"{RATE_LIMIT}/minute")
+@profiled
 def get_city_stats(request: Request):
     conn = psycopg2.connect(DATABASE_DSN)
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -177,6 +235,7 @@ def get_city_stats(request: Request):
 
 @app.get("/stations")
 @limiter.limit(f"{RATE_LIMIT}/minute")
+@profiled
 def list_stations(request: Request, city: str = Query(None), brand: str = Query(None), limit: int = Query(50, ge=1, le=1000)):
     conn = psycopg2.connect(DATABASE_DSN)
     cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -197,6 +256,7 @@ def list_stations(request: Request, city: str = Query(None), brand: str = Query(
 
 @app.get("/station")
 @limiter.limit(f"{RATE_LIMIT}/minute")
+@profiled
 def get_station(request: Request, station_no: str = Query(..., description="Station numarasi")):
     conn = psycopg2.connect(DATABASE_DSN)
     cursor = conn.cursor(cursor_factory=RealDictCursor)
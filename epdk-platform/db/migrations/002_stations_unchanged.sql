@@ -0,0 +1,5 @@
+-- Migration: 002_stations_unchanged
+-- Description: Count stations skipped because their data_hash did not change
+
+ALTER TABLE ingestion_batches
+    ADD COLUMN stations_unchanged INTEGER DEFAULT 0;
@@ -0,0 +1,22 @@
+-- Migration: 003_ingestion_files
+-- Description: Per-file ingestion manifest used to skip unchanged input files
+
+CREATE TABLE ingestion_files (
+    id BIGSERIAL PRIMARY KEY,
+    batch_id UUID NOT NULL REFERENCES ingestion_batches(id),
+    file_path TEXT NOT NULL,
+    file_size BIGINT NOT NULL,
+    file_mtime TIMESTAMPTZ NOT NULL,
+    content_hash VARCHAR(64) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    stations_count INTEGER DEFAULT 0,
+    connectors_count INTEGER DEFAULT 0,
+    error_message TEXT,
+    processed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX idx_ingestion_files_path ON ingestion_files(file_path);
+CREATE INDEX idx_ingestion_files_loaded_hash ON ingestion_files(content_hash) WHERE status = 'LOADED';
+
+ALTER TABLE ingestion_batches
+    ADD COLUMN files_skipped INTEGER DEFAULT 0;
@@ -0,0 +1,16 @@
+-- Migration: 004_ingestion_metrics
+-- Description: Per-stage timings, throughput and memory for ingestion runs
+
+ALTER TABLE ingestion_batches
+    ADD COLUMN parse_seconds NUMERIC(10, 3),
+    ADD COLUMN transform_seconds NUMERIC(10, 3),
+    ADD COLUMN load_seconds NUMERIC(10, 3),
+    ADD COLUMN wall_seconds NUMERIC(10, 3),
+    ADD COLUMN rows_processed BIGINT,
+    ADD COLUMN rows_per_second NUMERIC(12, 1),
+    ADD COLUMN peak_rss_bytes BIGINT;
+
+ALTER TABLE ingestion_files
+    ADD COLUMN parse_seconds NUMERIC(10, 3),
+    ADD COLUMN transform_seconds NUMERIC(10, 3),
+    ADD COLUMN load_seconds NUMERIC(10, 3);
@@ -0,0 +1,10 @@
+-- Migration: 005_rows_quarantined
+-- Description: Count rows rejected by pre-load validation (details are in ingestion_errors)
+
+ALTER TABLE ingestion_batches
+    ADD COLUMN rows_quarantined INTEGER DEFAULT 0;
+
+ALTER TABLE ingestion_files
+    ADD COLUMN rows_quarantined INTEGER DEFAULT 0;
+
+CREATE INDEX idx_ingestion_errors_batch ON ingestion_errors(batch_id, error_type);
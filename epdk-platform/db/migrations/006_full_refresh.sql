@@ -0,0 +1,6 @@
+-- Migration: 006_full_refresh
+-- Description: Count rows removed by full-refresh table swaps
+
+ALTER TABLE ingestion_batches
+    ADD COLUMN stations_deleted INTEGER DEFAULT 0,
+    ADD COLUMN connectors_deleted INTEGER DEFAULT 0;
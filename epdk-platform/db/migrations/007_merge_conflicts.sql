@@ -0,0 +1,6 @@
+-- Migration: 007_merge_conflicts
+-- Description: Count rows consolidated by the cross-file merge stage (conflicts are in ingestion_errors)
+
+ALTER TABLE ingestion_batches
+    ADD COLUMN duplicates_merged INTEGER DEFAULT 0,
+    ADD COLUMN merge_conflicts INTEGER DEFAULT 0;
@@ -0,0 +1,32 @@
+-- Migration: 008_ingestion_queue
+-- Description: Work queue of batch files for distributed ingestion (cli.py enqueue / cli.py work)
+
+CREATE TABLE ingestion_queue (
+    id BIGSERIAL PRIMARY KEY,
+    batch_id UUID NOT NULL REFERENCES ingestion_batches(id),
+    file_path TEXT NOT NULL,
+    file_size BIGINT NOT NULL,
+    file_mtime TIMESTAMPTZ NOT NULL,
+    content_hash VARCHAR(64),
+    status VARCHAR(20) NOT NULL DEFAULT 'PENDING',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    leased_until TIMESTAMPTZ,
+    heartbeat_at TIMESTAMPTZ,
+    enqueued_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    error_message TEXT,
+    stations_inserted INTEGER DEFAULT 0,
+    stations_updated INTEGER DEFAULT 0,
+    stations_unchanged INTEGER DEFAULT 0,
+    connectors_inserted INTEGER DEFAULT 0,
+    rows_quarantined INTEGER DEFAULT 0,
+    parse_seconds NUMERIC(10, 3),
+    transform_seconds NUMERIC(10, 3),
+    load_seconds NUMERIC(10, 3)
+);
+
+-- Claims scan only unfinished tasks
+CREATE INDEX idx_ingestion_queue_open ON ingestion_queue(id) WHERE status IN ('PENDING', 'RUNNING');
+CREATE INDEX idx_ingestion_queue_batch ON ingestion_queue(batch_id, status);
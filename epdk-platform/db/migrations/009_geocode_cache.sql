@@ -0,0 +1,16 @@
+-- Migration: 009_geocode_cache
+-- Description: Geocoder results by normalized address, so each address goes to the network once
+
+CREATE TABLE geocode_cache (
+    -- Folded ASCII tokens of the address and city ('Gölbaşı Cad. No:5' -> 'GOLBASI CAD NO 5')
+    address_key TEXT NOT NULL,
+    city_key VARCHAR(100) NOT NULL,
+    -- Both NULL: the geocoder had no match (negative result)
+    latitude DOUBLE PRECISION,
+    longitude DOUBLE PRECISION,
+    geocoded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (address_key, city_key)
+);
+
+-- TTL eviction deletes by age
+CREATE INDEX idx_geocode_cache_geocoded_at ON geocode_cache (geocoded_at);
@@ -0,0 +1,31 @@
+-- Migration: 010_geocode_progress
+-- Description: Per-station geocoding attempts and run checkpoints, so geocode_stations.py can resume
+
+-- Keyed by station_no without a foreign key: --full-refresh drops and
+-- recreates stations, which an inbound foreign key would block
+CREATE TABLE geocode_attempts (
+    station_no VARCHAR(50) PRIMARY KEY,
+    -- The address the status applies to; a station whose address changed is tried again
+    address TEXT NOT NULL,
+    -- LOCATED, NOT_FOUND, ERROR (retried next run) or FAILED (ERROR --max-attempts runs in a row)
+    status VARCHAR(20) NOT NULL,
+    -- Attempts in a row with this status
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    attempted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- One row per pass over the stations; an unfinished run is resumed after last_station_no
+CREATE TABLE geocode_runs (
+    id SERIAL PRIMARY KEY,
+    last_station_no VARCHAR(50),
+    located INTEGER NOT NULL DEFAULT 0,
+    not_found INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    requests INTEGER NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    finished_at TIMESTAMPTZ
+);
+
+CREATE INDEX idx_geocode_runs_open ON geocode_runs(id) WHERE finished_at IS NULL;
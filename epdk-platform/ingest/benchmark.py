@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from parser import ExcelParser
+from transformer import DataTransformer
+from gazetteer import AddressParser
+from config import load_config
+from loader import DatabaseLoader
+from validator import DataValidator
+from metrics import peak_rss_bytes
+from synthetic import SyntheticGenerator, BASE_STATIONS
+import logging
+
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bump when the result layout changes so old results are not compared blindly
+RESULT_VERSION = 2
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _run_stage(fn, inputs):
+    """Run fn over every input; return (outputs, seconds)."""
+    start = time.perf_counter()
+    outputs = [fn(item) for item in inputs]
+    return outputs, time.perf_counter() - start
+
+def _traced_peak(fn, inputs):
+    """Largest Python heap peak while running fn on a single input."""
+    tracemalloc.start()
+    try:
+        peak = 0
+        for item in inputs:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            fn(item)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+        return peak
+    finally:
+        tracemalloc.stop()
+
+def _traced_retained(fn, inputs):
+    """Python heap still held by fn's outputs for all inputs, and bytes per output row."""
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        outputs = [fn(item) for item in inputs]
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    rows = sum(len(o['stations']) + len(o['connectors']) for o in outputs)
+    return retained, round(retained / rows, 1) if rows else None
+
+def _stage_result(runs, rows, peak_bytes, retained=(None, None), **extra):
+    seconds = statistics.median(runs)
+    result = {
+        'seconds': round(seconds, 4),
+        'runs': [round(r, 4) for r in runs],
+        'rows': rows,
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_traced_bytes': peak_bytes,
+        'retained_traced_bytes': retained[0],
+        'retained_bytes_per_row': retained[1],
+    }
+    result.update(extra)
+    return result
+
+def benchmark(files, repeat, load=False):
+    config = load_config()
+    parser = ExcelParser(config)
+    transformer = DataTransformer(config, address_parser=AddressParser())
+    input_bytes = sum(f.stat().st_size for f in files)
+
+    def transform(item):
+        return transformer.transform(item[1], item[0].name)
+
+    parse_runs, transform_runs = [], []
+    for _ in range(repeat):
+        parsed, seconds = _run_stage(parser.parse_file, files)
+        parse_runs.append(seconds)
+        transformed, seconds = _run_stage(transform, list(zip(files, parsed)))
+        transform_runs.append(seconds)
+
+    raw_rows = sum(len(p['stations']) + len(p['connectors']) for p in parsed)
+    rows = sum(len(t['stations']) + len(t['connectors']) for t in transformed)
+
+    stages = {
+        'parse': _stage_result(
+            parse_runs, raw_rows, _traced_peak(parser.parse_file, files),
+            _traced_retained(parser.parse_file, files),
+            bytes_per_second=round(input_bytes / statistics.median(parse_runs), 1)
+        ),
+        'transform': _stage_result(
+            transform_runs, rows, _traced_peak(transform, list(zip(files, parsed))),
+            _traced_retained(transform, list(zip(files, parsed)))
+        ),
+    }
+
+    stages.update(_benchmark_addresses(config, parsed, repeat))
+
+    if load:
+        stages['load'] = _benchmark_load(config, transformed, rows)
+
+    return {
+        'version': RESULT_VERSION,
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'revision': _git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'input': {
+            'files': len(files),
+            'bytes': input_bytes,
+            'stations': sum(len(t['stations']) for t in transformed),
+            'connectors': sum(len(t['connectors']) for t in transformed),
+        },
+        'repeat': repeat,
+        'stages': stages,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+def _benchmark_addresses(config, parsed, repeat):
+    """Time city/district parsing with the tail regexes and with the gazetteer.
+
+    Every run starts from a new transformer and goes file by file, as
+    transform() does, so the gazetteer's address cache starts cold.
+    """
+    addresses = [[s.address for s in p['stations']] for p in parsed]
+    rows = sum(len(a) for a in addresses)
+    stages = {}
+    for name, address_parser in (('address_regex', lambda: None), ('address_gazetteer', AddressParser)):
+        runs = []
+        for _ in range(repeat):
+            transformer = DataTransformer(config, address_parser=address_parser())
+            _, seconds = _run_stage(lambda values: transformer._map_unique(values, transformer._parse_address),
+                                    addresses)
+            runs.append(seconds)
+        stages[name] = _stage_result(runs, rows, None)
+    return stages
+
+def _benchmark_load(config, transformed, rows):
+    """Load once for timing, then again under tracemalloc.
+
+    The second pass only finds unchanged stations, so its memory is that of
+    the staging/merge path without any writes to the stations table.
+    """
+    validator = DataValidator(config)
+    loader = DatabaseLoader(config, uuid.uuid4())
+    loader.connect()
+    loader.start_batch()
+
+    def load(data):
+        return loader.load_data(*validator.validate(data))
+
+    try:
+        totals = {}
+        start = time.perf_counter()
+        for data in transformed:
+            for key, value in load(data).items():
+                totals[key] = totals.get(key, 0) + value
+        seconds = time.perf_counter() - start
+        peak = _traced_peak(load, transformed)
+        loader.complete_batch(dict(totals, files_processed=len(transformed)))
+    except Exception:
+        loader.rollback()
+        raise
+    finally:
+        loader.disconnect()
+    return _stage_result([seconds], rows, peak, stats=totals)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EPDK parse/transform/load throughput")
+    parser.add_argument('--input-dir', help='Directory with Excel files (default: generate synthetic data)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help=f'Synthetic station count as a multiple of {BASE_STATIONS} (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic data (default: 0)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Timed runs of parse/transform; the median is reported (default: 3)')
+    parser.add_argument('--load', action='store_true',
+                        help='Also load into $DATABASE_DSN (writes stations; use a scratch database)')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    args = parser.parse_args()
+
+    if args.repeat < 1:
+        parser.error('--repeat must be at least 1')
+
+    with tempfile.TemporaryDirectory(prefix='epdk-bench-') as tmp_dir:
+        if args.input_dir:
+            files = sorted(Path(args.input_dir).glob('*.xls*'))
+            if not files:
+                parser.error(f'No Excel files in {args.input_dir}')
+        else:
+            stations = int(BASE_STATIONS * args.scale)
+            files = SyntheticGenerator(seed=args.seed).generate(tmp_dir, stations)
+
+        results = benchmark(files, args.repeat, load=args.load)
+        results['input']['source'] = args.input_dir or f'synthetic scale={args.scale:g} seed={args.seed}'
+
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import argparse
+import math
+import sys
+import unicodedata
+from pathlib import Path
+
+# Add src to path
+sys.path.insert(0, str(Path(__file__).parent / 'src'))
+
+from gazetteer import PROVINCE_DISTRICTS, DISTRICT_ALIASES, GENERIC_DISTRICTS, PLACES_FILE, fold, tokens
+from geocode_by_city import CITY_COORDINATES
+
+HEADER = """\
+# Turkish districts and populated places for OfflineGeocoder (gazetteer.py).
+# Generated by build_places.py from GeoNames cities500 via geonamescache {version}.
+# GeoNames data (https://www.geonames.org) is licensed under CC BY 4.0.
+# District rows have an empty place, place rows an empty district.
+province\tdistrict\tplace\tlatitude\tlongitude
+"""
+
+def match_key(name):
+    """Like tokens(), but also drops accents such as 'â', so 'Hakkâri' matches 'Hakkari'."""
+    name = unicodedata.normalize('NFKD', name.replace('ı', 'i').replace('İ', 'I'))
+    return ' '.join(tokens(''.join(c for c in name if not unicodedata.combining(c))))
+
+def assign_provinces(places):
+    """Map GeoNames admin1 codes to canonical provinces.
+
+    A code is the province of the most populous place named like a
+    province; the few left (capitals named differently, e.g. Antakya) take
+    the nearest unassigned province centre.
+    """
+    by_code = {}
+    for place in places:
+        by_code.setdefault(place['admin1code'], []).append(place)
+
+    names = {match_key(p): p for p in PROVINCE_DISTRICTS}
+    provinces = {}
+    for code, members in by_code.items():
+        named = [(p['population'], names[match_key(p['name'])]) for p in members if match_key(p['name']) in names]
+        if named:
+            provinces[code] = max(named)[1]
+
+    unassigned = [p for p in PROVINCE_DISTRICTS if p not in provinces.values()]
+    for code, members in by_code.items():
+        if code in provinces:
+            continue
+        largest = max(members, key=lambda p: p['population'])
+        province = min(unassigned, key=lambda p: math.dist(CITY_COORDINATES[fold(p)],
+                                                           (largest['latitude'], largest['longitude'])))
+        provinces[code] = province
+        unassigned.remove(province)
+    return {code: (provinces[code], members) for code, members in by_code.items()}
+
+def build(places):
+    """Return (district rows, place rows) as (province, district, place, lat, lon) tuples."""
+    district_rows = []
+    place_rows = []
+    missing = []
+    for province, members in assign_provinces(places).values():
+        index = {}
+        for place in members:
+            for name in [place['name'], *place['alternatenames']]:
+                index.setdefault(match_key(name), []).append(place)
+            place_rows.append((province, '', place['name'], place['latitude'], place['longitude']))
+
+        names = {district: [district] for district in PROVINCE_DISTRICTS[province]}
+        for alias, district in DISTRICT_ALIASES.get(province, {}).items():
+            names[district].append(alias)
+        for district in PROVINCE_DISTRICTS[province]:
+            if district in GENERIC_DISTRICTS:
+                continue  # 'Merkez' is the province centre
+            candidates = [p for name in names[district] for p in index.get(match_key(name), [])]
+            if candidates:
+                place = max(candidates, key=lambda p: p['population'])
+                district_rows.append((province, district, '', place['latitude'], place['longitude']))
+            else:
+                missing.append(f"{district} / {province}")
+    return sorted(district_rows), sorted(place_rows), missing
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the offline district and place gazetteer from GeoNames')
+    parser.add_argument('--output', default=str(PLACES_FILE), help=f'Output TSV (default: {PLACES_FILE})')
+    parser.add_argument('--min-population', type=int, default=500,
+                        help='Smallest place to include, one of 500, 1000, 5000, 15000 (default: 500)')
+    args = parser.parse_args()
+
+    # Development-only dependency; the generated file is committed
+    import geonamescache
+
+    cache = geonamescache.GeonamesCache(min_city_population=args.min_population)
+    places = [p for p in cache.get_cities().values() if p['countrycode'] == 'TR']
+    district_rows, place_rows, missing = build(places)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(HEADER.format(version=geonamescache.__version__))
+        for province, district, place, lat, lon in district_rows + place_rows:
+            f.write(f"{province}\t{district}\t{place}\t{lat:.4f}\t{lon:.4f}\n")
+
+    print(f"{len(district_rows)} ilce, {len(place_rows)} yer yazildi: {args.output}")
+    print(f"Bulunamayan {len(missing)} ilce il merkezine duser: {', '.join(missing)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 import sys
+import os
+import socket
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import time
 import uuid
+import psycopg2
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / 'src'))
@@ -10,66 +15,505 @@ sys.path.insert(0, str(Path(__file__).parent / 'src'))
 from config import load_config
 from parser import ExcelParser
 from transformer import DataTransformer
+from gazetteer import AddressParser
 from loader import DatabaseLoader
+from validator import DataValidator
+from merger import BatchMerger
+from workqueue import WorkQueue
+from watcher import DirectoryWatcher
+from manifest import FileFingerprint, FileManifest
+from archive import archive_members, find_member
+from cache import ParseCache
+from pipeline import pipelined_files
+from synthetic import SyntheticGenerator, BASE_STATIONS
+from profiling import Profiler, checkpoint
+from metrics import IngestionMetrics, TimedIterator, new_timings, write_textfile, push_to_gateway
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-def cmd_ingest(args):
-    logger.info("Starting ingestion")
-    logger.info(f"Input directory: {args.input_dir}")
-    
-    config = load_config()
-    batch_id = uuid.uuid4()
-    
-    parser = ExcelParser(config)
-    transformer = DataTransformer(config)
-    loader = DatabaseLoader(config, batch_id)
-    
-    loader.connect()
-    loader.start_batch()
-    
-    input_path = Path(args.input_dir)
-    excel_files = list(input_path.glob("*.xls")) + list(input_path.glob("*.xlsx"))
+def _input_files(args):
+    """The Excel files of --input-dir or --archive, with their fingerprints."""
+    if args.archive:
+        # Members are read into memory as they are needed, never extracted to disk
+        excel_files = archive_members(args.archive)
+        fingerprints = {f: FileFingerprint.of_member(f) for f in excel_files}
+    else:
+        input_path = Path(args.input_dir)
+        excel_files = sorted(input_path.glob("*.xls")) + sorted(input_path.glob("*.xlsx"))
+        fingerprints = {f: FileFingerprint.of(f) for f in excel_files}
     
     logger.info(f"Found {len(excel_files)} Excel files")
-    
-    total_stats = {
+    return excel_files, fingerprints
+
+def _pending_files(loader, excel_files, fingerprints, force):
+    """Drop files the manifest says are already loaded; returns (pending, skipped count)."""
+    if force:
+        return excel_files, 0
+    manifest = FileManifest(loader.loaded_files())
+    pending = [f for f in excel_files if not manifest.is_loaded(fingerprints[f])]
+    files_skipped = len(excel_files) - len(pending)
+    logger.info(f"Skipping {files_skipped} files already loaded (use --force to reload)")
+    return pending, files_skipped
+
+def _new_batch_stats(files_skipped=0):
+    return {
         'files_processed': 0,
         'stations_inserted': 0,
         'stations_updated': 0,
-        'connectors_inserted': 0
+        'stations_unchanged': 0,
+        'connectors_inserted': 0,
+        'rows_quarantined': 0,
+        'duplicates_merged': 0,
+        'merge_conflicts': 0,
+        'files_skipped': files_skipped,
+        'errors_count': 0
     }
+
+def _parse_and_transform(config, excel_file, content_hash):
+    # Runs in pool workers, so it builds its own parser/transformer
+    parser = ExcelParser(config, cache=ParseCache.from_config(config))
+    transformer = DataTransformer(config, address_parser=AddressParser())
+    return _run_stages(parser, transformer, excel_file, content_hash)
+
+def _run_stages(parser, transformer, excel_file, content_hash):
+    timings = new_timings()
+    
+    start = time.perf_counter()
+    raw_data = parser.parse_file(excel_file, content_hash)
+    timings['parse'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    transformed = transformer.transform(raw_data, excel_file.name)
+    timings['transform'] = time.perf_counter() - start
+    
+    return transformed, timings
+
+def _transformed_files(config, excel_files, fingerprints, workers):
+    """Yield (file, result_fn) pairs in input order; result_fn returns (data, timings).
+
+    With more than one worker, files are parsed and transformed in a process
+    pool while the caller loads earlier results; input order is preserved so
+    the database ends up the same as with a sequential run.
+    """
+    if workers <= 1:
+        for excel_file in excel_files:
+            content_hash = fingerprints[excel_file].content_hash
+            yield excel_file, lambda f=excel_file, h=content_hash: _parse_and_transform(config, f, h)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            (f, executor.submit(_parse_and_transform, config, f, fingerprints[f].content_hash))
+            for f in excel_files
+        ]
+        for excel_file, future in futures:
+            yield excel_file, future.result
+
+def _streamed_files(config, excel_files):
+    """Yield (file, result_fn) pairs whose results are lazy record streams.
+    
+    Stage timings fill in as the loader consumes the stream.
+    """
+    parser = ExcelParser(config)
+    transformer = DataTransformer(config, address_parser=AddressParser())
+    
+    def stream(excel_file):
+        timings = new_timings()
+        records = TimedIterator(parser.iter_records(excel_file), timings, 'parse')
+        records = TimedIterator(transformer.transform_stream(records), timings, 'transform', exclude='parse')
+        return records, timings
     
     for excel_file in excel_files:
+        yield excel_file, lambda f=excel_file: stream(f)
+
+def _pipelined_files(config, excel_files, fingerprints, queue_size):
+    parser = ExcelParser(config, cache=ParseCache.from_config(config))
+    transformer = DataTransformer(config, address_parser=AddressParser())
+    
+    def parse(f):
+        timings = new_timings()
+        start = time.perf_counter()
+        raw_data = parser.parse_file(f, fingerprints[f].content_hash)
+        timings['parse'] = time.perf_counter() - start
+        return raw_data, timings
+    
+    def transform(f, parsed):
+        raw_data, timings = parsed
+        start = time.perf_counter()
+        transformed = transformer.transform(raw_data, f.name)
+        timings['transform'] = time.perf_counter() - start
+        return transformed, timings
+    
+    return pipelined_files(excel_files, parse, transform, queue_size=queue_size)
+
+def _load_merged(loader, merger, merged_files, fingerprints, metrics, total_stats, loaded_status):
+    """Load a --merge batch as one consolidated set, then record each of its files."""
+    start = time.perf_counter()
+    try:
+        stats = loader.load_data(merger.result(), merger.rejected, merger.conflicts)
+    except Exception as e:
+        logger.error(f"Error loading merged batch: {e}")
+        loader.rollback()
+        loader.record_error('(merged batch)', getattr(e, 'error_type', 'INGEST_ERROR'), str(e))
+        for excel_file, timings in merged_files:
+            metrics.record_file(excel_file.name, timings, 0, 'FAILED')
+            loader.record_file(fingerprints[excel_file], 'FAILED', error_message=str(e), timings=timings)
+        total_stats['errors_count'] += len(merged_files)
+        return
+    finally:
+        metrics.record_stage('load', time.perf_counter() - start)
+    
+    total_stats['files_processed'] += len(merged_files)
+    for key in ('stations_inserted', 'stations_updated', 'stations_unchanged', 'connectors_inserted',
+                'rows_quarantined'):
+        total_stats[key] += stats[key]
+    total_stats['duplicates_merged'] = merger.duplicates
+    total_stats['merge_conflicts'] = len(merger.conflicts)
+    
+    for excel_file, timings in merged_files:
+        counts = merger.file_stats(excel_file.name)
+        rows = counts['stations_count'] + counts['connectors_count']
+        metrics.record_file(excel_file.name, timings, rows, 'LOADED')
+        loader.record_file(fingerprints[excel_file], loaded_status, counts, timings=timings)
+
+def _load_files(files, loader, validator, fingerprints, metrics, total_stats,
+                stream=False, chunk_size=1000, merger=None, loaded_status='LOADED'):
+    """Validate and load each (file, result_fn) pair, adding the results to total_stats.
+    
+    Files handed to `merger` are not loaded here; they are returned with
+    their timings for _load_merged.
+    """
+    merged_files = []
+    for excel_file, get_transformed in files:
         logger.info(f"Processing: {excel_file.name}")
+        timings = new_timings()
         try:
-            raw_data = parser.parse_file(excel_file)
-            transformed = transformer.transform(raw_data, excel_file.name)
-            stats = loader.load_data(transformed)
+            transformed, timings = get_transformed()
+            
+            # Streams are parsed/transformed while loading; don't count that as load time
+            upstream_before = timings['parse'] + timings['transform']
+            start = time.perf_counter()
+            if stream:
+                rejected = []
+                records = validator.validate_stream(transformed, rejected)
+                stats = loader.load_stream(records, chunk_size, rejected)
+            else:
+                transformed, rejected = validator.validate(transformed)
+                if merger is not None:
+                    merger.add(transformed, rejected)
+                    merged_files.append((excel_file, timings))
+                    logger.info(f"  ✓ {len(transformed['stations'])} stations, "
+                                f"{len(transformed['connectors'])} connectors queued for merge")
+                    continue
+                stats = loader.load_data(transformed, rejected)
+            upstream = timings['parse'] + timings['transform'] - upstream_before
+            timings['load'] = time.perf_counter() - start - upstream
+            checkpoint()  # --profile: the file's rows are still in memory here
             
             total_stats['files_processed'] += 1
             total_stats['stations_inserted'] += stats['stations_inserted']
             total_stats['stations_updated'] += stats['stations_updated']
+            total_stats['stations_unchanged'] += stats['stations_unchanged']
             total_stats['connectors_inserted'] += stats['connectors_inserted']
+            total_stats['rows_quarantined'] += stats['rows_quarantined']
+            
+            rows = (stats['stations_inserted'] + stats['stations_updated']
+                    + stats['stations_unchanged'] + stats['connectors_inserted'])
+            metrics.record_file(excel_file.name, timings, rows, 'LOADED')
+            loader.record_file(fingerprints[excel_file], loaded_status, stats, timings=timings)
             
             logger.info(f"  ✓ {stats['stations_inserted']} stations inserted, "
                        f"{stats['stations_updated']} updated, "
-                       f"{stats['connectors_inserted']} connectors")
+                       f"{stats['stations_unchanged']} unchanged, "
+                       f"{stats['connectors_inserted']} connectors, "
+                       f"{stats['rows_quarantined']} rows quarantined")
         except Exception as e:
             logger.error(f"Error processing {excel_file.name}: {e}")
+            loader.rollback()
+            loader.record_error(excel_file.name, getattr(e, 'error_type', 'INGEST_ERROR'), str(e))
+            metrics.record_file(excel_file.name, timings, 0, 'FAILED')
+            loader.record_file(fingerprints[excel_file], 'FAILED', error_message=str(e), timings=timings)
+            total_stats['errors_count'] += 1
+    
+    return merged_files
+
+def _export_metrics(config, metrics, stats, status, last_success=None):
+    if not config.metrics_file and not config.pushgateway_url:
+        return
+    text = metrics.to_prometheus(stats, status, last_success)
+    try:
+        if config.metrics_file:
+            write_textfile(config.metrics_file, text)
+        if config.pushgateway_url:
+            push_to_gateway(config.pushgateway_url, text)
+    except OSError as e:
+        logger.error(f"Failed to export metrics: {e}")
+
+def cmd_ingest(args):
+    logger.info("Starting ingestion")
+    if args.archive:
+        logger.info(f"Archive: {args.archive}")
+    else:
+        logger.info(f"Input directory: {args.input_dir}")
+    
+    config = load_config()
+    if args.cache_dir:
+        config.parse_cache_dir = args.cache_dir
+    if args.metrics_file:
+        config.metrics_file = args.metrics_file
+    if args.pushgateway:
+        config.pushgateway_url = args.pushgateway
+    batch_id = uuid.uuid4()
+    
+    loader = DatabaseLoader(config, batch_id, bulk=(args.loader == 'copy'))
+    validator = DataValidator(config)
+    
+    excel_files, fingerprints = _input_files(args)
+    
+    metrics = IngestionMetrics()
+    loader.connect()
+    loader.start_batch()
+    
+    if args.full_refresh:
+        loader.begin_full_refresh()
+    
+    excel_files, files_skipped = _pending_files(loader, excel_files, fingerprints, args.force or args.full_refresh)
+    if args.stream:
+        logger.info(f"Streaming mode, chunk size {args.chunk_size}")
+        files = _streamed_files(config, excel_files)
+    elif args.pipeline:
+        logger.info(f"Pipelined mode, queue size {args.queue_size}")
+        files = _pipelined_files(config, excel_files, fingerprints, args.queue_size)
+    else:
+        if args.workers > 1:
+            logger.info(f"Parsing with {args.workers} worker processes")
+        files = _transformed_files(config, excel_files, fingerprints, args.workers)
+    
+    total_stats = _new_batch_stats(files_skipped)
+    
+    # Full-refresh files only count as loaded once the swap commits
+    loaded_status = 'STAGED' if args.full_refresh else 'LOADED'
+    # With --merge, files are only parsed, transformed and validated in the loop
+    merger = BatchMerger() if args.merge else None
+    merged_files = _load_files(files, loader, validator, fingerprints, metrics, total_stats,
+                               stream=args.stream, chunk_size=args.chunk_size, merger=merger,
+                               loaded_status=loaded_status)
+    
+    if merged_files:
+        _load_merged(loader, merger, merged_files, fingerprints, metrics, total_stats, loaded_status)
+    
+    status = 'COMPLETED'
+    if args.full_refresh:
+        if total_stats['errors_count'] or not total_stats['files_processed']:
+            # Swapping in a partial batch would delete every station of the failed files
+            logger.error("Full refresh aborted, live tables left unchanged")
+            loader.abort_full_refresh()
+            status = 'FAILED'
+        else:
+            start = time.perf_counter()
+            try:
+                total_stats.update(loader.finish_full_refresh())
+            except Exception as e:
+                logger.error(f"Full refresh swap failed, live tables left unchanged: {e}")
+                loader.abort_full_refresh()
+                loader.record_error('(full refresh)', 'REFRESH_ERROR', str(e))
+                total_stats['errors_count'] += 1
+                status = 'FAILED'
+            metrics.record_stage('load', time.perf_counter() - start)
     
-    loader.complete_batch(total_stats)
+    summary = metrics.summary()
+    loader.complete_batch(total_stats, summary, status)
+    last_success = loader.last_success_timestamp() if status != 'COMPLETED' else None
     loader.disconnect()
+    _export_metrics(config, metrics, total_stats, status, last_success)
     
     logger.info("=" * 80)
-    logger.info(f"COMPLETED - Batch ID: {batch_id}")
-    logger.info(f"Files: {total_stats['files_processed']}")
-    logger.info(f"Stations: {total_stats['stations_inserted']} inserted, {total_stats['stations_updated']} updated")
+    logger.info(f"{status} - Batch ID: {batch_id}")
+    logger.info(f"Files: {total_stats['files_processed']} processed, {total_stats['files_skipped']} skipped")
+    logger.info(f"Stations: {total_stats['stations_inserted']} inserted, {total_stats['stations_updated']} updated, "
+                f"{total_stats['stations_unchanged']} unchanged")
     logger.info(f"Connectors: {total_stats['connectors_inserted']}")
+    if args.full_refresh:
+        logger.info(f"Deleted: {total_stats.get('stations_deleted', 0)} stations, "
+                    f"{total_stats.get('connectors_deleted', 0)} connectors")
+    logger.info(f"Quarantined rows: {total_stats['rows_quarantined']} (see ingestion_errors)")
+    if args.merge:
+        logger.info(f"Merged duplicates: {total_stats['duplicates_merged']}, "
+                    f"{total_stats['merge_conflicts']} conflicting (see ingestion_errors MERGE_CONFLICT)")
+    logger.info(f"Errors: {total_stats['errors_count']}")
+    logger.info(f"Time: parse {summary['parse_seconds']}s, transform {summary['transform_seconds']}s, "
+                f"load {summary['load_seconds']}s, wall {summary['wall_seconds']}s "
+                f"({summary['rows_per_second']} rows/s, peak RSS {summary['peak_rss_bytes'] // (1024 * 1024)} MB)")
     logger.info("=" * 80)
     
+    return 0 if status == 'COMPLETED' else 1
+
+def _ingest_changes(config, loader, parser, transformer, validator, excel_files):
+    """Load the new or changed files of one watch scan as a small batch."""
+    fingerprints = {f: FileFingerprint.of(f) for f in excel_files}
+    excel_files, _ = _pending_files(loader, excel_files, fingerprints, force=False)
+    if not excel_files:
+        return
+    
+    loader.batch_id = str(uuid.uuid4())
+    loader.start_batch()
+    metrics = IngestionMetrics()
+    total_stats = _new_batch_stats()
+    files = (
+        (f, lambda f=f: _run_stages(parser, transformer, f, fingerprints[f].content_hash))
+        for f in excel_files
+    )
+    _load_files(files, loader, validator, fingerprints, metrics, total_stats)
+    loader.complete_batch(total_stats, metrics.summary())
+    _export_metrics(config, metrics, total_stats, 'COMPLETED')
+    
+    logger.info(f"Batch {loader.batch_id}: {total_stats['files_processed']} files, "
+                f"{total_stats['stations_inserted']} stations inserted, "
+                f"{total_stats['stations_updated']} updated, {total_stats['errors_count']} errors")
+
+def cmd_watch(args):
+    config = load_config()
+    if args.cache_dir:
+        config.parse_cache_dir = args.cache_dir
+    if args.metrics_file:
+        config.metrics_file = args.metrics_file
+    if args.pushgateway:
+        config.pushgateway_url = args.pushgateway
+    
+    # Connection, parser and gazetteer index are built once and reused by every batch
+    loader = DatabaseLoader(config, None)
+    validator = DataValidator(config)
+    parser = ExcelParser(config, cache=ParseCache.from_config(config))
+    transformer = DataTransformer(config, address_parser=AddressParser())
+    watcher = DirectoryWatcher(args.input_dir, settle_seconds=args.settle_seconds,
+                               poll_interval=args.poll_interval, use_inotify=not args.poll)
+    loader.connect()
+    
+    try:
+        for excel_files in watcher.batches():
+            try:
+                _ingest_changes(config, loader, parser, transformer, validator, excel_files)
+            except (psycopg2.Error, OSError) as e:
+                # Per-file errors are recorded by _load_files; this is the database (or the
+                # directory) itself failing. Anything else is a bug and stops the watch.
+                logger.error(f"Batch failed, retrying in {args.retry_seconds}s: {e}")
+                watcher.retry(excel_files)
+                time.sleep(args.retry_seconds)
+                try:
+                    loader.disconnect()
+                    loader.connect()
+                except psycopg2.Error as reconnect_error:
+                    logger.error(f"Reconnect failed: {reconnect_error}")
+    except KeyboardInterrupt:
+        logger.info("Stopping watch")
+    finally:
+        watcher.close()
+        loader.disconnect()
+    
+    return 0
+
+def cmd_enqueue(args):
+    config = load_config()
+    batch_id = uuid.uuid4()
+    loader = DatabaseLoader(config, batch_id)
+    queue = WorkQueue(config, worker_id='coordinator')
+    
+    excel_files, fingerprints = _input_files(args)
+    loader.connect()
+    queue.connect()
+    loader.start_batch()
+    
+    excel_files, files_skipped = _pending_files(loader, excel_files, fingerprints, args.force)
+    queue.enqueue(batch_id, [fingerprints[f] for f in excel_files], files_skipped)
+    # Nothing to do completes the batch right away
+    queue.rollup(batch_id)
+    queue.disconnect()
+    loader.disconnect()
+    
+    logger.info(f"Batch {batch_id}: start `cli.py work` on any machine that can read the input files")
+    print(batch_id)
+    return 0
+
+def _task_file(file_path):
+    """The file or archive member a queue task refers to."""
+    if '!' in file_path and not Path(file_path).exists():
+        return find_member(file_path)
+    return Path(file_path)
+
+def _work_task(config, queue, loader, validator, task):
+    """Parse, transform and load one claimed file, then report the outcome to the queue."""
+    fingerprint = FileFingerprint(task['file_path'], task['file_size'], task['file_mtime'],
+                                  _content_hash=task['content_hash'])
+    loader.batch_id = str(task['batch_id'])
+    name = Path(task['file_path']).name
+    logger.info(f"Processing task {task['id']} (attempt {task['attempts']}): {name}")
+    timings = new_timings()
+    
+    with queue.heartbeat(task):
+        try:
+            excel_file = _task_file(task['file_path'])
+            if not isinstance(excel_file, Path):
+                fingerprint = FileFingerprint.of_member(excel_file)
+            transformed, timings = _parse_and_transform(config, excel_file, fingerprint.content_hash)
+            
+            start = time.perf_counter()
+            transformed, rejected = validator.validate(transformed)
+            stats = loader.load_data(transformed, rejected)
+            timings['load'] = time.perf_counter() - start
+            loader.record_file(fingerprint, 'LOADED', stats, timings=timings)
+        except Exception as e:
+            logger.error(f"Error processing {name}: {e}")
+            loader.rollback()
+            loader.record_error(name, getattr(e, 'error_type', 'INGEST_ERROR'), str(e))
+            loader.record_file(fingerprint, 'FAILED', error_message=str(e), timings=timings)
+            queue.fail(task, str(e), timings)
+            return
+    
+    queue.complete(task, stats, timings)
+    logger.info(f"  ✓ {stats['stations_inserted']} stations inserted, "
+               f"{stats['stations_updated']} updated, "
+               f"{stats['stations_unchanged']} unchanged, "
+               f"{stats['connectors_inserted']} connectors, "
+               f"{stats['rows_quarantined']} rows quarantined")
+
+def cmd_work(args):
+    config = load_config()
+    if args.cache_dir:
+        config.parse_cache_dir = args.cache_dir
+    worker_id = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    
+    queue = WorkQueue(config, worker_id, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+    loader = DatabaseLoader(config, None)
+    validator = DataValidator(config)
+    queue.connect()
+    loader.connect()
+    logger.info(f"Worker {worker_id} started")
+    
+    processed = 0
+    try:
+        while True:
+            task = queue.claim(args.batch_id)
+            if task is None:
+                if not args.wait:
+                    break
+                time.sleep(args.poll_interval)
+                continue
+            _work_task(config, queue, loader, validator, task)
+            processed += 1
+    finally:
+        loader.disconnect()
+        queue.disconnect()
+    
+    logger.info(f"Worker {worker_id} finished after {processed} tasks")
+    return 0
+
+def cmd_generate(args):
+    stations = args.stations or int(BASE_STATIONS * args.scale)
+    generator = SyntheticGenerator(seed=args.seed)
+    paths = generator.generate(args.output_dir, stations, stations_per_file=args.stations_per_file)
+    logger.info(f"Wrote {len(paths)} files, {generator.next_connector - 1} connectors")
     return 0
 
 def main():
@@ -77,16 +521,137 @@ def main():
     subparsers = parser.add_subparsers(dest='command')
     
     ingest_parser = subparsers.add_parser('ingest', help='Ingest Excel files')
-    ingest_parser.add_argument('--input-dir', required=True, help='Directory with Excel files')
+    source = ingest_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input-dir', help='Directory with Excel files')
+    source.add_argument('--archive', help='zip or tar(.gz) archive with Excel files, read without extracting')
+    ingest_parser.add_argument('--workers', type=int, default=1,
+                               help='Parse/transform files in N worker processes (default: 1)')
+    ingest_parser.add_argument('--force', action='store_true',
+                               help='Reload files even if the manifest says they are already loaded')
+    ingest_parser.add_argument('--cache-dir',
+                               help='Cache parsed spreadsheets as Arrow files in this directory '
+                                    '(default: $EPDK_PARSE_CACHE_DIR, disabled if unset)')
+    ingest_parser.add_argument('--loader', choices=['copy', 'row'], default='copy',
+                               help='copy: COPY into staging tables + set-based merge (default); '
+                                    'row: one upsert per station/connector')
+    ingest_parser.add_argument('--full-refresh', action='store_true',
+                               help='Rebuild stations/connectors from all input files in shadow tables and '
+                                    'swap them in atomically; stations missing from the input are deleted')
+    ingest_parser.add_argument('--merge', action='store_true',
+                               help='Deduplicate stations/connectors across all files (later file wins) '
+                                    'and load them as one set; conflicts go to ingestion_errors')
+    ingest_parser.add_argument('--pipeline', action='store_true',
+                               help='Overlap parsing, transformation and loading in concurrent stages')
+    ingest_parser.add_argument('--queue-size', type=int, default=2,
+                               help='Files buffered between pipeline stages (default: 2)')
+    ingest_parser.add_argument('--metrics-file',
+                               help='Write Prometheus metrics to this file for the node_exporter textfile '
+                                    'collector (default: $EPDK_METRICS_FILE)')
+    ingest_parser.add_argument('--pushgateway',
+                               help='Push Prometheus metrics to this Pushgateway URL (default: $PUSHGATEWAY_URL)')
+    ingest_parser.add_argument('--stream', action='store_true',
+                               help='Stream rows from parser to loader with bounded memory')
+    ingest_parser.add_argument('--chunk-size', type=int, default=1000,
+                               help='Rows per loader chunk in streaming mode (default: 1000)')
+    ingest_parser.add_argument('--profile', metavar='PREFIX',
+                               help='Profile the run with cProfile and tracemalloc; writes PREFIX.cpu.folded '
+                                    'and PREFIX.alloc.folded (collapsed stacks for flame graphs) and PREFIX.prof')
+    ingest_parser.add_argument('--profile-frames', type=int, default=32,
+                               help='Frames kept per allocation traceback with --profile (default: 32); 0 skips '
+                                    'allocation tracing, which slows parsing down many times over')
+    
+    watch_parser = subparsers.add_parser('watch', help='Ingest new or changed Excel files as they land')
+    watch_parser.add_argument('--input-dir', required=True, help='Directory to watch for Excel files')
+    watch_parser.add_argument('--settle-seconds', type=float, default=2.0,
+                              help='Wait until a file has not changed for this long before loading it (default: 2)')
+    watch_parser.add_argument('--poll-interval', type=float, default=1.0,
+                              help='Seconds between directory scans when polling (default: 1)')
+    watch_parser.add_argument('--poll', action='store_true',
+                              help='Poll instead of using inotify, e.g. for network file systems')
+    watch_parser.add_argument('--retry-seconds', type=float, default=10.0,
+                              help='Wait before retrying a batch the database rejected (default: 10)')
+    watch_parser.add_argument('--cache-dir',
+                              help='Cache parsed spreadsheets as Arrow files in this directory '
+                                   '(default: $EPDK_PARSE_CACHE_DIR, disabled if unset)')
+    watch_parser.add_argument('--metrics-file',
+                              help='Write Prometheus metrics of each batch to this file (default: $EPDK_METRICS_FILE)')
+    watch_parser.add_argument('--pushgateway',
+                              help='Push Prometheus metrics of each batch to this URL (default: $PUSHGATEWAY_URL)')
+    
+    enqueue_parser = subparsers.add_parser('enqueue', help='Queue Excel files as a batch for `work` processes')
+    enqueue_source = enqueue_parser.add_mutually_exclusive_group(required=True)
+    enqueue_source.add_argument('--input-dir', help='Directory with Excel files (must be readable by the workers)')
+    enqueue_source.add_argument('--archive', help='zip or tar(.gz) archive with Excel files')
+    enqueue_parser.add_argument('--force', action='store_true',
+                                help='Queue files even if the manifest says they are already loaded')
+    
+    work_parser = subparsers.add_parser('work', help='Claim queued files and load them until the queue is empty')
+    work_parser.add_argument('--batch-id', help='Only work on this batch (default: any batch, oldest first)')
+    work_parser.add_argument('--worker-id', help='Name shown in ingestion_queue.worker (default: host:pid)')
+    work_parser.add_argument('--lease-seconds', type=int, default=300,
+                             help='A task is reclaimed when its worker misses heartbeats this long (default: 300)')
+    work_parser.add_argument('--max-attempts', type=int, default=3,
+                             help='Claims per task before it is marked FAILED (default: 3)')
+    work_parser.add_argument('--wait', action='store_true',
+                             help='Keep polling for new batches instead of exiting when the queue is empty')
+    work_parser.add_argument('--poll-interval', type=float, default=5.0,
+                             help='Seconds between polls with --wait (default: 5)')
+    work_parser.add_argument('--cache-dir',
+                             help='Cache parsed spreadsheets as Arrow files in this directory '
+                                  '(default: $EPDK_PARSE_CACHE_DIR, disabled if unset)')
+    
+    generate_parser = subparsers.add_parser('generate', help='Write synthetic EPDK-format Excel files')
+    generate_parser.add_argument('--output-dir', required=True, help='Directory to write .xlsx files to')
+    generate_parser.add_argument('--scale', type=float, default=1.0,
+                                 help=f'Station count as a multiple of the real export ({BASE_STATIONS}) (default: 1)')
+    generate_parser.add_argument('--stations', type=int, help='Exact station count (overrides --scale)')
+    generate_parser.add_argument('--stations-per-file', type=int, default=500,
+                                 help='Stations per workbook, like EPDK pages (default: 500)')
+    generate_parser.add_argument('--seed', type=int, default=0, help='Random seed (default: 0)')
     
     args = parser.parse_args()
     
+    if args.command == 'ingest':
+        if args.workers < 1:
+            parser.error('--workers must be at least 1')
+        if args.chunk_size < 1:
+            parser.error('--chunk-size must be at least 1')
+        if args.queue_size < 1:
+            parser.error('--queue-size must be at least 1')
+        if args.stream and args.workers > 1:
+            parser.error('--stream runs in a single process and cannot be combined with --workers')
+        if args.pipeline and (args.stream or args.workers > 1):
+            parser.error('--pipeline cannot be combined with --stream or --workers')
+        if args.merge and args.stream:
+            parser.error('--merge holds the whole batch in memory and cannot be combined with --stream')
+        if args.full_refresh and args.loader != 'copy':
+            parser.error('--full-refresh needs --loader copy')
+        if args.profile_frames < 0:
+            parser.error('--profile-frames must be at least 0')
+        if args.profile and (args.pipeline or args.workers > 1):
+            parser.error('--profile only sees the main thread and cannot be combined with --pipeline or --workers')
+    if args.command == 'work' and (args.lease_seconds < 3 or args.max_attempts < 1):
+        parser.error('--lease-seconds must be at least 3 and --max-attempts at least 1')
+    if args.command == 'generate' and args.stations_per_file < 1:
+        parser.error('--stations-per-file must be at least 1')
+    
     if not args.command:
         parser.print_help()
         return 1
     
     if args.command == 'ingest':
+        if args.profile:
+            with Profiler(args.profile, frames=args.profile_frames):
+                return cmd_ingest(args)
         return cmd_ingest(args)
+    if args.command == 'watch':
+        return cmd_watch(args)
+    if args.command == 'enqueue':
+        return cmd_enqueue(args)
+    if args.command == 'work':
+        return cmd_work(args)
+    if args.command == 'generate':
+        return cmd_generate(args)
 
 if __name__ == "__main__":
     sys.exit(main())
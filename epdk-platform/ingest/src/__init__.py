@@ -1,6 +1,18 @@
-from .parser import ExcelParser
-from .transformer import DataTransformer
+from .parser import ExcelParser, ParsedStation, ParsedConnector
+from .transformer import DataTransformer, Station, Connector
+from .gazetteer import AddressParser, OfflineGeocoder
 from .loader import DatabaseLoader
+from .validator import DataValidator
+from .merger import BatchMerger
 from .config import Config, load_config
+from .manifest import FileFingerprint, FileManifest
+from .archive import ArchiveMember, archive_members, find_member
+from .workqueue import WorkQueue
+from .watcher import DirectoryWatcher
+from .pipeline import StageError, pipelined_files
+from .profiling import Profiler
 
-__all__ = ['ExcelParser', 'DataTransformer', 'DatabaseLoader', 'Config', 'load_config']
+__all__ = ['ExcelParser', 'ParsedStation', 'ParsedConnector', 'DataTransformer', 'Station', 'Connector',
+           'AddressParser', 'OfflineGeocoder', 'DatabaseLoader', 'DataValidator', 'BatchMerger', 'Config',
+           'load_config', 'FileFingerprint', 'FileManifest', 'ArchiveMember', 'archive_members', 'find_member',
+           'WorkQueue', 'DirectoryWatcher', 'StageError', 'pipelined_files', 'Profiler']
@@ -0,0 +1,113 @@
+import os
+import tarfile
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same order as the --input-dir listing: all .xls files, then .xlsx
+EXCEL_SUFFIXES = ('.xls', '.xlsx')
+
+# find_member's index of the last archive it listed: (archive path, size, mtime) -> {member name: ArchiveMember}
+_member_index = {}
+
+@dataclass(frozen=True)
+class ArchiveMember:
+    """A spreadsheet inside a zip or tar archive, used in place of a file path.
+
+    Provides the parts of pathlib.Path the pipeline relies on (name,
+    suffix, read_bytes) and is read into memory instead of extracted.
+    Zip members are decompressed on each read; tar members are read while
+    listing, since a compressed tar has no random access.
+    """
+    archive: str
+    member: str
+    size: int
+    mtime: datetime
+    data: bytes = field(default=None, repr=False, compare=False)
+
+    @property
+    def name(self):
+        return PurePosixPath(self.member).name
+
+    @property
+    def suffix(self):
+        return PurePosixPath(self.member).suffix
+
+    @property
+    def path(self):
+        """Manifest key, '<archive path>!<member name>'."""
+        return f"{self.archive}!{self.member}"
+
+    def read_bytes(self):
+        if self.data is not None:
+            return self.data
+        with zipfile.ZipFile(self.archive) as archive:
+            return archive.read(self.member)
+
+def archive_members(archive_path):
+    """Spreadsheets in a zip or tar(.gz) archive, ordered like a directory listing."""
+    archive_path = Path(archive_path).resolve()
+    # An .xlsx is itself a zip file
+    if archive_path.suffix in EXCEL_SUFFIXES:
+        raise ValueError(f"{archive_path.name} is a spreadsheet, not an archive; use --input-dir")
+    if zipfile.is_zipfile(archive_path):
+        members = _zip_members(archive_path)
+    elif tarfile.is_tarfile(archive_path):
+        members = _tar_members(archive_path)
+    else:
+        raise ValueError(f"Not a zip or tar archive: {archive_path}")
+
+    logger.info(f"Found {len(members)} spreadsheets in {archive_path.name}")
+    return sorted(members, key=lambda m: (EXCEL_SUFFIXES.index(m.suffix), m.member))
+
+def _zip_members(archive_path):
+    with zipfile.ZipFile(archive_path) as archive:
+        return [
+            # Zip timestamps carry no zone; reading them as UTC keeps them stable for the manifest
+            ArchiveMember(str(archive_path), info.filename, info.file_size,
+                          datetime(*info.date_time, tzinfo=timezone.utc))
+            for info in archive.infolist()
+            if not info.is_dir() and _is_spreadsheet(info.filename)
+        ]
+
+def _tar_members(archive_path):
+    members = []
+    with tarfile.open(archive_path) as archive:
+        for info in archive:
+            if info.isfile() and _is_spreadsheet(info.name):
+                members.append(ArchiveMember(
+                    str(archive_path), info.name, info.size,
+                    datetime.fromtimestamp(info.mtime, tz=timezone.utc),
+                    data=archive.extractfile(info).read()
+                ))
+    return members
+
+def _is_spreadsheet(member_name):
+    path = PurePosixPath(member_name)
+    # Skip macOS resource forks ('__MACOSX/…/._1.xls') that Finder adds to zips
+    if '__MACOSX' in path.parts or path.name.startswith('._'):
+        return False
+    return path.suffix in EXCEL_SUFFIXES
+
+def find_member(member_path):
+    """The ArchiveMember behind an ArchiveMember.path ('<archive path>!<member name>').
+
+    A worker gets one task per member, so the archive is listed once and
+    its members are looked up in an index until the archive file changes
+    or another archive is asked for. Only one archive is indexed at a time,
+    as tar members hold their data.
+    """
+    archive_path, _, member = member_path.rpartition('!')
+    stat = os.stat(archive_path)
+    key = (archive_path, stat.st_size, stat.st_mtime_ns)
+    if key not in _member_index:
+        _member_index.clear()
+        _member_index[key] = {m.member: m for m in archive_members(archive_path)}
+    try:
+        return _member_index[key][member]
+    except KeyError:
+        raise FileNotFoundError(f"{member} not found in {archive_path}") from None
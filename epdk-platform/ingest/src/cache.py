@@ -0,0 +1,113 @@
+import os
+import tempfile
+from pathlib import Path
+import logging
+
+# pyarrow is optional and heavy to import, so it is loaded on first use
+pa = None
+ipc = None
+
+logger = logging.getLogger(__name__)
+
+CACHED_KINDS = ('stations', 'connectors')
+
+def _import_pyarrow():
+    global pa, ipc
+    if pa is not None:
+        return
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError as e:
+        raise ImportError("pyarrow is required for the parse cache (pip install pyarrow)") from e
+    pa, ipc = pyarrow, pyarrow.ipc
+
+class ParseCache:
+    """Arrow IPC cache of parsed spreadsheets, keyed by parser.cache_key().
+    
+    Each cached file is stored as '<key>.stations.arrow' and
+    '<key>.connectors.arrow', the key being the file's content hash plus
+    the parser version. Hits are read whole into Python lists, since
+    the parser turns every value into a record anyway, and refresh the
+    files' mtime; the least recently used entries are evicted once the
+    directory grows past max_bytes.
+    """
+    
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        _import_pyarrow()
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+    
+    @classmethod
+    def from_config(cls, config):
+        if not config or not config.parse_cache_dir:
+            return None
+        return cls(config.parse_cache_dir, config.parse_cache_max_bytes)
+    
+    def _path(self, content_hash, kind):
+        return self.cache_dir / f"{content_hash}.{kind}.arrow"
+    
+    def get(self, content_hash, source_file):
+        """Return cached {kind: {field: values}} columns, or None on a miss.
+        
+        source_file is only used for logging; callers add it to the records.
+        """
+        paths = {kind: self._path(content_hash, kind) for kind in CACHED_KINDS}
+        if not all(p.exists() for p in paths.values()):
+            return None
+        
+        columns = {}
+        try:
+            for kind, path in paths.items():
+                with pa.OSFile(str(path)) as source:
+                    table = ipc.open_file(source).read_all()
+                columns[kind] = {name: table.column(name).to_pylist() for name in table.column_names}
+                os.utime(path)
+        except (OSError, pa.ArrowInvalid) as e:
+            logger.warning(f"Ignoring unreadable cache entry {content_hash}: {e}")
+            return None
+        
+        logger.info(f"Parse cache hit: {source_file} ({content_hash[:12]})")
+        return columns
+    
+    def put(self, content_hash, columns):
+        """Store {kind: {field: values}} columns of parsed strings.
+        
+        source_file is left out because the same content may arrive under
+        another file name.
+        """
+        for kind in CACHED_KINDS:
+            table = pa.table({field: pa.array(values, pa.string()) for field, values in columns[kind].items()})
+            
+            # Write to a temp file and rename so concurrent readers never see partial files
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                os.replace(tmp_path, self._path(content_hash, kind))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        
+        self.evict()
+    
+    def evict(self):
+        entries = {}
+        for path in self.cache_dir.glob('*.arrow'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            content_hash = path.name.split('.', 1)[0]
+            size, mtime = entries.get(content_hash, (0, 0))
+            entries[content_hash] = (size + stat.st_size, max(mtime, stat.st_mtime))
+        
+        total = sum(size for size, _ in entries.values())
+        for content_hash, (size, _) in sorted(entries.items(), key=lambda e: e[1][1]):
+            if total <= self.max_bytes:
+                break
+            for kind in CACHED_KINDS:
+                self._path(content_hash, kind).unlink(missing_ok=True)
+            total -= size
+            logger.info(f"Evicted parse cache entry {content_hash[:12]}")
@@ -0,0 +1,378 @@
+import hashlib
+import math
+import re
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Province -> districts, in official spelling. Non-metropolitan provinces
+# list their 'Merkez' (central) district; EPDK also writes 'Merkez' for
+# metropolitan provinces, so AddressParser accepts it for every province.
+PROVINCE_DISTRICTS = {
+    'ADANA': ['Aladağ', 'Ceyhan', 'Çukurova', 'Feke', 'İmamoğlu', 'Karaisalı', 'Karataş', 'Kozan',
+              'Pozantı', 'Saimbeyli', 'Sarıçam', 'Seyhan', 'Tufanbeyli', 'Yumurtalık', 'Yüreğir'],
+    'ADIYAMAN': ['Merkez', 'Besni', 'Çelikhan', 'Gerger', 'Gölbaşı', 'Kahta', 'Samsat', 'Sincik', 'Tut'],
+    'AFYONKARAHİSAR': ['Merkez', 'Başmakçı', 'Bayat', 'Bolvadin', 'Çay', 'Çobanlar', 'Dazkırı', 'Dinar',
+                       'Emirdağ', 'Evciler', 'Hocalar', 'İhsaniye', 'İscehisar', 'Kızılören', 'Sandıklı',
+                       'Sinanpaşa', 'Sultandağı', 'Şuhut'],
+    'AĞRI': ['Merkez', 'Diyadin', 'Doğubayazıt', 'Eleşkirt', 'Hamur', 'Patnos', 'Taşlıçay', 'Tutak'],
+    'AKSARAY': ['Merkez', 'Ağaçören', 'Eskil', 'Gülağaç', 'Güzelyurt', 'Ortaköy', 'Sarıyahşi', 'Sultanhanı'],
+    'AMASYA': ['Merkez', 'Göynücek', 'Gümüşhacıköy', 'Hamamözü', 'Merzifon', 'Suluova', 'Taşova'],
+    'ANKARA': ['Akyurt', 'Altındağ', 'Ayaş', 'Bala', 'Beypazarı', 'Çamlıdere', 'Çankaya', 'Çubuk', 'Elmadağ',
+               'Etimesgut', 'Evren', 'Gölbaşı', 'Güdül', 'Haymana', 'Kahramankazan', 'Kalecik', 'Keçiören',
+               'Kızılcahamam', 'Mamak', 'Nallıhan', 'Polatlı', 'Pursaklar', 'Sincan', 'Şereflikoçhisar',
+               'Yenimahalle'],
+    'ANTALYA': ['Akseki', 'Aksu', 'Alanya', 'Demre', 'Döşemealtı', 'Elmalı', 'Finike', 'Gazipaşa',
+                'Gündoğmuş', 'İbradı', 'Kaş', 'Kemer', 'Kepez', 'Konyaaltı', 'Korkuteli', 'Kumluca',
+                'Manavgat', 'Muratpaşa', 'Serik'],
+    'ARDAHAN': ['Merkez', 'Çıldır', 'Damal', 'Göle', 'Hanak', 'Posof'],
+    'ARTVİN': ['Merkez', 'Ardanuç', 'Arhavi', 'Borçka', 'Hopa', 'Kemalpaşa', 'Murgul', 'Şavşat', 'Yusufeli'],
+    'AYDIN': ['Bozdoğan', 'Buharkent', 'Çine', 'Didim', 'Efeler', 'Germencik', 'İncirliova', 'Karacasu',
+              'Karpuzlu', 'Koçarlı', 'Köşk', 'Kuşadası', 'Kuyucak', 'Nazilli', 'Söke', 'Sultanhisar',
+              'Yenipazar'],
+    'BALIKESİR': ['Altıeylül', 'Ayvalık', 'Balya', 'Bandırma', 'Bigadiç', 'Burhaniye', 'Dursunbey', 'Edremit',
+                  'Erdek', 'Gömeç', 'Gönen', 'Havran', 'İvrindi', 'Karesi', 'Kepsut', 'Manyas', 'Marmara',
+                  'Savaştepe', 'Sındırgı', 'Susurluk'],
+    'BARTIN': ['Merkez', 'Amasra', 'Kurucaşile', 'Ulus'],
+    'BATMAN': ['Merkez', 'Beşiri', 'Gercüş', 'Hasankeyf', 'Kozluk', 'Sason'],
+    'BAYBURT': ['Merkez', 'Aydıntepe', 'Demirözü'],
+    'BİLECİK': ['Merkez', 'Bozüyük', 'Gölpazarı', 'İnhisar', 'Osmaneli', 'Pazaryeri', 'Söğüt', 'Yenipazar'],
+    'BİNGÖL': ['Merkez', 'Adaklı', 'Genç', 'Karlıova', 'Kiğı', 'Solhan', 'Yayladere', 'Yedisu'],
+    'BİTLİS': ['Merkez', 'Adilcevaz', 'Ahlat', 'Güroymak', 'Hizan', 'Mutki', 'Tatvan'],
+    'BOLU': ['Merkez', 'Dörtdivan', 'Gerede', 'Göynük', 'Kıbrıscık', 'Mengen', 'Mudurnu', 'Seben', 'Yeniçağa'],
+    'BURDUR': ['Merkez', 'Ağlasun', 'Altınyayla', 'Bucak', 'Çavdır', 'Çeltikçi', 'Gölhisar', 'Karamanlı',
+               'Kemer', 'Tefenni', 'Yeşilova'],
+    'BURSA': ['Büyükorhan', 'Gemlik', 'Gürsu', 'Harmancık', 'İnegöl', 'İznik', 'Karacabey', 'Keles', 'Kestel',
+              'Mudanya', 'Mustafakemalpaşa', 'Nilüfer', 'Orhaneli', 'Orhangazi', 'Osmangazi', 'Yenişehir',
+              'Yıldırım'],
+    'ÇANAKKALE': ['Merkez', 'Ayvacık', 'Bayramiç', 'Biga', 'Bozcaada', 'Çan', 'Eceabat', 'Ezine', 'Gelibolu',
+                  'Gökçeada', 'Lapseki', 'Yenice'],
+    'ÇANKIRI': ['Merkez', 'Atkaracalar', 'Bayramören', 'Çerkeş', 'Eldivan', 'Ilgaz', 'Kızılırmak', 'Korgun',
+                'Kurşunlu', 'Orta', 'Şabanözü', 'Yapraklı'],
+    'ÇORUM': ['Merkez', 'Alaca', 'Bayat', 'Boğazkale', 'Dodurga', 'İskilip', 'Kargı', 'Laçin', 'Mecitözü',
+              'Oğuzlar', 'Ortaköy', 'Osmancık', 'Sungurlu', 'Uğurludağ'],
+    'DENİZLİ': ['Acıpayam', 'Babadağ', 'Baklan', 'Bekilli', 'Beyağaç', 'Bozkurt', 'Buldan', 'Çal', 'Çameli',
+                'Çardak', 'Çivril', 'Güney', 'Honaz', 'Kale', 'Merkezefendi', 'Pamukkale', 'Sarayköy',
+                'Serinhisar', 'Tavas'],
+    'DİYARBAKIR': ['Bağlar', 'Bismil', 'Çermik', 'Çınar', 'Çüngüş', 'Dicle', 'Eğil', 'Ergani', 'Hani', 'Hazro',
+                   'Kayapınar', 'Kocaköy', 'Kulp', 'Lice', 'Silvan', 'Sur', 'Yenişehir'],
+    'DÜZCE': ['Merkez', 'Akçakoca', 'Cumayeri', 'Çilimli', 'Gölyaka', 'Gümüşova', 'Kaynaşlı', 'Yığılca'],
+    'EDİRNE': ['Merkez', 'Enez', 'Havsa', 'İpsala', 'Keşan', 'Lalapaşa', 'Meriç', 'Süloğlu', 'Uzunköprü'],
+    'ELAZIĞ': ['Merkez', 'Ağın', 'Alacakaya', 'Arıcak', 'Baskil', 'Karakoçan', 'Keban', 'Kovancılar', 'Maden',
+               'Palu', 'Sivrice'],
+    'ERZİNCAN': ['Merkez', 'Çayırlı', 'İliç', 'Kemah', 'Kemaliye', 'Otlukbeli', 'Refahiye', 'Tercan', 'Üzümlü'],
+    'ERZURUM': ['Aşkale', 'Aziziye', 'Çat', 'Hınıs', 'Horasan', 'İspir', 'Karaçoban', 'Karayazı', 'Köprüköy',
+                'Narman', 'Oltu', 'Olur', 'Palandöken', 'Pasinler', 'Pazaryolu', 'Şenkaya', 'Tekman', 'Tortum',
+                'Uzundere', 'Yakutiye'],
+    'ESKİŞEHİR': ['Alpu', 'Beylikova', 'Çifteler', 'Günyüzü', 'Han', 'İnönü', 'Mahmudiye', 'Mihalgazi',
+                  'Mihalıççık', 'Odunpazarı', 'Sarıcakaya', 'Seyitgazi', 'Sivrihisar', 'Tepebaşı'],
+    'GAZİANTEP': ['Araban', 'İslahiye', 'Karkamış', 'Nizip', 'Nurdağı', 'Oğuzeli', 'Şahinbey', 'Şehitkamil',
+                  'Yavuzeli'],
+    'GİRESUN': ['Merkez', 'Alucra', 'Bulancak', 'Çamoluk', 'Çanakçı', 'Dereli', 'Doğankent', 'Espiye',
+                'Eynesil', 'Görele', 'Güce', 'Keşap', 'Piraziz', 'Şebinkarahisar', 'Tirebolu', 'Yağlıdere'],
+    'GÜMÜŞHANE': ['Merkez', 'Kelkit', 'Köse', 'Kürtün', 'Şiran', 'Torul'],
+    'HAKKARİ': ['Merkez', 'Çukurca', 'Derecik', 'Şemdinli', 'Yüksekova'],
+    'HATAY': ['Altınözü', 'Antakya', 'Arsuz', 'Belen', 'Defne', 'Dörtyol', 'Erzin', 'Hassa', 'İskenderun',
+              'Kırıkhan', 'Kumlu', 'Payas', 'Reyhanlı', 'Samandağ', 'Yayladağı'],
+    'IĞDIR': ['Merkez', 'Aralık', 'Karakoyunlu', 'Tuzluca'],
+    'ISPARTA': ['Merkez', 'Aksu', 'Atabey', 'Eğirdir', 'Gelendost', 'Gönen', 'Keçiborlu', 'Senirkent',
+                'Sütçüler', 'Şarkikaraağaç', 'Uluborlu', 'Yalvaç', 'Yenişarbademli'],
+    'İSTANBUL': ['Adalar', 'Arnavutköy', 'Ataşehir', 'Avcılar', 'Bağcılar', 'Bahçelievler', 'Bakırköy',
+                 'Başakşehir', 'Bayrampaşa', 'Beşiktaş', 'Beykoz', 'Beylikdüzü', 'Beyoğlu', 'Büyükçekmece',
+                 'Çatalca', 'Çekmeköy', 'Esenler', 'Esenyurt', 'Eyüpsultan', 'Fatih', 'Gaziosmanpaşa',
+                 'Güngören', 'Kadıköy', 'Kağıthane', 'Kartal', 'Küçükçekmece', 'Maltepe', 'Pendik',
+                 'Sancaktepe', 'Sarıyer', 'Silivri', 'Sultanbeyli', 'Sultangazi', 'Şile', 'Şişli', 'Tuzla',
+                 'Ümraniye', 'Üsküdar', 'Zeytinburnu'],
+    'İZMİR': ['Aliağa', 'Balçova', 'Bayındır', 'Bayraklı', 'Bergama', 'Beydağ', 'Bornova', 'Buca', 'Çeşme',
+              'Çiğli', 'Dikili', 'Foça', 'Gaziemir', 'Güzelbahçe', 'Karabağlar', 'Karaburun', 'Karşıyaka',
+              'Kemalpaşa', 'Kınık', 'Kiraz', 'Konak', 'Menderes', 'Menemen', 'Narlıdere', 'Ödemiş',
+              'Seferihisar', 'Selçuk', 'Tire', 'Torbalı', 'Urla'],
+    'KAHRAMANMARAŞ': ['Afşin', 'Andırın', 'Çağlayancerit', 'Dulkadiroğlu', 'Ekinözü', 'Elbistan', 'Göksun',
+                      'Nurhak', 'Onikişubat', 'Pazarcık', 'Türkoğlu'],
+    'KARABÜK': ['Merkez', 'Eflani', 'Eskipazar', 'Ovacık', 'Safranbolu', 'Yenice'],
+    'KARAMAN': ['Merkez', 'Ayrancı', 'Başyayla', 'Ermenek', 'Kazımkarabekir', 'Sarıveliler'],
+    'KARS': ['Merkez', 'Akyaka', 'Arpaçay', 'Digor', 'Kağızman', 'Sarıkamış', 'Selim', 'Susuz'],
+    'KASTAMONU': ['Merkez', 'Abana', 'Ağlı', 'Araç', 'Azdavay', 'Bozkurt', 'Cide', 'Çatalzeytin', 'Daday',
+                  'Devrekani', 'Doğanyurt', 'Hanönü', 'İhsangazi', 'İnebolu', 'Küre', 'Pınarbaşı', 'Seydiler',
+                  'Şenpazar', 'Taşköprü', 'Tosya'],
+    'KAYSERİ': ['Akkışla', 'Bünyan', 'Develi', 'Felahiye', 'Hacılar', 'İncesu', 'Kocasinan', 'Melikgazi',
+                'Özvatan', 'Pınarbaşı', 'Sarıoğlan', 'Sarız', 'Talas', 'Tomarza', 'Yahyalı', 'Yeşilhisar'],
+    'KIRIKKALE': ['Merkez', 'Bahşılı', 'Balışeyh', 'Çelebi', 'Delice', 'Karakeçili', 'Keskin', 'Sulakyurt',
+                  'Yahşihan'],
+    'KIRKLARELİ': ['Merkez', 'Babaeski', 'Demirköy', 'Kofçaz', 'Lüleburgaz', 'Pehlivanköy', 'Pınarhisar',
+                   'Vize'],
+    'KIRŞEHİR': ['Merkez', 'Akçakent', 'Akpınar', 'Boztepe', 'Çiçekdağı', 'Kaman', 'Mucur'],
+    'KİLİS': ['Merkez', 'Elbeyli', 'Musabeyli', 'Polateli'],
+    'KOCAELİ': ['Başiskele', 'Çayırova', 'Darıca', 'Derince', 'Dilovası', 'Gebze', 'Gölcük', 'İzmit', 'Kandıra',
+                'Karamürsel', 'Kartepe', 'Körfez'],
+    'KONYA': ['Ahırlı', 'Akören', 'Akşehir', 'Altınekin', 'Beyşehir', 'Bozkır', 'Cihanbeyli', 'Çeltik', 'Çumra',
+              'Derbent', 'Derebucak', 'Doğanhisar', 'Emirgazi', 'Ereğli', 'Güneysınır', 'Hadim', 'Halkapınar',
+              'Hüyük', 'Ilgın', 'Kadınhanı', 'Karapınar', 'Karatay', 'Kulu', 'Meram', 'Sarayönü', 'Selçuklu',
+              'Seydişehir', 'Taşkent', 'Tuzlukçu', 'Yalıhüyük', 'Yunak'],
+    'KÜTAHYA': ['Merkez', 'Altıntaş', 'Aslanapa', 'Çavdarhisar', 'Domaniç', 'Dumlupınar', 'Emet', 'Gediz',
+                'Hisarcık', 'Pazarlar', 'Simav', 'Şaphane', 'Tavşanlı'],
+    'MALATYA': ['Akçadağ', 'Arapgir', 'Arguvan', 'Battalgazi', 'Darende', 'Doğanşehir', 'Doğanyol', 'Hekimhan',
+                'Kale', 'Kuluncak', 'Pütürge', 'Yazıhan', 'Yeşilyurt'],
+    'MANİSA': ['Ahmetli', 'Akhisar', 'Alaşehir', 'Demirci', 'Gölmarmara', 'Gördes', 'Kırkağaç', 'Köprübaşı',
+               'Kula', 'Salihli', 'Sarıgöl', 'Saruhanlı', 'Selendi', 'Soma', 'Şehzadeler', 'Turgutlu',
+               'Yunusemre'],
+    'MARDİN': ['Artuklu', 'Dargeçit', 'Derik', 'Kızıltepe', 'Mazıdağı', 'Midyat', 'Nusaybin', 'Ömerli', 'Savur',
+               'Yeşilli'],
+    'MERSİN': ['Akdeniz', 'Anamur', 'Aydıncık', 'Bozyazı', 'Çamlıyayla', 'Erdemli', 'Gülnar', 'Mezitli', 'Mut',
+               'Silifke', 'Tarsus', 'Toroslar', 'Yenişehir'],
+    'MUĞLA': ['Bodrum', 'Dalaman', 'Datça', 'Fethiye', 'Kavaklıdere', 'Köyceğiz', 'Marmaris', 'Menteşe', 'Milas',
+              'Ortaca', 'Seydikemer', 'Ula', 'Yatağan'],
+    'MUŞ': ['Merkez', 'Bulanık', 'Hasköy', 'Korkut', 'Malazgirt', 'Varto'],
+    'NEVŞEHİR': ['Merkez', 'Acıgöl', 'Avanos', 'Derinkuyu', 'Gülşehir', 'Hacıbektaş', 'Kozaklı', 'Ürgüp'],
+    'NİĞDE': ['Merkez', 'Altunhisar', 'Bor', 'Çamardı', 'Çiftlik', 'Ulukışla'],
+    'ORDU': ['Akkuş', 'Altınordu', 'Aybastı', 'Çamaş', 'Çatalpınar', 'Çaybaşı', 'Fatsa', 'Gölköy', 'Gülyalı',
+             'Gürgentepe', 'İkizce', 'Kabadüz', 'Kabataş', 'Korgan', 'Kumru', 'Mesudiye', 'Perşembe', 'Ulubey',
+             'Ünye'],
+    'OSMANİYE': ['Merkez', 'Bahçe', 'Düziçi', 'Hasanbeyli', 'Kadirli', 'Sumbas', 'Toprakkale'],
+    'RİZE': ['Merkez', 'Ardeşen', 'Çamlıhemşin', 'Çayeli', 'Derepazarı', 'Fındıklı', 'Güneysu', 'Hemşin',
+             'İkizdere', 'İyidere', 'Kalkandere', 'Pazar'],
+    'SAKARYA': ['Adapazarı', 'Akyazı', 'Arifiye', 'Erenler', 'Ferizli', 'Geyve', 'Hendek', 'Karapürçek', 'Karasu',
+                'Kaynarca', 'Kocaali', 'Pamukova', 'Sapanca', 'Serdivan', 'Söğütlü', 'Taraklı'],
+    'SAMSUN': ['19 Mayıs', 'Alaçam', 'Asarcık', 'Atakum', 'Ayvacık', 'Bafra', 'Canik', 'Çarşamba', 'Havza',
+               'İlkadım', 'Kavak', 'Ladik', 'Salıpazarı', 'Tekkeköy', 'Terme', 'Vezirköprü', 'Yakakent'],
+    'SİİRT': ['Merkez', 'Baykan', 'Eruh', 'Kurtalan', 'Pervari', 'Şirvan', 'Tillo'],
+    'SİNOP': ['Merkez', 'Ayancık', 'Boyabat', 'Dikmen', 'Durağan', 'Erfelek', 'Gerze', 'Saraydüzü', 'Türkeli'],
+    'SİVAS': ['Merkez', 'Akıncılar', 'Altınyayla', 'Divriği', 'Doğanşar', 'Gemerek', 'Gölova', 'Gürün', 'Hafik',
+              'İmranlı', 'Kangal', 'Koyulhisar', 'Suşehri', 'Şarkışla', 'Ulaş', 'Yıldızeli', 'Zara'],
+    'ŞANLIURFA': ['Akçakale', 'Birecik', 'Bozova', 'Ceylanpınar', 'Eyyübiye', 'Halfeti', 'Haliliye', 'Harran',
+                  'Hilvan', 'Karaköprü', 'Siverek', 'Suruç', 'Viranşehir'],
+    'ŞIRNAK': ['Merkez', 'Beytüşşebap', 'Cizre', 'Güçlükonak', 'İdil', 'Silopi', 'Uludere'],
+    'TEKİRDAĞ': ['Çerkezköy', 'Çorlu', 'Ergene', 'Hayrabolu', 'Kapaklı', 'Malkara', 'Marmaraereğlisi', 'Muratlı',
+                 'Saray', 'Süleymanpaşa', 'Şarköy'],
+    'TOKAT': ['Merkez', 'Almus', 'Artova', 'Başçiftlik', 'Erbaa', 'Niksar', 'Pazar', 'Reşadiye', 'Sulusaray',
+              'Turhal', 'Yeşilyurt', 'Zile'],
+    'TRABZON': ['Akçaabat', 'Araklı', 'Arsin', 'Beşikdüzü', 'Çarşıbaşı', 'Çaykara', 'Dernekpazarı', 'Düzköy',
+                'Hayrat', 'Köprübaşı', 'Maçka', 'Of', 'Ortahisar', 'Sürmene', 'Şalpazarı', 'Tonya', 'Vakfıkebir',
+                'Yomra'],
+    'TUNCELİ': ['Merkez', 'Çemişgezek', 'Hozat', 'Mazgirt', 'Nazımiye', 'Ovacık', 'Pertek', 'Pülümür'],
+    'UŞAK': ['Merkez', 'Banaz', 'Eşme', 'Karahallı', 'Sivaslı', 'Ulubey'],
+    'VAN': ['Bahçesaray', 'Başkale', 'Çaldıran', 'Çatak', 'Edremit', 'Erciş', 'Gevaş', 'Gürpınar', 'İpekyolu',
+            'Muradiye', 'Özalp', 'Saray', 'Tuşba'],
+    'YALOVA': ['Merkez', 'Altınova', 'Armutlu', 'Çınarcık', 'Çiftlikköy', 'Termal'],
+    'YOZGAT': ['Merkez', 'Akdağmadeni', 'Aydıncık', 'Boğazlıyan', 'Çandır', 'Çayıralan', 'Çekerek', 'Kadışehri',
+               'Saraykent', 'Sarıkaya', 'Sorgun', 'Şefaatli', 'Yenifakılı', 'Yerköy'],
+    'ZONGULDAK': ['Merkez', 'Alaplı', 'Çaycuma', 'Devrek', 'Ereğli', 'Gökçebey', 'Kilimli', 'Kozlu'],
+}
+
+# Common short or former names -> canonical province
+PROVINCE_ALIASES = {
+    'AFYON': 'AFYONKARAHİSAR',
+    'MARAŞ': 'KAHRAMANMARAŞ',
+    'K.MARAŞ': 'KAHRAMANMARAŞ',
+    'URFA': 'ŞANLIURFA',
+    'ANTEP': 'GAZİANTEP',
+    'İÇEL': 'MERSİN',
+}
+
+# Former or alternative district names -> canonical district, per province
+DISTRICT_ALIASES = {
+    'İSTANBUL': {'Eyüp': 'Eyüpsultan'},
+    'ANKARA': {'Kazan': 'Kahramankazan'},
+    'SAMSUN': {'Ondokuzmayıs': '19 Mayıs'},
+}
+GENERIC_DISTRICTS = ('Merkez',)
+
+# Words that follow a neighbourhood or street name; a district name in front
+# of one of these is part of the street address, not the district
+STREET_WORDS = frozenset({
+    'MAH', 'MAHALLE', 'MAHALLESI', 'CAD', 'CADDE', 'CADDESI', 'SOK', 'SOKAK', 'SOKAGI',
+    'BULVARI', 'BULV', 'BLV', 'YOLU', 'KOYU', 'KUME', 'MEVKII', 'SITESI',
+})
+
+# Words that follow a neighbourhood or village name ('Ilıca Mahallesi', 'Yazır Köyü')
+PLACE_WORDS = frozenset({'MAH', 'MAHALLE', 'MAHALLESI', 'MH', 'KOYU', 'BELDESI'})
+
+# District and place coordinates for OfflineGeocoder, generated by build_places.py
+PLACES_FILE = Path(__file__).parent / 'data' / 'places_tr.tsv'
+# A place matched farther than this from its district centre is a namesake elsewhere in the province
+MAX_PLACE_KM = 25
+# Jitter radius in degrees per precision level, so stations at one point don't overlap on the map
+JITTER_DEGREES = {'place': 0.002, 'district': 0.01, 'province': 0.05}
+
+_TOKEN_PATTERN = re.compile(r'[A-Z0-9]+')
+
+def fold(text):
+    """ASCII uppercase form of a Turkish name ('Gölbaşı' -> 'GOLBASI'), as normalize_city gives.
+
+    str.upper() already maps 'ı' and 'i' to 'I'; chained replaces are
+    several times faster than str.translate. U+0307 is the combining dot
+    of a decomposed 'İ'.
+    """
+    return (text.upper().replace('İ', 'I').replace('Ş', 'S').replace('Ğ', 'G').replace('Ü', 'U')
+            .replace('Ö', 'O').replace('Ç', 'C').replace('\u0307', ''))
+
+def tokens(text):
+    return _TOKEN_PATTERN.findall(fold(text))
+
+class AddressParser:
+    """Extracts canonical (city, district) from EPDK addresses.
+
+    EPDK addresses end in '<district> / <PROVINCE>'. The province is
+    matched against the last tokens of the address, and a district of that
+    province directly in front of it is a dict lookup. Otherwise a token
+    trie over all district names is walked once along the address, keeping
+    the match closest to the province. Matching is done on folded ASCII
+    tokens, so 'Gölbaşı', 'GÖLBAŞI' and 'Golbasi' are equal; results use
+    the canonical spelling ('ANKARA', 'Gölbaşı').
+    """
+
+    def __init__(self, provinces=PROVINCE_DISTRICTS, province_aliases=PROVINCE_ALIASES,
+                 district_aliases=DISTRICT_ALIASES, generic_districts=GENERIC_DISTRICTS):
+        # Lookups are keyed by folded tokens joined with spaces ('K MARAS')
+        names = {p: p for p in provinces}
+        names.update(province_aliases)
+        self.provinces = {' '.join(tokens(name)): province for name, province in names.items()}
+        self.max_province_tokens = max(key.count(' ') + 1 for key in self.provinces)
+
+        # key -> {province: canonical district}; the trie holds the same
+        # payload under its None key
+        self.districts = {}
+        self.trie = {}
+        for province, districts in provinces.items():
+            names = {d: d for d in generic_districts}
+            names.update((d, d) for d in districts)
+            names.update(district_aliases.get(province, {}))
+            for name, district in names.items():
+                words = tokens(name)
+                self.districts.setdefault(' '.join(words), {})[province] = district
+                node = self.trie
+                for word in words:
+                    node = node.setdefault(word, {})
+                node.setdefault(None, {})[province] = district
+        self.max_district_tokens = max(key.count(' ') + 1 for key in self.districts)
+        # address -> (city, district); successive EPDK exports repeat most
+        # addresses, and transform() only dedups within one file
+        self._parsed = {}
+
+        logger.debug(f"Gazetteer: {len(provinces)} provinces, "
+                     f"{sum(len(d) for d in provinces.values())} districts")
+
+    def parse(self, address):
+        """Return (city, district); either may be None."""
+        result = self._parsed.get(address)
+        if result is None:
+            result = self._parsed[address] = self._parse(address)
+        return result
+
+    def _parse(self, address):
+        if not address:
+            return None, None
+
+        words = tokens(address)
+        city, end = self._match_province(words)
+        if city is None:
+            return None, None
+        return city, self._match_district(words, end, city)
+
+    def _match_province(self, words):
+        # Longest name first, so 'K MARAS' wins over 'MARAS'
+        for size in range(min(self.max_province_tokens, len(words)), 0, -1):
+            key = words[-1] if size == 1 else ' '.join(words[-size:])
+            province = self.provinces.get(key)
+            if province:
+                return province, len(words) - size
+        return None, 0
+
+    def _match_district(self, words, end, city):
+        for size in range(min(self.max_district_tokens, end), 0, -1):
+            key = words[end - 1] if size == 1 else ' '.join(words[end - size:end])
+            match = self.districts.get(key)
+            if match and city in match:
+                return match[city]
+
+        # Otherwise the rightmost district of the province anywhere before it
+        best = None
+        for start in range(end):
+            node = self.trie
+            pos = start
+            while pos < end:
+                node = node.get(words[pos])
+                if node is None:
+                    break
+                pos += 1
+                match = node.get(None)
+                if match and city in match and (pos == end or words[pos] not in STREET_WORDS):
+                    best = match[city]
+        return best
+
+def jitter(key, lat, lon, radius):
+    """Offset (lat, lon) by up to radius degrees, the same way every time for the same key."""
+    digest = hashlib.blake2b(str(key).encode(), digest_size=8).digest()
+    dlat = int.from_bytes(digest[:4], 'big') / 0xFFFFFFFF * 2 - 1
+    dlon = int.from_bytes(digest[4:], 'big') / 0xFFFFFFFF * 2 - 1
+    return lat + dlat * radius, lon + dlon * radius
+
+def _km(a, b):
+    # Equirectangular distance, plenty within a province
+    dlon = (a[1] - b[1]) * math.cos(math.radians((a[0] + b[0]) / 2))
+    return math.hypot(a[0] - b[0], dlon) * 111.2
+
+class OfflineGeocoder:
+    """Locates stations from bundled coordinates, without any network access.
+
+    Resolves the most specific level it can: a neighbourhood or village
+    named in the address ('Ilıca Mahallesi'), then the centre of the
+    station's district, then the province centre. Places are matched by
+    name within the province and only accepted near the district centre,
+    since names like 'Cumhuriyet' repeat. Points are jittered by a hash of
+    the station number, so re-runs put every station in the same place.
+    """
+
+    def __init__(self, province_coordinates, path=PLACES_FILE, generic_districts=GENERIC_DISTRICTS):
+        # Keyed by folded tokens joined with spaces, as in AddressParser
+        self.provinces = {' '.join(tokens(p)): coords for p, coords in province_coordinates.items()}
+        self.generic = {' '.join(tokens(d)) for d in generic_districts}
+        self.districts = {}  # (province, district) -> (lat, lon)
+        self.places = {}  # (province, place) -> [(lat, lon), ...]
+        with open(path, encoding='utf-8') as f:
+            rows = (line.rstrip('\n').split('\t') for line in f if not line.startswith('#'))
+            next(rows)  # header
+            for province, district, place, lat, lon in rows:
+                province = ' '.join(tokens(province))
+                coords = (float(lat), float(lon))
+                if district:
+                    self.districts[(province, ' '.join(tokens(district)))] = coords
+                else:
+                    self.places.setdefault((province, ' '.join(tokens(place))), []).append(coords)
+        self.max_place_tokens = max(key.count(' ') + 1 for _, key in self.places)
+
+        logger.debug(f"Offline gazetteer: {len(self.districts)} districts, {len(self.places)} place names")
+
+    def locate(self, station_no, city, district, address):
+        """Return (lat, lon, level) with level 'place', 'district' or 'province'; None if the province is unknown."""
+        province = ' '.join(tokens(city or ''))
+        centre = self.provinces.get(province)
+        if centre is None:
+            return None
+
+        level = 'province'
+        key = ' '.join(tokens(district or ''))
+        if key in self.generic:
+            level = 'district'  # 'Merkez' is the province centre
+        elif (province, key) in self.districts:
+            centre, level = self.districts[(province, key)], 'district'
+
+        place = self._match_place(province, tokens(address or ''), centre)
+        if place:
+            centre, level = place, 'place'
+        return (*jitter(station_no, *centre, JITTER_DEGREES[level]), level)
+
+    def _match_place(self, province, words, centre):
+        for end, word in enumerate(words):
+            if word not in PLACE_WORDS:
+                continue
+            # Longest name first, so 'Yeni Mahalle' isn't read as 'Mahalle'
+            for size in range(min(self.max_place_tokens, end), 0, -1):
+                candidates = self.places.get((province, ' '.join(words[end - size:end])))
+                if candidates:
+                    nearest = min(candidates, key=lambda c: _km(c, centre))
+                    if _km(nearest, centre) <= MAX_PLACE_KM:
+                        return nearest
+                    break
+        return None
@@ -0,0 +1,308 @@
+import asyncio
+import random
+import time
+import httpx
+from psycopg2.extras import execute_values
+import logging
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = 'https://nominatim.openstreetmap.org'
+# Usage policy of the public instance: at most one request per second
+NOMINATIM_MAX_RATE = 1.0
+USER_AGENT = 'EPDK-Charging-Stations-App/1.0'
+# Responses worth retrying; any other error status is a permanent failure
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class GeocodeError(Exception):
+    """The geocoder kept failing for an address after all retries."""
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, and bursts of up to `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        # Waiters queue on the lock, so tokens go out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+class Geocoder:
+    """Async client for Nominatim-compatible /search endpoints.
+
+    Requests share a pool of keep-alive connections and a token bucket, so
+    `concurrency` only hides latency and `rate` alone sets the request
+    rate. 429 and 5xx responses and connection errors are retried with
+    exponential backoff, honouring Retry-After.
+    """
+
+    def __init__(self, url=NOMINATIM_URL, rate=NOMINATIM_MAX_RATE, burst=1, concurrency=4,
+                 retries=4, backoff=1.0, timeout=10.0):
+        self.url = url.rstrip('/')
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.requests = 0
+        self.client = None
+
+    async def __aenter__(self):
+        self.client = httpx.AsyncClient(
+            base_url=self.url,
+            headers={'User-Agent': USER_AGENT},
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.client.aclose()
+
+    async def geocode(self, address, city):
+        """Return (lat, lon) for an address, or None if the geocoder has no match."""
+        params = {'q': f"{address}, {city}, Turkey", 'format': 'json', 'limit': 1, 'countrycodes': 'tr'}
+        for attempt in range(self.retries + 1):
+            await self.bucket.acquire()
+            self.requests += 1
+            try:
+                response = await self.client.get('/search', params=params)
+            except httpx.TransportError as e:
+                error, retry_after = str(e) or type(e).__name__, None
+            else:
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                        return (float(data[0]['lat']), float(data[0]['lon'])) if data else None
+                    except (ValueError, KeyError, IndexError, TypeError) as e:
+                        raise GeocodeError(f"Unexpected response for {params['q']!r}: {e}") from e
+                if response.status_code not in RETRY_STATUSES:
+                    raise GeocodeError(f"HTTP {response.status_code} for {params['q']!r}")
+                error, retry_after = f"HTTP {response.status_code}", response.headers.get('Retry-After')
+
+            if attempt == self.retries:
+                raise GeocodeError(f"{error} for {params['q']!r} after {attempt + 1} attempts")
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.0)
+            if retry_after and retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+            logger.warning(f"{error}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def geocode_all(self, stations):
+        """Yield (station, (lat, lon) or None, error) for dicts with address and city, as they finish."""
+        pending = iter(stations)
+        results = asyncio.Queue(maxsize=self.concurrency * 4)
+
+        async def worker():
+            try:
+                for station in pending:
+                    try:
+                        coords, error = await self.geocode(station['address'], station['city']), None
+                    except GeocodeError as e:
+                        coords, error = None, str(e)
+                    await results.put((station, coords, error))
+            except Exception as e:
+                await results.put(e)
+            else:
+                await results.put(None)
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        running = len(workers)
+        try:
+            while running:
+                item = await results.get()
+                if item is None:
+                    running -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for task in workers:
+                task.cancel()
+
+def write_locations(cursor, locations):
+    """Set stations.location for (station_id, lat, lon) rows with one UPDATE."""
+    execute_values(cursor, """
+        UPDATE stations s
+        SET location = ST_SetSRID(ST_MakePoint(v.lon, v.lat), 4326)
+        FROM (VALUES %s) AS v(id, lat, lon)
+        WHERE s.id = v.id
+    """, locations, template="(%s, %s::float8, %s::float8)", page_size=len(locations) or 1)
+
+class GeocodeCache:
+    """Geocoder results in the geocode_cache table, keyed by (address_key, city_key).
+
+    Negative results (no match) are cached too, with a shorter TTL, since
+    the geocoder's data improves over time. Expired entries count as
+    misses and are deleted by evict().
+    """
+
+    def __init__(self, cursor, ttl_days=365, negative_ttl_days=30):
+        self.cursor = cursor  # RealDictCursor
+        self.ttl_days = ttl_days
+        self.negative_ttl_days = negative_ttl_days
+
+    def lookup(self, keys):
+        """Return {key: (lat, lon) or None} for the keys with a fresh entry."""
+        if not keys:
+            return {}
+        address_keys, city_keys = zip(*keys)
+        self.cursor.execute("""
+            SELECT c.address_key, c.city_key, c.latitude, c.longitude
+            FROM geocode_cache c
+            JOIN unnest(%s::text[], %s::text[]) AS k(address_key, city_key)
+              ON c.address_key = k.address_key AND c.city_key = k.city_key
+            WHERE c.geocoded_at > NOW() - make_interval(
+                days => CASE WHEN c.latitude IS NULL THEN %s ELSE %s END)
+        """, (list(address_keys), list(city_keys), self.negative_ttl_days, self.ttl_days))
+        return {
+            (row['address_key'], row['city_key']):
+                (row['latitude'], row['longitude']) if row['latitude'] is not None else None
+            for row in self.cursor.fetchall()
+        }
+
+    def store(self, entries):
+        """Insert or refresh ((address_key, city_key), (lat, lon) or None) entries."""
+        if not entries:
+            return
+        execute_values(self.cursor, """
+            INSERT INTO geocode_cache (address_key, city_key, latitude, longitude)
+            VALUES %s
+            ON CONFLICT (address_key, city_key) DO UPDATE SET
+                latitude = EXCLUDED.latitude,
+                longitude = EXCLUDED.longitude,
+                geocoded_at = NOW()
+        """, [(address_key, city_key, *(coords or (None, None))) for (address_key, city_key), coords in entries],
+            template="(%s, %s, %s::float8, %s::float8)")
+
+    def evict(self):
+        """Delete expired entries and return how many there were."""
+        self.cursor.execute("""
+            DELETE FROM geocode_cache
+            WHERE geocoded_at <= NOW() - make_interval(
+                days => CASE WHEN latitude IS NULL THEN %s ELSE %s END)
+        """, (self.negative_ttl_days, self.ttl_days))
+        return self.cursor.rowcount
+
+# geocode_attempts statuses; FAILED is final until the address changes, NOT_FOUND until
+# it is older than the cache's negative TTL
+LOCATED = 'LOCATED'
+NOT_FOUND = 'NOT_FOUND'
+ERROR = 'ERROR'
+FAILED = 'FAILED'
+
+class GeocodeProgress:
+    """Per-station attempts (geocode_attempts) and run checkpoints (geocode_runs).
+
+    Stations are geocoded in station_no order and each committed batch
+    moves the run's checkpoint to its last station_no, so a run that was
+    interrupted (crash, Ctrl+C, --limit, rate-limit ban) carries on after
+    it. A run that reaches the end of the table is finished; the next one
+    starts over and retries stations that errored fewer than max_attempts
+    times, or were not found more than negative_ttl_days ago.
+    """
+
+    def __init__(self, cursor, max_attempts=3, negative_ttl_days=30):
+        self.cursor = cursor  # RealDictCursor
+        self.max_attempts = max_attempts
+        self.negative_ttl_days = negative_ttl_days
+        self.run_id = None
+        self.last_station_no = None
+
+    def start(self, restart=False):
+        """Resume the latest unfinished run, or start a new one; return True when resuming."""
+        if restart:
+            self.cursor.execute("UPDATE geocode_runs SET finished_at = NOW() WHERE finished_at IS NULL")
+        self.cursor.execute("""
+            SELECT id, last_station_no FROM geocode_runs
+            WHERE finished_at IS NULL
+            ORDER BY id DESC LIMIT 1
+        """)
+        row = self.cursor.fetchone()
+        if row:
+            self.run_id, self.last_station_no = row['id'], row['last_station_no']
+            return True
+        self.cursor.execute("INSERT INTO geocode_runs DEFAULT VALUES RETURNING id")
+        self.run_id, self.last_station_no = self.cursor.fetchone()['id'], None
+        return False
+
+    def candidates(self, limit=None, retry_failed=False):
+        """Return up to `limit` stations still to geocode after the checkpoint.
+
+        A keyset query per batch rather than one long-lived cursor: an open
+        read transaction would hold a lock on stations for the whole run,
+        failing --full-refresh's table swap and holding back vacuum.
+        """
+        self.cursor.execute("""
+            SELECT s.id, s.station_no, s.address, s.city
+            FROM stations s
+            LEFT JOIN geocode_attempts a ON a.station_no = s.station_no
+            WHERE s.location IS NULL
+            AND s.address IS NOT NULL
+            AND (%(after)s::text IS NULL OR s.station_no > %(after)s)
+            AND (a.station_no IS NULL OR a.address <> s.address
+                 OR a.status NOT IN (%(not_found)s, %(failed)s) OR %(retry_failed)s
+                 -- Same expiry as a cached "no match", which would be looked up again too
+                 OR (a.status = %(not_found)s
+                     AND a.attempted_at <= NOW() - make_interval(days => %(negative_ttl_days)s)))
+            ORDER BY s.station_no
+            LIMIT %(limit)s
+        """, {'after': self.last_station_no, 'not_found': NOT_FOUND, 'failed': FAILED,
+              'retry_failed': retry_failed, 'negative_ttl_days': self.negative_ttl_days, 'limit': limit})
+        return self.cursor.fetchall()
+
+    def record(self, attempts, last_station_no=None, requests=0):
+        """Store (station_no, address, status, error) attempts and move the checkpoint to last_station_no.
+
+        An ERROR becomes FAILED once the same address has failed
+        max_attempts runs in a row. Leave last_station_no None when the batch was
+        cut short, so its remaining stations are picked up on resume.
+        """
+        if attempts:
+            execute_values(self.cursor, """
+                INSERT INTO geocode_attempts AS a (station_no, address, status, last_error, attempts)
+                VALUES %s
+                ON CONFLICT (station_no) DO UPDATE SET
+                    address = EXCLUDED.address,
+                    status = EXCLUDED.status,
+                    -- Consecutive attempts with the same outcome for this address
+                    attempts = CASE WHEN a.address = EXCLUDED.address AND a.status = EXCLUDED.status
+                                    THEN a.attempts + 1 ELSE 1 END,
+                    last_error = EXCLUDED.last_error,
+                    attempted_at = NOW()
+            """, [(*attempt, 1) for attempt in attempts], template="(%s, %s, %s, %s, %s)",
+                page_size=len(attempts))
+            self.cursor.execute("""
+                UPDATE geocode_attempts SET status = %s
+                WHERE status = %s AND attempts >= %s AND station_no = ANY(%s)
+            """, (FAILED, ERROR, self.max_attempts, [attempt[0] for attempt in attempts]))
+        statuses = [status for _, _, status, _ in attempts]
+        self.cursor.execute("""
+            UPDATE geocode_runs SET
+                last_station_no = COALESCE(%s, last_station_no),
+                located = located + %s,
+                not_found = not_found + %s,
+                errors = errors + %s,
+                requests = requests + %s,
+                updated_at = NOW()
+            WHERE id = %s
+        """, (last_station_no, statuses.count(LOCATED), statuses.count(NOT_FOUND), statuses.count(ERROR),
+              requests, self.run_id))
+        if last_station_no is not None:
+            self.last_station_no = last_station_no
+
+    def finish(self):
+        self.cursor.execute("UPDATE geocode_runs SET finished_at = NOW() WHERE id = %s", (self.run_id,))
@@ -1,17 +1,51 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, Json, execute_values
+import io
+import re
 import uuid
 from datetime import datetime
+from itertools import islice
+from operator import attrgetter
 import logging
 
 logger = logging.getLogger(__name__)
 
+STAGE_STATION_FIELDS = (
+    'station_no', 'station_name', 'service_type', 'brand',
+    'charge_network_operator', 'station_operator', 'is_green',
+    'address', 'city', 'district', 'source_file', 'data_hash'
+)
+
+STAGE_CONNECTOR_FIELDS = (
+    'station_no', 'connector_no', 'connector_type', 'connector_format',
+    'power_kw', 'source_file'
+)
+
+# A station/connector row of the live table (s/c) whose content matches the loaded row (r)
+STATION_UNCHANGED = "(s.data_hash, s.city, s.district) IS NOT DISTINCT FROM (r.data_hash, r.city, r.district)"
+CONNECTOR_UNCHANGED = ("(c.station_id, c.connector_type, c.connector_format, c.power_kw) "
+                       "IS NOT DISTINCT FROM (ss.id, r.connector_type, r.connector_format, r.power_kw)")
+
+INDEX_DEFINITION = re.compile(r'^(CREATE (?:UNIQUE )?INDEX) \S+ ON (?:ONLY )?\S+ (USING .*)$')
+
+def _new_stats():
+    return {
+        'stations_inserted': 0,
+        'stations_updated': 0,
+        'stations_unchanged': 0,
+        'connectors_inserted': 0,
+        'rows_quarantined': 0
+    }
+
 class DatabaseLoader:
-    def __init__(self, config, batch_id):
+    def __init__(self, config, batch_id, bulk=True):
         self.config = config
         self.batch_id = str(batch_id)  # Convert to string
+        self.bulk = bulk  # COPY + set-based merge; False = row-by-row upserts
         self.conn = None
         self.cursor = None
+        self.existing_stations = None  # station_no -> (id, data_hash, city, district), row mode only
+        self.full_refresh = False  # rows collect in refresh tables until finish_full_refresh()
         
     def connect(self):
         self.conn = psycopg2.connect(self.config.database_dsn)
@@ -24,6 +58,11 @@ class DatabaseLoader:
         if self.conn:
             self.conn.close()
     
+    def rollback(self):
+        if self.conn:
+            self.conn.rollback()
+        self.existing_stations = None
+    
     def start_batch(self):
         query = """
             INSERT INTO ingestion_batches (id, started_at, status)
@@ -33,56 +72,712 @@ class DatabaseLoader:
         self.conn.commit()
         logger.info(f"Started batch {self.batch_id}")
     
-    def complete_batch(self, stats):
+    def complete_batch(self, stats, metrics=None, status='COMPLETED'):
+        metrics = metrics or {}
         query = """
             UPDATE ingestion_batches
             SET completed_at = %s, status = %s,
                 files_processed = %s,
                 stations_inserted = %s,
                 stations_updated = %s,
-                connectors_inserted = %s
+                stations_unchanged = %s,
+                stations_deleted = %s,
+                connectors_inserted = %s,
+                connectors_deleted = %s,
+                rows_quarantined = %s,
+                duplicates_merged = %s,
+                merge_conflicts = %s,
+                files_skipped = %s,
+                errors_count = %s,
+                parse_seconds = %s,
+                transform_seconds = %s,
+                load_seconds = %s,
+                wall_seconds = %s,
+                rows_processed = %s,
+                rows_per_second = %s,
+                peak_rss_bytes = %s
             WHERE id = %s::uuid
         """
         self.cursor.execute(query, (
-            datetime.now(), 'COMPLETED',
+            datetime.now(), status,
             stats.get('files_processed', 0),
             stats.get('stations_inserted', 0),
             stats.get('stations_updated', 0),
+            stats.get('stations_unchanged', 0),
+            stats.get('stations_deleted', 0),
             stats.get('connectors_inserted', 0),
+            stats.get('connectors_deleted', 0),
+            stats.get('rows_quarantined', 0),
+            stats.get('duplicates_merged', 0),
+            stats.get('merge_conflicts', 0),
+            stats.get('files_skipped', 0),
+            stats.get('errors_count', 0),
+            metrics.get('parse_seconds'),
+            metrics.get('transform_seconds'),
+            metrics.get('load_seconds'),
+            metrics.get('wall_seconds'),
+            metrics.get('rows_processed'),
+            metrics.get('rows_per_second'),
+            metrics.get('peak_rss_bytes'),
             self.batch_id
         ))
         self.conn.commit()
     
-    def load_data(self, transformed_data):
+    def last_success_timestamp(self):
+        """Unix time the last COMPLETED batch finished, or None if none has."""
+        self.cursor.execute("""
+            SELECT EXTRACT(EPOCH FROM MAX(completed_at))::float8 AS completed
+            FROM ingestion_batches WHERE status = 'COMPLETED'
+        """)
+        return self.cursor.fetchone()['completed']
+    
+    def record_error(self, source_file, error_type, error_message, raw_data=None):
+        self.cursor.execute("""
+            INSERT INTO ingestion_errors (batch_id, source_file, error_type, error_message, raw_data)
+            VALUES (%s::uuid, %s, %s, %s, %s)
+        """, (self.batch_id, source_file, error_type, error_message,
+              Json(raw_data) if raw_data is not None else None))
+        self.conn.commit()
+    
+    def _quarantine(self, rejected):
+        """Write rows rejected by validation or merging to ingestion_errors in one statement.
+        
+        Not committed here, so the errors land together with the file's clean rows.
+        """
+        if not rejected:
+            return 0
+        execute_values(self.cursor, """
+            INSERT INTO ingestion_errors (batch_id, source_file, error_type, error_message, raw_data)
+            VALUES %s
+        """, [
+            (self.batch_id, r['source_file'], r['error_type'], r['error_message'], Json(r['raw_data']))
+            for r in rejected
+        ], template="(%s::uuid, %s, %s, %s, %s)", page_size=len(rejected))
+        return len(rejected)
+    
+    def loaded_files(self):
+        """Latest LOADED manifest row per file path."""
+        self.cursor.execute("""
+            SELECT DISTINCT ON (file_path) file_path, file_size, file_mtime, content_hash
+            FROM ingestion_files
+            WHERE status = 'LOADED'
+            ORDER BY file_path, processed_at DESC
+        """)
+        return self.cursor.fetchall()
+    
+    def record_file(self, fingerprint, status, stats=None, error_message=None, timings=None):
+        """Add a manifest row; counts come from load stats, or stations_count/connectors_count."""
+        stats = stats or {}
+        timings = timings or {}
+        self.cursor.execute("""
+            INSERT INTO ingestion_files (
+                batch_id, file_path, file_size, file_mtime, content_hash,
+                status, stations_count, connectors_count, rows_quarantined, error_message,
+                parse_seconds, transform_seconds, load_seconds
+            ) VALUES (%s::uuid, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            self.batch_id,
+            fingerprint.path,
+            fingerprint.size,
+            fingerprint.mtime,
+            fingerprint.content_hash,
+            status,
+            stats.get('stations_count', stats.get('stations_inserted', 0) + stats.get('stations_updated', 0)
+                      + stats.get('stations_unchanged', 0)),
+            stats.get('connectors_count', stats.get('connectors_inserted', 0)),
+            stats.get('rows_quarantined', 0),
+            error_message,
+            timings.get('parse'),
+            timings.get('transform'),
+            timings.get('load')
+        ))
+        self.conn.commit()
+    
+    def load_data(self, transformed_data, rejected=(), conflicts=()):
+        """Load validated rows and quarantine the rejected ones in one transaction.
+        
+        `conflicts` (see BatchMerger) are written to ingestion_errors as well,
+        but are not counted as quarantined: the winning row is loaded.
+        """
         stations = transformed_data['stations']
         connectors = transformed_data['connectors']
         
+        if self.bulk:
+            self._begin_staging()
+            self._stage_rows(stations, connectors)
+            stats = self._merge()
+        else:
+            stats = self._load_rows(stations, connectors, {})
+        
+        stats['rows_quarantined'] = self._quarantine(rejected)
+        self._quarantine(conflicts)
+        self.conn.commit()
+        return stats
+    
+    def load_stream(self, records, chunk_size=1000, rejected=()):
+        """Load ('station'|'connector', record) pairs in fixed-size chunks.
+        
+        Only one chunk is held in memory at a time. In bulk mode each chunk
+        is COPYed into the staging tables and merged once at the end; in
+        row mode connectors always follow their station in the stream, so
+        the last station's id is the only one carried into the next chunk.
+        `rejected` may be filled while the stream is consumed (see
+        DataValidator.validate_stream); it is written before the commit.
+        """
+        stats = _new_stats()
         station_ids = {}
-        stats = {
-            'stations_inserted': 0,
-            'stations_updated': 0,
-            'connectors_inserted': 0
-        }
+        records = iter(records)
+        
+        if self.bulk:
+            self._begin_staging()
+        
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            
+            stations = [r for kind, r in chunk if kind == 'station']
+            connectors = [r for kind, r in chunk if kind == 'connector']
+            if self.bulk:
+                self._stage_rows(stations, connectors)
+                continue
+            
+            chunk_stats = self._load_rows(stations, connectors, station_ids)
+            for key in stats:
+                stats[key] += chunk_stats[key]
+            
+            if stations:
+                last_no = stations[-1].station_no
+                station_ids = {last_no: station_ids[last_no]} if last_no in station_ids else {}
+        
+        if self.bulk:
+            stats = self._merge()
+        
+        stats['rows_quarantined'] = self._quarantine(rejected)
+        self.conn.commit()
+        return stats
+    
+    def _begin_staging(self):
+        # Session-local staging tables, emptied automatically on commit
+        self.cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS stage_stations (
+                seq BIGSERIAL,
+                station_no TEXT,
+                station_name TEXT,
+                service_type TEXT,
+                brand TEXT,
+                charge_network_operator TEXT,
+                station_operator TEXT,
+                is_green BOOLEAN,
+                address TEXT,
+                city TEXT,
+                district TEXT,
+                source_file TEXT,
+                data_hash TEXT
+            ) ON COMMIT DELETE ROWS
+        """)
+        self.cursor.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS stage_connectors (
+                seq BIGSERIAL,
+                station_no TEXT,
+                connector_no TEXT,
+                connector_type TEXT,
+                connector_format TEXT,
+                power_kw NUMERIC,
+                source_file TEXT
+            ) ON COMMIT DELETE ROWS
+        """)
+    
+    def _stage_rows(self, stations, connectors):
+        self._copy_rows('stage_stations', STAGE_STATION_FIELDS, stations)
+        self._copy_rows('stage_connectors', STAGE_CONNECTOR_FIELDS, connectors)
+    
+    def _copy_rows(self, table, fields, rows):
+        if not rows:
+            return
+        
+        values = attrgetter(*fields)
+        buf = io.StringIO()
+        for row in rows:
+            buf.write('\t'.join(map(self._copy_value, values(row))))
+            buf.write('\n')
+        buf.seek(0)
+        
+        self.cursor.copy_expert(f"COPY {table} ({', '.join(fields)}) FROM STDIN", buf)
+    
+    @staticmethod
+    def _copy_value(value):
+        """Encode a value for COPY text format."""
+        if value is None:
+            return '\\N'
+        if isinstance(value, bool):
+            return 't' if value else 'f'
+        return (str(value)
+                .replace('\\', '\\\\')
+                .replace('\t', '\\t')
+                .replace('\n', '\\n')
+                .replace('\r', '\\r'))
+    
+    def _merge(self):
+        return self._append_refresh() if self.full_refresh else self._merge_staging()
+    
+    def _merge_staging(self):
+        """Merge the staging tables into stations/connectors with two statements.
+        
+        Later rows win when a key appears more than once, as with the
+        row-by-row path. Stations whose data_hash and parsed location are
+        unchanged are left untouched, and so are connectors whose station,
+        type, format and power are. Connectors get their station_id from a join on
+        station_no, limited to stations staged in the same load.
+        """
+        self.cursor.execute("""
+            WITH merged AS (
+                INSERT INTO stations (
+                    station_no, station_name, service_type, brand,
+                    charge_network_operator, station_operator, is_green,
+                    address, city, district, source_file, ingestion_batch_id, data_hash
+                )
+                SELECT DISTINCT ON (station_no)
+                    station_no, station_name, service_type::service_type_enum, brand,
+                    charge_network_operator, station_operator, is_green,
+                    address, city, district, source_file, %s::uuid, data_hash
+                FROM stage_stations
+                ORDER BY station_no, seq DESC
+                ON CONFLICT (station_no) DO UPDATE SET
+                    station_name = EXCLUDED.station_name,
+                    service_type = EXCLUDED.service_type,
+                    brand = EXCLUDED.brand,
+                    charge_network_operator = EXCLUDED.charge_network_operator,
+                    station_operator = EXCLUDED.station_operator,
+                    is_green = EXCLUDED.is_green,
+                    address = EXCLUDED.address,
+                    city = EXCLUDED.city,
+                    district = EXCLUDED.district,
+                    source_file = EXCLUDED.source_file,
+                    ingestion_batch_id = EXCLUDED.ingestion_batch_id,
+                    data_hash = EXCLUDED.data_hash,
+                    updated_at = NOW()
+                WHERE stations.data_hash IS DISTINCT FROM EXCLUDED.data_hash
+                   OR stations.city IS DISTINCT FROM EXCLUDED.city
+                   OR stations.district IS DISTINCT FROM EXCLUDED.district
+                RETURNING (xmax = 0) AS was_inserted
+            )
+            SELECT
+                COUNT(*) FILTER (WHERE was_inserted) AS stations_inserted,
+                COUNT(*) FILTER (WHERE NOT was_inserted) AS stations_updated,
+                (SELECT COUNT(DISTINCT station_no) FROM stage_stations) - COUNT(*) AS stations_unchanged
+            FROM merged
+        """, (self.batch_id,))
+        stats = dict(self.cursor.fetchone())
+        
+        self.cursor.execute("""
+            WITH staged AS (
+                SELECT DISTINCT ON (c.connector_no)
+                    s.id, c.connector_no, c.connector_type::connector_type_enum,
+                    c.connector_format::connector_format_enum,
+                    c.power_kw, c.source_file, %s::uuid
+                FROM stage_connectors c
+                JOIN stations s ON s.station_no = c.station_no
+                WHERE c.station_no IN (SELECT station_no FROM stage_stations)
+                ORDER BY c.connector_no, c.seq DESC
+            ), merged AS (
+                INSERT INTO connectors (
+                    station_id, connector_no, connector_type, connector_format,
+                    power_kw, source_file, ingestion_batch_id
+                )
+                SELECT * FROM staged
+                ON CONFLICT (connector_no) DO UPDATE SET
+                    station_id = EXCLUDED.station_id,
+                    connector_type = EXCLUDED.connector_type,
+                    connector_format = EXCLUDED.connector_format,
+                    power_kw = EXCLUDED.power_kw,
+                    source_file = EXCLUDED.source_file,
+                    ingestion_batch_id = EXCLUDED.ingestion_batch_id,
+                    updated_at = NOW()
+                WHERE (connectors.station_id, connectors.connector_type, connectors.connector_format, connectors.power_kw)
+                    IS DISTINCT FROM (EXCLUDED.station_id, EXCLUDED.connector_type, EXCLUDED.connector_format,
+                                      EXCLUDED.power_kw)
+            )
+            -- Counts every staged connector, like the row-by-row path, not only the rewritten ones
+            SELECT COUNT(*) AS connectors_inserted FROM staged
+        """, (self.batch_id,))
+        stats.update(self.cursor.fetchone())
+        
+        return stats
+    
+    def begin_full_refresh(self):
+        """Collect the batch in refresh tables instead of merging each file into the live tables.
+        
+        Files are still staged, validated and committed one at a time, but
+        only into session-local tables; finish_full_refresh() builds shadow
+        copies of stations/connectors from them and swaps them in.
+        """
+        if not self.bulk:
+            raise ValueError("Full refresh needs the COPY loader")
+        
+        # Typed like the live columns, so cast and length errors fail the file that caused them
+        self.cursor.execute(f"""
+            CREATE TEMP TABLE refresh_stations AS
+            SELECT {', '.join(STAGE_STATION_FIELDS)} FROM stations WITH NO DATA
+        """)
+        self.cursor.execute("""
+            CREATE TEMP TABLE refresh_connectors AS
+            SELECT s.station_no, c.connector_no, c.connector_type, c.connector_format,
+                   c.power_kw, c.source_file
+            FROM connectors c CROSS JOIN stations s WITH NO DATA
+        """)
+        self.cursor.execute("ALTER TABLE refresh_stations ADD COLUMN seq BIGSERIAL")
+        self.cursor.execute("ALTER TABLE refresh_connectors ADD COLUMN seq BIGSERIAL")
+        self.conn.commit()
+        self.full_refresh = True
+        logger.info("Full refresh: loading into refresh tables")
+    
+    def _append_refresh(self):
+        """Move the staged file into the refresh tables.
+        
+        The stats compare the file with the live tables, like a merge would;
+        finish_full_refresh() counts the whole batch once more.
+        """
+        self.cursor.execute(f"""
+            SELECT
+                COUNT(*) FILTER (WHERE s.id IS NULL) AS stations_inserted,
+                COUNT(*) FILTER (WHERE s.id IS NOT NULL AND NOT {STATION_UNCHANGED}) AS stations_updated,
+                COUNT(*) FILTER (WHERE {STATION_UNCHANGED}) AS stations_unchanged,
+                (SELECT COUNT(DISTINCT connector_no) FROM stage_connectors
+                 WHERE station_no IN (SELECT station_no FROM stage_stations)) AS connectors_inserted
+            FROM (
+                SELECT DISTINCT ON (station_no) station_no, data_hash, city, district
+                FROM stage_stations
+                ORDER BY station_no, seq DESC
+            ) r
+            LEFT JOIN stations s USING (station_no)
+        """)
+        stats = _new_stats()
+        stats.update(self.cursor.fetchone())
+        
+        self.cursor.execute(f"""
+            INSERT INTO refresh_stations ({', '.join(STAGE_STATION_FIELDS)})
+            SELECT station_no, station_name, service_type::service_type_enum, brand,
+                   charge_network_operator, station_operator, is_green,
+                   address, city, district, source_file, data_hash
+            FROM stage_stations
+            ORDER BY seq
+        """)
+        # Same rule as the merge: connectors only count with a station from the same file
+        self.cursor.execute(f"""
+            INSERT INTO refresh_connectors ({', '.join(STAGE_CONNECTOR_FIELDS)})
+            SELECT station_no, connector_no, connector_type::connector_type_enum,
+                   connector_format::connector_format_enum, power_kw, source_file
+            FROM stage_connectors
+            WHERE station_no IN (SELECT station_no FROM stage_stations)
+            ORDER BY seq
+        """)
+        
+        return stats
+    
+    def finish_full_refresh(self, lock_timeout='2s'):
+        """Build shadow stations/connectors tables from the batch and swap them in atomically.
+        
+        Runs as one transaction. While the shadow tables are filled, indexed
+        and analyzed, SHARE ROW EXCLUSIVE locks keep other writers (geocoding)
+        out but let readers through. The renames at the end need ACCESS
+        EXCLUSIVE locks, and while the swap waits for them every new query on
+        the tables queues behind it. So the lock is tried once, under
+        lock_timeout: if a long-running reader holds the tables longer, the
+        refresh fails with LockNotAvailable and the live tables are left as
+        they were.
+        
+        Stations and connectors missing from the batch are deleted. The rest
+        keep their id, location and created_at, and unchanged rows are copied
+        as they are. Objects on the live tables that can't be copied to the
+        shadow tables fail the refresh before anything is built. Returns the
+        batch's station/connector counts.
+        """
+        self.cursor.execute("LOCK TABLE stations, connectors IN SHARE ROW EXCLUSIVE MODE")
+        for table in ('stations', 'connectors'):
+            self._check_swappable(table)
+        
+        self.cursor.execute("""
+            CREATE TEMP TABLE refresh_latest_stations ON COMMIT DROP AS
+            SELECT DISTINCT ON (station_no) * FROM refresh_stations ORDER BY station_no, seq DESC
+        """)
+        self.cursor.execute("""
+            CREATE TEMP TABLE refresh_latest_connectors ON COMMIT DROP AS
+            SELECT DISTINCT ON (connector_no) * FROM refresh_connectors ORDER BY connector_no, seq DESC
+        """)
+        self.cursor.execute(f"""
+            SELECT
+                COUNT(*) FILTER (WHERE s.id IS NULL) AS stations_inserted,
+                COUNT(*) FILTER (WHERE s.id IS NOT NULL AND NOT {STATION_UNCHANGED}) AS stations_updated,
+                COUNT(*) FILTER (WHERE {STATION_UNCHANGED}) AS stations_unchanged,
+                (SELECT COUNT(*) FROM stations) - COUNT(s.id) AS stations_deleted
+            FROM refresh_latest_stations r
+            LEFT JOIN stations s USING (station_no)
+        """)
+        stats = dict(self.cursor.fetchone())
+        
+        for table in ('stations', 'connectors'):
+            self.cursor.execute(f"""
+                CREATE TABLE {table}_shadow (
+                    LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS INCLUDING STORAGE
+                )
+            """)
+        
+        station_values = self._shadow_values('stations', 's', {f: f'r.{f}' for f in STAGE_STATION_FIELDS})
+        self.cursor.execute(f"""
+            INSERT INTO stations_shadow
+            SELECT s.*
+            FROM refresh_latest_stations r
+            JOIN stations s USING (station_no)
+            WHERE {STATION_UNCHANGED}
+            UNION ALL
+            SELECT {station_values}
+            FROM refresh_latest_stations r
+            LEFT JOIN stations s USING (station_no)
+            WHERE NOT {STATION_UNCHANGED}
+        """, {'batch_id': self.batch_id})
+        
+        # Connectors move with their latest station, so the station key for a join is ready first
+        renames = self._copy_table_objects('stations')
+        
+        connector_values = self._shadow_values('connectors', 'c', {
+            'station_id': 'ss.id',
+            **{f: f'r.{f}' for f in STAGE_CONNECTOR_FIELDS if f != 'station_no'}
+        })
+        self.cursor.execute(f"""
+            INSERT INTO connectors_shadow
+            SELECT c.*
+            FROM refresh_latest_connectors r
+            JOIN stations_shadow ss ON ss.station_no = r.station_no
+            JOIN connectors c ON c.connector_no = r.connector_no
+            WHERE {CONNECTOR_UNCHANGED}
+            UNION ALL
+            SELECT {connector_values}
+            FROM refresh_latest_connectors r
+            JOIN stations_shadow ss ON ss.station_no = r.station_no
+            LEFT JOIN connectors c ON c.connector_no = r.connector_no
+            WHERE NOT {CONNECTOR_UNCHANGED}
+        """, {'batch_id': self.batch_id})
+        stats['connectors_inserted'] = self.cursor.rowcount
+        
+        self.cursor.execute("""
+            SELECT (SELECT COUNT(*) FROM connectors) - COUNT(*) AS connectors_deleted
+            FROM connectors c
+            JOIN connectors_shadow USING (id)
+        """)
+        stats['connectors_deleted'] = self.cursor.fetchone()['connectors_deleted']
+        
+        renames += self._copy_table_objects('connectors')
+        self.cursor.execute("ANALYZE stations_shadow, connectors_shadow")
+        
+        self._swap_shadow_tables(renames, lock_timeout)
+        
+        self.cursor.execute("""
+            UPDATE ingestion_files SET status = 'LOADED'
+            WHERE batch_id = %s::uuid AND status = 'STAGED'
+        """, (self.batch_id,))
+        self.cursor.execute("DROP TABLE refresh_stations, refresh_connectors")
+        self.conn.commit()
+        self.full_refresh = False
+        
+        logger.info(f"Full refresh swapped in: {stats['stations_deleted']} stations, "
+                    f"{stats['connectors_deleted']} connectors deleted")
+        return stats
+    
+    def abort_full_refresh(self):
+        """Drop the refresh tables; the live tables stay as they were."""
+        self.conn.rollback()
+        self.cursor.execute("DROP TABLE IF EXISTS refresh_stations, refresh_connectors")
+        self.conn.commit()
+        self.full_refresh = False
+    
+    def _shadow_values(self, table, alias, loaded):
+        """SELECT list for a new or changed row of `table` in the shadow build.
+        
+        `loaded` maps columns to their new values. ingestion_batch_id and
+        updated_at are stamped; every other column (id, location,
+        created_at, ...) keeps the live row's value, or its default for a
+        new row.
+        """
+        self.cursor.execute("""
+            SELECT a.attname AS name, pg_get_expr(d.adbin, d.adrelid) AS default_value
+            FROM pg_attribute a
+            LEFT JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+            WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+            ORDER BY a.attnum
+        """, (table,))
+        
+        values = []
+        for column in self.cursor.fetchall():
+            name = column['name']
+            if name in loaded:
+                values.append(loaded[name])
+            elif name == 'ingestion_batch_id':
+                values.append('%(batch_id)s::uuid')
+            elif name == 'updated_at':
+                values.append('NOW()')
+            else:
+                values.append(f"CASE WHEN {alias}.id IS NULL THEN {column['default_value'] or 'NULL'} "
+                              f"ELSE {alias}.{name} END")
+        return ', '.join(values)
+    
+    def _check_swappable(self, table):
+        """Raise ValueError if `table` has objects that _copy_table_objects() would not carry over.
+        
+        Indexes, keys, check constraints, foreign keys, triggers, owned
+        sequences, comments and grants are copied. Anything else would be
+        lost with the dropped table, or would make the drop fail halfway.
+        """
+        self.cursor.execute("""
+            SELECT 'policy ' || polname AS object FROM pg_policy WHERE polrelid = %(table)s::regclass
+            UNION ALL
+            SELECT 'rule ' || rulename FROM pg_rewrite
+            WHERE ev_class = %(table)s::regclass AND rulename <> '_RETURN'
+            UNION ALL
+            SELECT 'statistics ' || stxname FROM pg_statistic_ext WHERE stxrelid = %(table)s::regclass
+            UNION ALL
+            SELECT 'publication ' || p.pubname FROM pg_publication_rel pr
+            JOIN pg_publication p ON p.oid = pr.prpubid
+            WHERE pr.prrelid = %(table)s::regclass
+            UNION ALL
+            SELECT DISTINCT 'dependent view ' || r.ev_class::regclass::text FROM pg_depend d
+            JOIN pg_rewrite r ON r.oid = d.objid
+            WHERE d.refobjid = %(table)s::regclass AND r.ev_class <> %(table)s::regclass
+            UNION ALL
+            SELECT 'foreign key ' || conname || ' on ' || conrelid::regclass::text FROM pg_constraint
+            WHERE confrelid = %(table)s::regclass AND contype = 'f'
+              AND conrelid NOT IN ('stations'::regclass, 'connectors'::regclass)
+            UNION ALL
+            SELECT 'index ' || ic.relname FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            WHERE i.indrelid = %(table)s::regclass AND pg_get_indexdef(i.indexrelid) !~ %(index_pattern)s
+            UNION ALL
+            SELECT 'row level security' FROM pg_class WHERE oid = %(table)s::regclass AND relrowsecurity
+        """, {'table': table, 'index_pattern': INDEX_DEFINITION.pattern})
+        unsupported = [row['object'] for row in self.cursor.fetchall()]
+        if unsupported:
+            raise ValueError(f"Full refresh can't swap {table}, it has {', '.join(unsupported)}")
+    
+    def _copy_table_objects(self, table):
+        """Recreate `table`'s indexes, keys, foreign keys, triggers and grants on its shadow table.
+        
+        Index and key names must be unique per schema, so they get a
+        _shadow suffix; the returned statements rename them back after the
+        swap. Owned sequences move to the shadow table so the drop keeps them.
+        """
+        shadow = f'{table}_shadow'
+        renames = []
+        
+        self.cursor.execute("""
+            SELECT ic.relname AS name, pg_get_indexdef(i.indexrelid) AS definition,
+                   con.conname, con.contype
+            FROM pg_index i
+            JOIN pg_class ic ON ic.oid = i.indexrelid
+            LEFT JOIN pg_constraint con
+                ON con.conindid = i.indexrelid AND con.conrelid = i.indrelid AND con.contype IN ('p', 'u')
+            WHERE i.indrelid = %s::regclass
+        """, (table,))
+        for index in self.cursor.fetchall():
+            match = INDEX_DEFINITION.match(index['definition'])
+            self.cursor.execute(f"{match.group(1)} {index['name']}_shadow ON {shadow} {match.group(2)}")
+            if index['conname']:
+                key = 'PRIMARY KEY' if index['contype'] == 'p' else 'UNIQUE'
+                self.cursor.execute(f"""
+                    ALTER TABLE {shadow} ADD CONSTRAINT {index['conname']}_shadow
+                    {key} USING INDEX {index['name']}_shadow
+                """)
+                renames.append(f"ALTER TABLE {table} RENAME CONSTRAINT {index['conname']}_shadow "
+                               f"TO {index['conname']}")
+            else:
+                renames.append(f"ALTER INDEX {index['name']}_shadow RENAME TO {index['name']}")
+        
+        self.cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) AS definition
+            FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype = 'f'
+        """, (table,))
+        for fk in self.cursor.fetchall():
+            definition = re.sub(r'REFERENCES (stations|connectors)\(', r'REFERENCES \1_shadow(', fk['definition'])
+            self.cursor.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {fk['conname']} {definition}")
+        
+        # Created after the rows are in, so the BEFORE UPDATE triggers never fire during the build
+        self.cursor.execute("""
+            SELECT pg_get_triggerdef(oid) AS definition
+            FROM pg_trigger
+            WHERE tgrelid = %s::regclass AND NOT tgisinternal
+        """, (table,))
+        for trigger in self.cursor.fetchall():
+            self.cursor.execute(re.sub(rf' ON (\w+\.)?{table} ', f' ON {shadow} ', trigger['definition'], count=1))
+        
+        self.cursor.execute("""
+            SELECT seq.oid::regclass::text AS sequence, a.attname AS column
+            FROM pg_depend d
+            JOIN pg_class seq ON seq.oid = d.objid AND seq.relkind = 'S'
+            JOIN pg_attribute a ON a.attrelid = d.refobjid AND a.attnum = d.refobjsubid
+            WHERE d.refobjid = %s::regclass AND d.deptype = 'a'
+        """, (table,))
+        for owned in self.cursor.fetchall():
+            self.cursor.execute(f"ALTER SEQUENCE {owned['sequence']} OWNED BY {shadow}.{owned['column']}")
+        
+        # Table privileges of other roles (the API's read-only user); the owner's are implicit
+        self.cursor.execute("""
+            SELECT a.privilege_type,
+                   CASE WHEN a.grantee = 0 THEN 'PUBLIC' ELSE quote_ident(a.grantee::regrole::text) END AS grantee
+            FROM pg_class c, aclexplode(c.relacl) a
+            WHERE c.oid = %s::regclass AND a.grantee <> c.relowner
+        """, (table,))
+        for grant in self.cursor.fetchall():
+            self.cursor.execute(f"GRANT {grant['privilege_type']} ON {shadow} TO {grant['grantee']}")
+        
+        return renames
+    
+    def _swap_shadow_tables(self, renames, lock_timeout):
+        # One attempt: queries queue behind the waiting lock, so retrying would stall the API repeatedly
+        self.cursor.execute("SET LOCAL lock_timeout = %s", (lock_timeout,))
+        self.cursor.execute("LOCK TABLE stations, connectors IN ACCESS EXCLUSIVE MODE")
+        
+        # No CASCADE: anything else depending on the live tables aborts the swap instead
+        self.cursor.execute("DROP TABLE connectors, stations")
+        self.cursor.execute("ALTER TABLE stations_shadow RENAME TO stations")
+        self.cursor.execute("ALTER TABLE connectors_shadow RENAME TO connectors")
+        for statement in renames:
+            self.cursor.execute(statement)
+    
+    def _load_rows(self, stations, connectors, station_ids):
+        stats = _new_stats()
+        
+        if self.existing_stations is None:
+            self._preload_station_hashes()
         
         for station in stations:
-            station_id, was_inserted = self._upsert_station(station)
+            station_id, status = self._upsert_station(station)
             if station_id:
-                station_ids[station['station_no']] = station_id
-                if was_inserted:
-                    stats['stations_inserted'] += 1
-                else:
-                    stats['stations_updated'] += 1
+                station_ids[station.station_no] = station_id
+                stats[f'stations_{status}'] += 1
         
         for connector in connectors:
-            station_id = station_ids.get(connector['station_no'])
+            station_id = station_ids.get(connector.station_no)
             if station_id:
-                if self._insert_connector(connector, station_id):
-                    stats['connectors_inserted'] += 1
+                self._insert_connector(connector, station_id)
+                stats['connectors_inserted'] += 1
         
-        self.conn.commit()
         return stats
     
+    def _preload_station_hashes(self):
+        self.cursor.execute("SELECT station_no, id, data_hash, city, district FROM stations")
+        self.existing_stations = {
+            row['station_no']: (row['id'], row['data_hash'], row['city'], row['district'])
+            for row in self.cursor
+        }
+        logger.info(f"Preloaded {len(self.existing_stations)} station hashes")
+    
     def _upsert_station(self, station):
+        """Upsert one station, returning (id, 'inserted'|'updated'|'unchanged')."""
+        existing = self.existing_stations.get(station.station_no)
+        # city/district are derived, not hashed: a parser change must still reach the table
+        if existing and existing[1:] == (station.data_hash, station.city, station.district):
+            return existing[0], 'unchanged'
+        
         query = """
             INSERT INTO stations (
                 station_no, station_name, service_type, brand,
@@ -93,28 +788,40 @@ class DatabaseLoader:
                 station_name = EXCLUDED.station_name,
                 service_type = EXCLUDED.service_type,
                 brand = EXCLUDED.brand,
+                charge_network_operator = EXCLUDED.charge_network_operator,
+                station_operator = EXCLUDED.station_operator,
+                is_green = EXCLUDED.is_green,
+                address = EXCLUDED.address,
+                city = EXCLUDED.city,
+                district = EXCLUDED.district,
+                source_file = EXCLUDED.source_file,
+                ingestion_batch_id = EXCLUDED.ingestion_batch_id,
+                data_hash = EXCLUDED.data_hash,
                 updated_at = NOW()
             RETURNING id, (xmax = 0) AS was_inserted
         """
         
         self.cursor.execute(query, (
-            station['station_no'],
-            station['station_name'],
-            station['service_type'],
-            station.get('brand'),
-            station.get('charge_network_operator'),
-            station.get('station_operator'),
-            station.get('is_green', False),
-            station.get('address'),
-            station.get('city'),
-            station.get('district'),
-            station.get('source_file'),
+            station.station_no,
+            station.station_name,
+            station.service_type,
+            station.brand,
+            station.charge_network_operator,
+            station.station_operator,
+            station.is_green,
+            station.address,
+            station.city,
+            station.district,
+            station.source_file,
             self.batch_id,
-            station.get('data_hash')
+            station.data_hash
         ))
         
         result = self.cursor.fetchone()
-        return result['id'], result['was_inserted']
+        self.existing_stations[station.station_no] = (
+            result['id'], station.data_hash, station.city, station.district
+        )
+        return result['id'], 'inserted' if result['was_inserted'] else 'updated'
     
     def _insert_connector(self, connector, station_id):
         query = """
@@ -123,21 +830,24 @@ class DatabaseLoader:
                 power_kw, source_file, ingestion_batch_id
             ) VALUES (%s, %s, %s, %s, %s, %s, %s::uuid)
             ON CONFLICT (connector_no) DO UPDATE SET
+                station_id = EXCLUDED.station_id,
+                connector_type = EXCLUDED.connector_type,
+                connector_format = EXCLUDED.connector_format,
                 power_kw = EXCLUDED.power_kw,
+                source_file = EXCLUDED.source_file,
+                ingestion_batch_id = EXCLUDED.ingestion_batch_id,
                 updated_at = NOW()
+            WHERE (connectors.station_id, connectors.connector_type, connectors.connector_format, connectors.power_kw)
+                IS DISTINCT FROM (EXCLUDED.station_id, EXCLUDED.connector_type, EXCLUDED.connector_format,
+                                  EXCLUDED.power_kw)
         """
         
-        try:
-            self.cursor.execute(query, (
-                station_id,
-                connector['connector_no'],
-                connector['connector_type'],
-                connector['connector_format'],
-                connector['power_kw'],
-                connector.get('source_file'),
-                self.batch_id
-            ))
-            return True
-        except Exception as e:
-            logger.error(f"Failed to insert connector: {e}")
-            return False
+        self.cursor.execute(query, (
+            station_id,
+            connector.connector_no,
+            connector.connector_type,
+            connector.connector_format,
+            connector.power_kw,
+            connector.source_file,
+            self.batch_id
+        ))
@@ -0,0 +1,64 @@
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+def hash_file(file_path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+@dataclass
+class FileFingerprint:
+    path: str
+    size: int
+    mtime: datetime
+    _content_hash: str = field(default=None, repr=False)
+    _member: object = field(default=None, repr=False, compare=False)  # archive.ArchiveMember
+    
+    @classmethod
+    def of(cls, file_path):
+        stat = file_path.stat()
+        return cls(
+            path=str(file_path.resolve()),
+            size=stat.st_size,
+            mtime=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc)
+        )
+    
+    @classmethod
+    def of_member(cls, member):
+        """Fingerprint a spreadsheet inside an archive, keyed by archive path and member name."""
+        return cls(path=member.path, size=member.size, mtime=member.mtime, _member=member)
+    
+    @property
+    def content_hash(self):
+        # Hashing reads the whole file, so only do it when needed
+        if self._content_hash is None:
+            if self._member is not None:
+                self._content_hash = hashlib.sha256(self._member.read_bytes()).hexdigest()
+            else:
+                self._content_hash = hash_file(self.path)
+        return self._content_hash
+    
+    @property
+    def known_content_hash(self):
+        """The content hash if it was already computed or given, else None; never reads the file."""
+        return self._content_hash
+
+class FileManifest:
+    """Files recorded as LOADED in ingestion_files."""
+    
+    def __init__(self, loaded_rows):
+        self.by_path = {row['file_path']: row for row in loaded_rows}
+        self.hashes = {row['content_hash'] for row in loaded_rows}
+    
+    def is_loaded(self, fingerprint):
+        # Same path, size and mtime: trust it without reading the file
+        row = self.by_path.get(fingerprint.path)
+        if row and row['file_size'] == fingerprint.size and row['file_mtime'] == fingerprint.mtime:
+            return True
+        return fingerprint.content_hash in self.hashes
@@ -0,0 +1,75 @@
+from collections import Counter
+from dataclasses import asdict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields that make two occurrences of the same key a conflict rather than a plain duplicate
+STATION_CONTENT = ('data_hash', 'city', 'district')
+CONNECTOR_CONTENT = ('station_no', 'connector_type', 'connector_format', 'power_kw')
+
+class BatchMerger:
+    """Consolidates the transformed files of a batch into one set of stations and connectors.
+
+    Stations are keyed by station_no and connectors by connector_no. When a
+    key occurs more than once, the occurrence added last wins: files are
+    added in input order, so a later file overrides an earlier one and a
+    later row overrides an earlier row of the same file. That is the
+    outcome of loading the files one after another, without the repeated
+    upserts. Duplicates whose content differs are collected as conflicts in
+    the ingestion_errors row format.
+    """
+
+    def __init__(self):
+        self.stations = {}
+        self.connectors = {}
+        self.rejected = []
+        self.conflicts = []
+        self.duplicates = 0
+        self._file_counts = None
+
+    def add(self, transformed, rejected=()):
+        """Merge one file's validated rows and keep its rejected rows."""
+        for station in transformed['stations']:
+            self._put(self.stations, station.station_no, station, STATION_CONTENT, 'Station')
+        for connector in transformed['connectors']:
+            self._put(self.connectors, connector.connector_no, connector, CONNECTOR_CONTENT, 'Connector')
+        self.rejected.extend(rejected)
+        self._file_counts = None
+
+    def result(self):
+        """The consolidated rows, in the shape DatabaseLoader.load_data expects."""
+        if self.duplicates:
+            logger.info(f"Merged {self.duplicates} duplicate rows across files, "
+                        f"{len(self.conflicts)} with conflicting content")
+        return {'stations': list(self.stations.values()), 'connectors': list(self.connectors.values())}
+
+    def file_stats(self, source_file):
+        """Rows a file contributes after precedence, as ingestion_files counts."""
+        if self._file_counts is None:
+            self._file_counts = (Counter(s.source_file for s in self.stations.values()),
+                                 Counter(c.source_file for c in self.connectors.values()),
+                                 Counter(r['source_file'] for r in self.rejected))
+        stations, connectors, rejected = self._file_counts
+        return {
+            'stations_count': stations[source_file],
+            'connectors_count': connectors[source_file],
+            'rows_quarantined': rejected[source_file],
+        }
+
+    def _put(self, rows, key, row, content, label):
+        previous = rows.get(key)
+        rows[key] = row
+        if previous is None:
+            return
+
+        self.duplicates += 1
+        changed = [f for f in content if getattr(previous, f) != getattr(row, f)]
+        if changed:
+            self.conflicts.append({
+                'source_file': previous.source_file,
+                'error_type': 'MERGE_CONFLICT',
+                'error_message': f"{label} {key} differs in {', '.join(changed)}; "
+                                 f"the row from {row.source_file} takes precedence",
+                'raw_data': asdict(previous),
+            })
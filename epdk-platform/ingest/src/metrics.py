@@ -0,0 +1,166 @@
+import os
+import resource
+import sys
+import tempfile
+import time
+import urllib.request
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('parse', 'transform', 'load')
+
+def peak_rss_bytes():
+    """Peak RSS of this process or any finished child process (pool workers)."""
+    scale = 1 if sys.platform == 'darwin' else 1024  # ru_maxrss is KiB on Linux
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+def new_timings():
+    return dict.fromkeys(STAGES, 0.0)
+
+class TimedIterator:
+    """Adds the time spent producing each item to timings[stage].
+
+    For nested lazy streams, pass the inner stage as exclude so its time
+    is not counted twice.
+    """
+
+    def __init__(self, iterable, timings, stage, exclude=None):
+        self.iterator = iter(iterable)
+        self.timings = timings
+        self.stage = stage
+        self.exclude = exclude
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        inner_before = self.timings[self.exclude] if self.exclude else 0.0
+        start = time.perf_counter()
+        try:
+            return next(self.iterator)
+        finally:
+            elapsed = time.perf_counter() - start
+            if self.exclude:
+                elapsed -= self.timings[self.exclude] - inner_before
+            self.timings[self.stage] += elapsed
+
+class IngestionMetrics:
+    """Per-file and per-stage timings for one ingestion batch."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stage_seconds = new_timings()
+        self.files = {}
+
+    def record_file(self, name, timings, rows, status):
+        self.files[name] = {'timings': dict(timings), 'rows': rows, 'status': status}
+        for stage in STAGES:
+            self.stage_seconds[stage] += timings.get(stage, 0.0)
+
+    def record_stage(self, stage, seconds):
+        """Add batch-level work that belongs to no single file, such as a table swap."""
+        self.stage_seconds[stage] += seconds
+
+    def summary(self):
+        wall = time.perf_counter() - self.started
+        rows = sum(f['rows'] for f in self.files.values())
+        return {
+            'parse_seconds': round(self.stage_seconds['parse'], 3),
+            'transform_seconds': round(self.stage_seconds['transform'], 3),
+            'load_seconds': round(self.stage_seconds['load'], 3),
+            'wall_seconds': round(wall, 3),
+            'rows_processed': rows,
+            'rows_per_second': round(rows / wall, 1) if wall > 0 else 0.0,
+            'peak_rss_bytes': peak_rss_bytes(),
+        }
+
+    def to_prometheus(self, stats, status, last_success=None):
+        """Render the batch as Prometheus text exposition format.
+
+        A push or textfile replaces the previous exposition, so a failed
+        batch carries over last_success (Unix time of the last completed
+        batch); otherwise the staleness alert would lose its series.
+        """
+        summary = self.summary()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        metric('epdk_ingest_last_run_timestamp_seconds', 'Unix time the last ingestion batch finished.',
+               [({}, round(time.time(), 3))])
+        if status == 'COMPLETED':
+            last_success = time.time()
+        if last_success is not None:
+            metric('epdk_ingest_last_success_timestamp_seconds',
+                   'Unix time the last successful ingestion batch finished.',
+                   [({}, round(last_success, 3))])
+        metric('epdk_ingest_success', 'Whether the last ingestion batch completed (1) or failed (0).',
+               [({}, 1 if status == 'COMPLETED' else 0)])
+        metric('epdk_ingest_duration_seconds', 'Wall time of the last ingestion batch.',
+               [({}, summary['wall_seconds'])])
+        metric('epdk_ingest_stage_seconds', 'Time spent per stage in the last ingestion batch.',
+               [({'stage': stage}, summary[f'{stage}_seconds']) for stage in STAGES])
+        metric('epdk_ingest_rows', 'Station and connector rows processed in the last batch.',
+               [({}, summary['rows_processed'])])
+        metric('epdk_ingest_rows_per_second', 'Rows processed per second of wall time in the last batch.',
+               [({}, summary['rows_per_second'])])
+        metric('epdk_ingest_peak_rss_bytes', 'Peak resident set size of the ingestion process.',
+               [({}, summary['peak_rss_bytes'])])
+        metric('epdk_ingest_files', 'Files in the last batch by outcome.',
+               [({'status': 'processed'}, stats.get('files_processed', 0)),
+                ({'status': 'skipped'}, stats.get('files_skipped', 0)),
+                ({'status': 'failed'}, stats.get('errors_count', 0))])
+        metric('epdk_ingest_stations', 'Stations in the last batch by merge result.',
+               [({'result': result}, stats.get(f'stations_{result}', 0))
+                for result in ('inserted', 'updated', 'unchanged', 'deleted')])
+        metric('epdk_ingest_connectors', 'Connectors upserted in the last batch.',
+               [({}, stats.get('connectors_inserted', 0))])
+        metric('epdk_ingest_rows_quarantined', 'Rows rejected by validation in the last batch.',
+               [({}, stats.get('rows_quarantined', 0))])
+        metric('epdk_ingest_duplicate_rows', 'Duplicate rows consolidated across files by --merge in the last batch.',
+               [({'result': 'identical'}, stats.get('duplicates_merged', 0) - stats.get('merge_conflicts', 0)),
+                ({'result': 'conflict'}, stats.get('merge_conflicts', 0))])
+        metric('epdk_ingest_errors', 'Errors recorded in the last batch.',
+               [({}, stats.get('errors_count', 0))])
+        metric('epdk_ingest_file_stage_seconds', 'Time spent per file and stage in the last batch.',
+               [({'file': name, 'stage': stage}, round(f['timings'].get(stage, 0.0), 3))
+                for name, f in sorted(self.files.items()) for stage in STAGES])
+
+        return '\n'.join(lines) + '\n'
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def write_textfile(path, text):
+    """Atomically write metrics for node_exporter's textfile collector."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logger.info(f"Wrote metrics to {path}")
+
+def push_to_gateway(url, text, job='epdk_ingest'):
+    """Replace this job's metrics on a Prometheus Pushgateway."""
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/metrics/job/{job}",
+        data=text.encode('utf-8'),
+        method='PUT',
+        headers={'Content-Type': 'text/plain; version=0.0.4'}
+    )
+    with urllib.request.urlopen(request, timeout=10) as response:
+        response.read()
+    logger.info(f"Pushed metrics to {url}")
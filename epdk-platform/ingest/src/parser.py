@@ -1,79 +1,287 @@
+import hashlib
+import io
+import numpy as np
 import pandas as pd
+import openpyxl
+import xlrd
+from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Column positions in the EPDK sheet layout (after the 'Sıra No' column)
+STATION_COLUMNS = {
+    'station_no': 1,
+    'station_name': 2,
+    'service_type': 3,
+    'brand': 4,
+    'charge_network_operator': 5,
+    'station_operator': 6,
+    'is_green': 7,
+    'address': 8,
+}
+
+CONNECTOR_COLUMNS = {
+    'connector_no': 9,
+    'connector_type': 10,
+    'connector_format': 11,
+    'power_kw': 12,
+}
+
+# Low-cardinality columns; equal values are stored as one shared string
+INTERNED_FIELDS = frozenset({
+    'service_type', 'brand', 'charge_network_operator', 'station_operator', 'is_green',
+    'connector_type', 'connector_format', 'power_kw',
+})
+
+# Parsed rows. Values are stripped strings or None; field order is that of
+# STATION_COLUMNS / CONNECTOR_COLUMNS so records can be built positionally.
+@dataclass(slots=True)
+class ParsedStation:
+    station_no: str
+    station_name: str
+    service_type: str
+    brand: str
+    charge_network_operator: str
+    station_operator: str
+    is_green: str
+    address: str
+    source_file: str
+
+@dataclass(slots=True)
+class ParsedConnector:
+    station_no: str
+    connector_no: str
+    connector_type: str
+    connector_format: str
+    power_kw: str
+    source_file: str
+
+# Parse cache kind -> (record class, cached fields)
+RECORD_KINDS = {
+    'stations': (ParsedStation, list(STATION_COLUMNS)),
+    'connectors': (ParsedConnector, ['station_no'] + list(CONNECTOR_COLUMNS)),
+}
+
+# Bump when a parsing change alters the values of cached fields
+PARSER_VERSION = 1
+
+def cache_key(content_hash):
+    """Parse cache key: file content, parser version and cached field layout.
+
+    Entries written by another parser version or with other fields miss
+    instead of returning stale or misaligned columns.
+    """
+    layout = repr([(kind, fields) for kind, (_, fields) in RECORD_KINDS.items()])
+    return f"{content_hash}-v{PARSER_VERSION}-{hashlib.sha256(layout.encode()).hexdigest()[:8]}"
+
 class ExcelParser:
-    def __init__(self, config):
+    def __init__(self, config, cache=None):
         self.config = config
-    
-    def parse_file(self, file_path):
+        self.cache = cache
+        self._strings = {}  # interned values of INTERNED_FIELDS
+
+    def parse_file(self, file_path, content_hash=None):
+        """Parse a file, going through the parse cache when a content hash is given."""
+        if self.cache is None or content_hash is None:
+            return self._parse_excel(file_path)
+
+        key = cache_key(content_hash)
+        columns = self.cache.get(key, file_path.name)
+        if columns is not None:
+            return self._from_columns(columns, file_path.name)
+
+        parsed = self._parse_excel(file_path)
+        self.cache.put(key, self._to_columns(parsed))
+        return parsed
+
+    @staticmethod
+    def _to_columns(parsed):
+        """Parsed records -> {kind: {field: values}}, without source_file."""
+        return {
+            kind: {field: [getattr(r, field) for r in parsed[kind]] for field in fields}
+            for kind, (_, fields) in RECORD_KINDS.items()
+        }
+
+    def _from_columns(self, columns, source_file):
+        parsed = {}
+        for kind, (record, fields) in RECORD_KINDS.items():
+            # Entries for files without rows of a kind may have no columns at all
+            values = [columns[kind].get(f, []) for f in fields]
+            values = [self._intern_column(v) if f in INTERNED_FIELDS else v for f, v in zip(fields, values)]
+            parsed[kind] = list(map(record, *values, repeat(source_file)))
+        return parsed
+
+    def _intern_column(self, values):
+        intern = self._strings.setdefault
+        return [intern(v, v) for v in values]
+
+    def _parse_excel(self, file_path):
         logger.info(f"Parsing file: {file_path}")
-        
+
         # Detect engine
         engine = 'xlrd' if file_path.suffix == '.xls' else 'openpyxl'
-        
+
         # Read Excel
-        df = pd.read_excel(file_path, engine=engine, header=None)
+        df = pd.read_excel(_excel_source(file_path), engine=engine, header=None)
         logger.info(f"Read {len(df)} rows, {len(df.columns)} columns")
-        
-        # Find header row
-        header_row_idx = None
-        for idx, row in df.iterrows():
-            if any('İstasyon No' in str(val) for val in row.values if pd.notna(val)):
-                header_row_idx = idx
+
+        stations, connectors = self.parse_frame(df, file_path.name)
+
+        logger.info(f"Parsed {len(stations)} stations, {len(connectors)} connectors")
+        return {'stations': stations, 'connectors': connectors}
+
+    def iter_records(self, file_path):
+        """Yield ('station', record) / ('connector', record) pairs in sheet order.
+
+        Streaming counterpart of parse_file: rows come straight from xlrd or
+        openpyxl's read-only mode, so no DataFrame or record lists are built.
+        """
+        logger.info(f"Streaming file: {file_path}")
+        if file_path.suffix == '.xls':
+            rows = self._iter_xls_rows(file_path)
+        else:
+            rows = self._iter_xlsx_rows(file_path)
+        yield from self._classify_rows(rows, file_path.name)
+
+    def _classify_rows(self, rows, source_file):
+        rows = iter(rows)
+        for row in rows:
+            if any('İstasyon No' in str(val) for val in row if pd.notna(val)):
                 break
-        
-        if header_row_idx is None:
+        else:
             raise ValueError("Could not find header row")
-        
-        # Parse stations and connectors
-        stations = []
-        connectors = []
-        current_station = None
-        
-        for idx in range(header_row_idx + 1, len(df)):
-            row = df.iloc[idx]
-            sira_no = row[0]
-            
+
+        current_station_no = None
+        for row in rows:
+            has_sockets = len(row) > 9
+            row = list(row) + [None] * (13 - len(row))
+
             # Station row (has Sıra No)
-            if pd.notna(sira_no) and str(sira_no).strip():
-                station = {
-                    'station_no': self._safe_str(row[1]),
-                    'station_name': self._safe_str(row[2]),
-                    'service_type': self._safe_str(row[3]),
-                    'brand': self._safe_str(row[4]),
-                    'charge_network_operator': self._safe_str(row[5]),
-                    'station_operator': self._safe_str(row[6]),
-                    'is_green': self._safe_str(row[7]),
-                    'address': self._safe_str(row[8]),
-                    'source_file': file_path.name
-                }
-                if station['station_no']:
-                    stations.append(station)
-                    current_station = station
-            
+            if self._safe_str(row[0]):
+                station = ParsedStation(
+                    *[self._cell(row, field, col) for field, col in STATION_COLUMNS.items()], source_file
+                )
+                if station.station_no:
+                    current_station_no = station.station_no
+                    yield 'station', station
+
             # Connector row
-            elif current_station and len(row) > 9:
-                connector_no = self._safe_str(row[9])
+            elif current_station_no and has_sockets:
+                connector_no = self._safe_str(row[CONNECTOR_COLUMNS['connector_no']])
                 if connector_no and 'SKT' in connector_no:
-                    connector = {
-                        'station_no': current_station['station_no'],
-                        'connector_no': connector_no,
-                        'connector_type': self._safe_str(row[10]),
-                        'connector_format': self._safe_str(row[11]),
-                        'power_kw': self._safe_str(row[12]),
-                        'source_file': file_path.name
-                    }
-                    connectors.append(connector)
-        
-        logger.info(f"Parsed {len(stations)} stations, {len(connectors)} connectors")
-        return {'stations': stations, 'connectors': connectors}
-    
+                    yield 'connector', ParsedConnector(
+                        current_station_no,
+                        *[self._cell(row, field, col) for field, col in CONNECTOR_COLUMNS.items()],
+                        source_file
+                    )
+
+    def _cell(self, row, field, col):
+        value = self._safe_str(row[col])
+        if field in INTERNED_FIELDS:
+            return self._strings.setdefault(value, value)
+        return value
+
+    @staticmethod
+    def _iter_xls_rows(file_path):
+        source = _excel_source(file_path)
+        if isinstance(source, Path):
+            book = xlrd.open_workbook(source, on_demand=True)
+        else:
+            book = xlrd.open_workbook(file_contents=source.getvalue(), on_demand=True)
+        try:
+            sheet = book.sheet_by_index(0)
+            for idx in range(sheet.nrows):
+                # pandas reads integral floats as ints; keep the same strings
+                yield [int(v) if isinstance(v, float) and v.is_integer() else v
+                       for v in sheet.row_values(idx)]
+        finally:
+            book.release_resources()
+
+    @staticmethod
+    def _iter_xlsx_rows(file_path):
+        book = openpyxl.load_workbook(_excel_source(file_path), read_only=True, data_only=True)
+        try:
+            yield from book.worksheets[0].iter_rows(values_only=True)
+        finally:
+            book.close()
+
+    def parse_frame(self, df, source_file):
+        """Split a raw sheet into station and connector records.
+
+        Works column-wise: rows with a 'Sıra No' are stations, the following
+        rows with an 'SKT' socket number are that station's connectors. The
+        parent station_no is forward-filled onto connector rows instead of
+        tracking the current station in a per-row loop.
+        """
+        header_row_idx = self._find_header_row(df)
+        if header_row_idx is None:
+            raise ValueError("Could not find header row")
+
+        body = df.iloc[header_row_idx + 1:]
+        has_sockets = len(body.columns) > 9
+        body = body.reindex(columns=range(max(len(body.columns), 13)))
+
+        is_station = pd.notna(self._clean_column(body[0].to_numpy(dtype=object)))
+        station_no = self._clean_column(body[1].to_numpy(dtype=object))
+        valid_station = is_station & pd.notna(station_no)
+
+        stations = self._records(ParsedStation, body, valid_station, STATION_COLUMNS, source_file)
+        if not has_sockets:
+            return stations, []
+
+        # Forward-fill the position of the last valid station onto every row
+        positions = np.where(valid_station, np.arange(len(body)), -1)
+        parent_idx = np.maximum.accumulate(positions) if len(body) else positions
+
+        connector_no = self._clean_column(body[CONNECTOR_COLUMNS['connector_no']].to_numpy(dtype=object))
+        is_skt = np.array([no is not None and 'SKT' in no for no in connector_no], dtype=bool)
+        is_connector = ~is_station & (parent_idx >= 0) & is_skt
+
+        connectors = self._records(ParsedConnector, body, is_connector, CONNECTOR_COLUMNS, source_file,
+                                   station_no=station_no[parent_idx[is_connector]])
+        return stations, connectors
+
+    def _records(self, record, body, mask, columns, source_file, station_no=None):
+        values = []
+        for field, col in columns.items():
+            column = self._clean_column(body[col].to_numpy(dtype=object)[mask])
+            values.append(self._intern_column(column) if field in INTERNED_FIELDS else column)
+        if station_no is not None:
+            values.insert(0, station_no)
+        values.append(repeat(source_file))
+        return list(map(record, *values))
+
+    @staticmethod
+    def _find_header_row(df, chunk_size=64):
+        # The header is almost always in the first few rows, so scan in chunks
+        for start in range(0, len(df), chunk_size):
+            block = df.iloc[start:start + chunk_size].to_numpy(dtype=object)
+            present = pd.notna(block)
+            for offset in range(len(block)):
+                if any('İstasyon No' in str(v) for v in block[offset][present[offset]]):
+                    return start + offset
+        return None
+
+    @staticmethod
+    def _clean_column(values):
+        """Column-wise equivalent of _safe_str: stripped strings, None for blanks."""
+        cleaned = np.full(len(values), None, dtype=object)
+        present = pd.notna(values)
+        cleaned[present] = [str(v).strip() or None for v in values[present]]
+        return cleaned
+
     @staticmethod
     def _safe_str(value):
         if pd.isna(value):
             return None
         s = str(value).strip()
         return s if s else None
+
+def _excel_source(file_path):
+    # Spreadsheets from an archive (archive.ArchiveMember) are read from memory, not from disk
+    if isinstance(file_path, Path):
+        return file_path
+    return io.BytesIO(file_path.read_bytes())
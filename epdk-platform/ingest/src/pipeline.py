@@ -0,0 +1,112 @@
+import queue
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+class StageError(Exception):
+    """A file failed in one pipeline stage; carried downstream instead of raised."""
+    
+    def __init__(self, stage, source_file, cause):
+        super().__init__(f"{stage} failed for {source_file}: {cause}")
+        self.stage = stage
+        self.source_file = source_file
+        self.cause = cause
+    
+    @property
+    def error_type(self):
+        return f"{self.stage.upper()}_ERROR"
+
+class _StageCrashed:
+    def __init__(self, exc):
+        self.exc = exc
+
+def pipelined_files(files, parse_fn, transform_fn, queue_size=2):
+    """Yield (file, result_fn) pairs while later files are parsed and transformed.
+    
+    Parsing and transformation run in their own threads, connected to each
+    other and to the caller by queues of at most queue_size files, so a
+    slow loader holds back the upstream stages instead of letting parsed
+    files pile up in memory. result_fn returns the transformed data or
+    raises the StageError of the stage that failed for that file.
+    """
+    stop = threading.Event()
+    parsed = queue.Queue(maxsize=queue_size)
+    transformed = queue.Queue(maxsize=queue_size)
+    
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+    
+    def parse_stage():
+        for f in files:
+            try:
+                item = (f, parse_fn(f), None)
+            except Exception as e:
+                item = (f, None, StageError('parse', f.name, e))
+            if not put(parsed, item):
+                return
+        put(parsed, _DONE)
+    
+    def transform_stage():
+        while True:
+            item = get(parsed)
+            if item is _DONE or isinstance(item, _StageCrashed):
+                put(transformed, item)
+                return
+            f, data, error = item
+            if error is None:
+                try:
+                    data = transform_fn(f, data)
+                except Exception as e:
+                    data, error = None, StageError('transform', f.name, e)
+            if not put(transformed, (f, data, error)):
+                return
+    
+    def run(target, out):
+        try:
+            target()
+        except BaseException as e:
+            logger.exception(f"Pipeline stage {threading.current_thread().name} crashed")
+            put(out, _StageCrashed(e))
+    
+    threads = [
+        threading.Thread(target=run, args=(parse_stage, parsed), name='ingest-parse', daemon=True),
+        threading.Thread(target=run, args=(transform_stage, transformed), name='ingest-transform', daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    
+    try:
+        while True:
+            item = get(transformed)
+            if item is _DONE:
+                break
+            if isinstance(item, _StageCrashed):
+                raise item.exc
+            f, data, error = item
+            yield f, lambda data=data, error=error: _result(data, error)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join()
+
+def _result(data, error):
+    if error is not None:
+        raise error
+    return data
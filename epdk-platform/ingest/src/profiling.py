@@ -0,0 +1,141 @@
+import cProfile
+import os
+import pstats
+import tracemalloc
+from collections import Counter, defaultdict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Frames kept per allocation traceback
+TRACE_FRAMES = 32
+# Call paths below this many seconds are dropped from the CPU stacks
+MIN_PATH_SECONDS = 1e-5
+
+_active = None
+
+def checkpoint():
+    """Snapshot allocations if more memory is live now than at the last snapshot.
+
+    Call where a run's working set is largest, e.g. after a file is loaded;
+    a no-op unless a Profiler is running.
+    """
+    if _active is not None:
+        _active.checkpoint()
+
+def _location(filename, lineno):
+    # Last two path parts tell parser.py apart from pandas' parsers.py without the site-packages prefix
+    return f"{os.sep.join(filename.split(os.sep)[-2:])}:{lineno}"
+
+def _frame_label(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name  # builtins such as <method 'append' of 'list' objects>
+    return f"{name} ({_location(filename, lineno)})"
+
+def cpu_stacks(stats):
+    """Collapse cProfile stats into {call path: self seconds}.
+
+    cProfile keeps caller/callee edges rather than whole stacks, so a
+    function's time is split between its call paths in proportion to the
+    time spent in it from each caller. Recursive calls are folded into the
+    outermost one.
+    """
+    callees = defaultdict(list)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    stacks = Counter()
+
+    def walk(func, path, weight):
+        path = path + (func,)
+        stacks[path] += stats[func][2] * weight
+        for callee, edge_seconds in callees[func]:
+            total = stats[callee][3]
+            if callee in path or total <= 0:
+                continue
+            share = weight * edge_seconds / total
+            if share * total >= MIN_PATH_SECONDS:
+                walk(callee, path, share)
+
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            walk(func, (), 1.0)
+    return {';'.join(_frame_label(f) for f in path): seconds for path, seconds in stacks.items()}
+
+def allocation_stacks(snapshot):
+    """Collapse a tracemalloc snapshot into {allocation traceback: live bytes}."""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    stacks = Counter()
+    for trace in snapshot.traces:
+        stacks[';'.join(_location(frame.filename, frame.lineno) for frame in trace.traceback)] += trace.size
+    return stacks
+
+def write_folded(path, stacks, scale=1):
+    """Write stacks as `frame;frame;frame value` lines for flamegraph.pl, inferno or speedscope."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for stack, value in sorted(stacks.items()):
+            value = round(value * scale)
+            if value > 0:
+                f.write(f"{stack} {value}\n")
+
+class Profiler:
+    """CPU profile and allocation snapshot of a block, written next to `prefix`.
+
+    Writes <prefix>.cpu.folded (microseconds), <prefix>.alloc.folded (bytes
+    live at the largest checkpoint) and <prefix>.prof for pstats or
+    snakeviz. Before Python 3.12, cProfile only sees the thread that
+    entered the block; tracemalloc always traces every thread.
+    Allocation tracing makes allocation-heavy code such as xlrd parsing
+    many times slower, and the CPU profile with it; frames=0 skips it.
+    """
+
+    def __init__(self, prefix, frames=TRACE_FRAMES):
+        self.prefix = str(prefix)
+        self.frames = frames
+        self._profile = None
+        self._snapshot = None
+        self._snapshot_bytes = -1
+
+    def __enter__(self):
+        global _active
+        if self.frames:
+            tracemalloc.start(self.frames)
+            _active = self
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        return self
+
+    def checkpoint(self):
+        if not self.frames:
+            return
+        current, _ = tracemalloc.get_traced_memory()
+        if current > self._snapshot_bytes:
+            # Taking the snapshot is slow; keep it out of the CPU profile
+            self._profile.disable()
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_bytes = current
+            self._profile.enable()
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        self.checkpoint()
+        self._profile.disable()
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(f"{self.prefix}.prof")
+        write_folded(f"{self.prefix}.cpu.folded", cpu_stacks(stats.stats), scale=1e6)
+        logger.info(f"CPU profile written to {self.prefix}.cpu.folded and {self.prefix}.prof")
+
+        if self.frames:
+            _active = None
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            write_folded(f"{self.prefix}.alloc.folded", allocation_stacks(self._snapshot))
+            logger.info(f"Allocation profile written to {self.prefix}.alloc.folded "
+                        f"(traced peak {peak / 1024 / 1024:.1f} MB, "
+                        f"{self._snapshot_bytes / 1024 / 1024:.1f} MB live at the largest checkpoint)")
+        return False
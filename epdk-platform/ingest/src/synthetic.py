@@ -0,0 +1,153 @@
+import random
+from pathlib import Path
+import openpyxl
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Station count of the real EPDK export, the baseline for --scale
+BASE_STATIONS = 13440
+
+# EPDK pages hold 500 stations per file
+STATIONS_PER_FILE = 500
+
+HEADER = [
+    'Sıra No', 'İstasyon No', 'İstasyon Adı', 'Hizmet Şekli', 'Marka',
+    'Şarj Ağı İşletmecisi', 'Şarj İstasyonu İşletmecisi', 'Yeşil Şarj İstasyonu mu',
+    'Adres', 'Soket Bilgileri', None, None, None
+]
+SOCKET_HEADER = ['Soket No', 'Soket Tipi', 'Soket Türü', 'Soket Gücü (kW)']
+
+# (brand, operator) pairs, spelled the way they appear in the export
+OPERATORS = [
+    ('zes', 'ZES DİJİTAL TİCARET ANONİM ŞİRKETİ'),
+    ('VOLTRUN', 'VOLTRUN ENERJİ ANONİM ŞİRKETİ'),
+    ('Trugo', 'TRUGO ŞARJ HİZMETLERİ ANONİM ŞİRKETİ'),
+    ('eşarj', 'EŞARJ ELEKTRİKLİ ARAÇLAR ŞARJ SİSTEMLERİ ANONİM ŞİRKETİ'),
+    ('wat mobilite', 'WAT MOBİLİTE ANONİM ŞİRKETİ'),
+    ('Otopriz', 'OTOPRİZ ENERJİ ANONİM ŞİRKETİ'),
+    ('SHARZ.NET', 'SHARZ ŞARJ SİSTEMLERİ ANONİM ŞİRKETİ'),
+    ('Electrise', 'CHARGE TEKNOLOJİ SANAYİ VE TİCARET ANONİM ŞİRKETİ'),
+    ('AKSA ŞARJ', 'AKSA ŞARJ HİZMETLERİ ANONİM ŞİRKETİ'),
+    ('D-Charge', 'D ŞARJ TEKNOLOJİLERİ ANONİM ŞİRKETİ'),
+]
+
+# Province -> (weight, districts); weights roughly follow station density
+PROVINCES = {
+    'İSTANBUL': (30, ['Kadıköy', 'Beşiktaş', 'Üsküdar', 'Beykoz', 'Ümraniye', 'Bakırköy', 'Şişli', 'Pendik']),
+    'ANKARA': (12, ['Çankaya', 'Keçiören', 'Yenimahalle', 'Etimesgut', 'Gölbaşı']),
+    'İZMİR': (10, ['Karşıyaka', 'Bornova', 'Konak', 'Çeşme', 'Urla', 'Tire']),
+    'ANTALYA': (7, ['Muratpaşa', 'Konyaaltı', 'Alanya', 'Manavgat', 'Kemer']),
+    'BURSA': (6, ['Nilüfer', 'Osmangazi', 'Yıldırım', 'İnegöl']),
+    'KOCAELİ': (4, ['İzmit', 'Gebze', 'Darıca', 'Gölcük']),
+    'MUĞLA': (4, ['Bodrum', 'Fethiye', 'Marmaris', 'Köyceğiz']),
+    'KONYA': (3, ['Selçuklu', 'Meram', 'Karatay', 'Ereğli']),
+    'ESKİŞEHİR': (2, ['Odunpazarı', 'Tepebaşı']),
+    'GAZİANTEP': (2, ['Şahinbey', 'Şehitkamil']),
+    'MERSİN': (2, ['Yenişehir', 'Mezitli', 'Tarsus']),
+    'SAKARYA': (2, ['Adapazarı', 'Serdivan', 'Sapanca']),
+    'DİYARBAKIR': (1, ['Kayapınar', 'Bağlar']),
+    'ÇANAKKALE': (1, ['Merkez', 'Biga', 'Ayvacık']),
+    'ŞANLIURFA': (1, ['Haliliye', 'Eyyübiye']),
+    'AĞRI': (1, ['Merkez', 'Doğubayazıt']),
+}
+
+NEIGHBOURHOODS = ['Cumhuriyet', 'Atatürk', 'Yeşilevler', 'Gülbahçe', 'Çiğdem', 'Karagözler',
+                  'Barbaros', 'Şenlik', 'İnönü', 'Fevzi Çakmak', 'Osmangazi', 'Turgut Özal']
+STREETS = ['Mersin', 'Gazi', 'İstiklal', 'Bağdat', 'Eskişehir', 'Denizci', 'Avlu', '926', 'Şht. Metin Kaya']
+STREET_KINDS = ['Caddesi', 'Cad. Caddesi', 'Sokağı', 'Bulvarı']
+NAME_PREFIXES = ['Öztürk', 'Yıldız', 'Şahin', 'Görele', 'Emanet', 'Çınar', 'Güneş', 'Kılıç', 'Doğan', 'Ege']
+NAME_SUFFIXES = ['Otomotiv', 'Park', 'AVM', 'Petrol', 'Otel', 'Plaza', 'Residence', 'Dinlenme Tesisi']
+
+# (connector_type, connector_format, powers in kW, weight)
+SOCKETS = [
+    ('AC', 'AC_TYPE2', [3.4, 3.7, 7.4, 11, 22], 60),
+    ('DC', 'DC_CCS', [30, 60, 90, 120, 180, 200], 38),
+    ('DC', 'DC_CHADEMO', [50, 60], 2),
+]
+
+class SyntheticGenerator:
+    """Writes workbooks in the EPDK export layout with made-up stations.
+
+    Output is deterministic for a given seed. Power values are sometimes
+    written as messy strings ('22 kW', '7,4', ' 11 KW ') and a few are
+    unusable ('-', blank) so the transformer's cleaning paths are exercised.
+    """
+
+    def __init__(self, seed=0, messy_rate=0.2, invalid_rate=0.005):
+        self.random = random.Random(seed)
+        self.messy_rate = messy_rate
+        self.invalid_rate = invalid_rate
+        self.provinces = list(PROVINCES)
+        self.province_weights = [PROVINCES[p][0] for p in self.provinces]
+        self.socket_weights = [s[3] for s in SOCKETS]
+        self.next_station = 1
+        self.next_connector = 1
+
+    def generate(self, output_dir, stations, stations_per_file=STATIONS_PER_FILE):
+        """Write `stations` stations split over numbered .xlsx files, returning their paths."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        paths = []
+        remaining = stations
+        while remaining > 0:
+            count = min(stations_per_file, remaining)
+            path = output_dir / f"{len(paths) + 1}.xlsx"
+            self.write_workbook(path, count)
+            paths.append(path)
+            remaining -= count
+
+        logger.info(f"Generated {stations} stations in {len(paths)} files under {output_dir}")
+        return paths
+
+    def write_workbook(self, path, stations):
+        book = openpyxl.Workbook(write_only=True)
+        sheet = book.create_sheet()
+        sheet.append(HEADER)
+        for sira in range(1, stations + 1):
+            for row in self._station_rows(sira):
+                sheet.append(row)
+        book.save(path)
+
+    def _station_rows(self, sira):
+        rnd = self.random
+        brand, operator = rnd.choice(OPERATORS)
+        station_no = f"ŞRJ/{self.next_station}"
+        self.next_station += 1
+
+        yield [
+            sira, station_no, self._station_name(), rnd.choice(['HALKA_ACIK', 'HALKA_ACIK', 'OZEL']),
+            brand, operator, operator, None, self._address()
+        ] + SOCKET_HEADER
+
+        connector_type, connector_format, powers, _ = rnd.choices(SOCKETS, self.socket_weights)[0]
+        for _ in range(rnd.choices([1, 2, 3, 4, 6], [30, 25, 20, 15, 10])[0]):
+            yield [None] * 9 + [
+                f"SKT/{self.next_connector}", connector_type, connector_format,
+                self._power(rnd.choice(powers))
+            ]
+            self.next_connector += 1
+
+    def _station_name(self):
+        return f"{self.random.choice(NAME_PREFIXES)} {self.random.choice(NAME_SUFFIXES)}"
+
+    def _address(self):
+        rnd = self.random
+        province = rnd.choices(self.provinces, self.province_weights)[0]
+        district = rnd.choice(PROVINCES[province][1])
+        street = f"{rnd.choice(STREETS)} {rnd.choice(STREET_KINDS)}"
+        return (f"{rnd.choice(NEIGHBOURHOODS)} Mahallesi {street}  No:{rnd.randint(1, 250)} "
+                f"{district} / {province}")
+
+    def _power(self, power):
+        rnd = self.random
+        roll = rnd.random()
+        if roll < self.invalid_rate:
+            return rnd.choice(['-', None, 'YOK'])
+        if roll < self.invalid_rate + self.messy_rate:
+            text = f"{power:g}"
+            return rnd.choice([
+                f"{text} kW", f"{text}kW", f" {text} KW ", text.replace('.', ','), f"{text} kw"
+            ])
+        return int(power) if float(power).is_integer() else power
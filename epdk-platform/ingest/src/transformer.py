@@ -1,10 +1,49 @@
 import re
 import hashlib
 import json
+from dataclasses import dataclass, fields
+from itertools import repeat
+from operator import attrgetter
 import logging
 
 logger = logging.getLogger(__name__)
 
+POWER_UNIT_PATTERN = re.compile(r'\s*KW\s*$', re.IGNORECASE)
+POWER_NUMBER_PATTERN = re.compile(r'(\d+\.?\d*)')
+# City is the all-letter tail after the last '/', matched on the uppercased address
+CITY_TAIL_PATTERN = re.compile(r'\s*([A-ZİŞĞÜÖÇ]+)\s*')
+DISTRICT_LETTERS = 'A-Za-zİşğüöçĞÜÖÇİŞ'
+
+# Parsed fields read by the batch transform, in column order
+STATION_FIELDS = ('station_no', 'station_name', 'service_type', 'brand', 'charge_network_operator',
+                  'station_operator', 'address', 'source_file')
+CONNECTOR_FIELDS = ('station_no', 'connector_no', 'connector_type', 'connector_format', 'power_kw',
+                    'source_file')
+
+@dataclass(slots=True)
+class Station:
+    station_no: str
+    station_name: str
+    service_type: str
+    brand: str
+    charge_network_operator: str
+    station_operator: str
+    is_green: bool
+    address: str
+    city: str
+    district: str
+    source_file: str
+    data_hash: str
+
+@dataclass(slots=True)
+class Connector:
+    station_no: str
+    connector_no: str
+    connector_type: str
+    connector_format: str
+    power_kw: float
+    source_file: str
+
 class DataTransformer:
     SERVICE_TYPE_MAP = {
         'HALKA_ACIK': 'HALKA_ACIK',
@@ -13,68 +52,148 @@ class DataTransformer:
         'ÖZEL': 'OZEL'
     }
     
-    def __init__(self, config):
+    def __init__(self, config, address_parser=None):
         self.config = config
+        # gazetteer.AddressParser; without one, city/district come from the address tail regexes
+        self.address_parser = address_parser
+        self._district_patterns = {}  # city -> compiled district pattern
     
     def transform(self, raw_data, source_file):
-        stations = [self._transform_station(s) for s in raw_data['stations']]
-        connectors = [self._transform_connector(c) for c in raw_data['connectors']]
+        """Transform one file's parsed records into Station/Connector records, a column at a time.
         
-        valid_stations = [s for s in stations if s and s.get('station_no')]
-        valid_connectors = [c for c in connectors if c and c.get('connector_no')]
+        Low-cardinality columns (power strings, service/connector types)
+        are normalized once per distinct value and mapped back; station
+        fingerprints are built from pre-encoded JSON columns. The output
+        is the same as transforming each record with transform_stream.
+        """
+        stations = self._transform_stations(raw_data['stations'])
+        connectors = self._transform_connectors(raw_data['connectors'])
         
-        logger.info(f"Transformed {len(valid_stations)} stations, {len(valid_connectors)} connectors")
+        logger.info(f"Transformed {len(stations)} stations, {len(connectors)} connectors")
         
-        return {'stations': valid_stations, 'connectors': valid_connectors}
+        return {'stations': stations, 'connectors': connectors}
     
-    def _transform_station(self, station):
-        if not station.get('station_no'):
-            return None
+    def transform_stream(self, records):
+        """Lazily transform ('station'|'connector', record) pairs, skipping invalid ones."""
+        counts = {'station': 0, 'connector': 0}
+        for kind, record in records:
+            if kind == 'station':
+                transformed = self._transform_station(record)
+            else:
+                transformed = self._transform_connector(record)
+            if transformed:
+                counts[kind] += 1
+                yield kind, transformed
         
-        service_type = station.get('service_type', '').upper().strip()
-        service_type = self.SERVICE_TYPE_MAP.get(service_type, 'HALKA_ACIK')
+        logger.info(f"Transformed {counts['station']} stations, {counts['connector']} connectors")
+    
+    def _transform_stations(self, raw_stations):
+        rows = [s for s in raw_stations if s.station_no]
+        if not rows:
+            return []
         
-        address = station.get('address', '')
-        city, district = self._parse_address(address)
+        (station_no, station_name, service_type, brand, network_operator,
+         station_operator, address, source_file) = _columns(rows, STATION_FIELDS)
         
-        data_hash = hashlib.md5(
-            json.dumps(station, sort_keys=True).encode('utf-8')
-        ).hexdigest()
+        service_type = self._map_unique(service_type, self._normalize_service_type)
+        city, district = zip(*self._map_unique(address, self._parse_address))
+        hashes = self._fingerprints(rows)
         
-        return {
-            'station_no': station['station_no'],
-            'station_name': station.get('station_name', ''),
-            'service_type': service_type,
-            'brand': station.get('brand'),
-            'charge_network_operator': station.get('charge_network_operator'),
-            'station_operator': station.get('station_operator'),
-            'is_green': False,
-            'address': address,
-            'city': city,
-            'district': district,
-            'source_file': station.get('source_file'),
-            'data_hash': data_hash
-        }
+        return list(map(Station, station_no, station_name, service_type, brand, network_operator,
+                        station_operator, repeat(False), address, city, district, source_file, hashes))
     
-    def _transform_connector(self, connector):
-        if not connector.get('connector_no'):
+    def _transform_connectors(self, raw_connectors):
+        rows = [c for c in raw_connectors if c.connector_no]
+        if not rows:
+            return []
+        
+        station_no, connector_no, connector_type, connector_format, power_kw, source_file = \
+            _columns(rows, CONNECTOR_FIELDS)
+        
+        # Unusable power values are kept as None/<= 0 and rejected by DataValidator
+        power_kw = self._map_unique(power_kw, self._parse_power)
+        connector_type = self._map_unique(connector_type, self._normalize_connector_type)
+        connector_format = self._map_unique(connector_format, self._normalize_connector_format)
+        
+        return list(map(Connector, station_no, connector_no, connector_type, connector_format,
+                        power_kw, source_file))
+    
+    def _transform_station(self, station):
+        if not station.station_no:
             return None
         
-        power_kw = self._parse_power(connector.get('power_kw'))
-        if not power_kw or power_kw <= 0:
+        city, district = self._parse_address(station.address)
+        
+        return Station(
+            station_no=station.station_no,
+            station_name=station.station_name,
+            service_type=self._normalize_service_type(station.service_type),
+            brand=station.brand,
+            charge_network_operator=station.charge_network_operator,
+            station_operator=station.station_operator,
+            is_green=False,
+            address=station.address,
+            city=city,
+            district=district,
+            source_file=station.source_file,
+            data_hash=self._fingerprint(station)
+        )
+    
+    def _transform_connector(self, connector):
+        if not connector.connector_no:
             return None
         
-        connector_type = connector.get('connector_type', 'AC').upper()
-        connector_format = connector.get('connector_format', 'AC_TYPE2').upper().replace(' ', '_')
+        # Unusable power values are kept as None/<= 0 and rejected by DataValidator
+        return Connector(
+            station_no=connector.station_no,
+            connector_no=connector.connector_no,
+            connector_type=self._normalize_connector_type(connector.connector_type),
+            connector_format=self._normalize_connector_format(connector.connector_format),
+            power_kw=self._parse_power(connector.power_kw),
+            source_file=connector.source_file
+        )
+    
+    @staticmethod
+    def _map_unique(values, fn):
+        """Apply fn once per distinct value."""
+        lookup = {value: fn(value) for value in set(values)}
+        return [lookup[value] for value in values]
+    
+    @classmethod
+    def _normalize_service_type(cls, service_type):
+        # Blank and unknown values fall back to HALKA_ACIK
+        return cls.SERVICE_TYPE_MAP.get((service_type or '').upper().strip(), 'HALKA_ACIK')
+    
+    @staticmethod
+    def _normalize_connector_type(connector_type):
+        return connector_type.upper() if connector_type is not None else None
+    
+    @staticmethod
+    def _normalize_connector_format(connector_format):
+        return connector_format.upper().replace(' ', '_') if connector_format is not None else None
+    
+    @staticmethod
+    def _fingerprint(station):
+        # Hash of the parsed row as a sorted-key JSON object. source_file is
+        # left out: EPDK pages shift stations between files
+        content = {f.name: getattr(station, f.name) for f in fields(station) if f.name != 'source_file'}
+        return hashlib.md5(
+            json.dumps(content, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+    
+    @staticmethod
+    def _fingerprints(stations):
+        """_fingerprint for a list of parsed stations of one type.
         
-        return {
-            'station_no': connector['station_no'],
-            'connector_no': connector['connector_no'],
-            'connector_type': connector_type,
-            'connector_format': connector_format,
-            'power_kw': power_kw,
-            'source_file': connector.get('source_file')
-        }
+        Same json.dumps(sort_keys=True) text per row, built from the
+        columns with one encoder instead of one per call.
+        """
+        keys = [f.name for f in fields(stations[0]) if f.name != 'source_file']
+        encode = json.JSONEncoder(sort_keys=True).encode
+        return [
+            hashlib.md5(encode(dict(zip(keys, values))).encode('utf-8')).hexdigest()
+            for values in zip(*_columns(stations, keys))
+        ]
     
     @staticmethod
     def _parse_power(power):
@@ -84,10 +203,10 @@ class DataTransformer:
             return float(power)
         
         power_str = str(power).upper().strip()
-        power_str = re.sub(r'\s*KW\s*$', '', power_str, flags=re.IGNORECASE)
+        power_str = POWER_UNIT_PATTERN.sub('', power_str)
         power_str = power_str.replace(',', '.')
         
-        match = re.search(r'(\d+\.?\d*)', power_str)
+        match = POWER_NUMBER_PATTERN.search(power_str)
         if match:
             try:
                 return float(match.group(1))
@@ -98,14 +217,35 @@ class DataTransformer:
     def _parse_address(self, address):
         if not address:
             return None, None
+        if self.address_parser is not None:
+            return self.address_parser.parse(address)
         
-        match = re.search(r'/\s*([A-ZİŞĞÜÖÇ]+)\s*$', address.upper())
+        slash = address.rfind('/')
+        match = CITY_TAIL_PATTERN.fullmatch(address[slash + 1:].upper()) if slash >= 0 else None
         if match:
             city = match.group(1).strip()
-            district_match = re.search(r'([A-Za-zİşğüöçĞÜÖÇİŞ]+)\s*/\s*' + re.escape(city), address)
+            district_match = self._district_pattern(city).search(address)
             if district_match:
                 district = district_match.group(1).strip()
                 return city, district
             return city, None
         
         return None, None
+    
+    def _district_pattern(self, city):
+        pattern = self._district_patterns.get(city)
+        if pattern is None:
+            # The lookbehind only skips match attempts from inside a word;
+            # the leftmost match always starts at a word boundary anyway
+            pattern = re.compile(
+                rf'(?<![{DISTRICT_LETTERS}])([{DISTRICT_LETTERS}]+)\s*/\s*' + re.escape(city)
+            )
+            self._district_patterns[city] = pattern
+        return pattern
+
+def _columns(rows, names):
+    """Transpose records into one list per attribute, in the order of `names`."""
+    if len(names) == 1:
+        return [[getattr(row, names[0]) for row in rows]]
+    return [list(column) for column in zip(*map(attrgetter(*names), rows))] or [[] for _ in names]
+
@@ -0,0 +1,123 @@
+from dataclasses import asdict
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Mirrors of the constraints in db/migrations/001_initial_schema.sql
+SERVICE_TYPES = frozenset({'HALKA_ACIK', 'OZEL'})
+CONNECTOR_TYPES = frozenset({'AC', 'DC'})
+CONNECTOR_FORMATS = frozenset({
+    'AC_TYPE1', 'AC_TYPE2', 'AC_TYPE2_SOCKET', 'AC_TYPE2_CABLE',
+    'DC_CCS', 'DC_CHADEMO', 'DC_GBT', 'OTHER'
+})
+MIN_POWER_KW = 0      # chk_power_range: power_kw > 0
+MAX_POWER_KW = 500    # chk_power_range: power_kw <= 500
+
+STATION_REQUIRED = ('station_no', 'station_name', 'address')
+STATION_MAX_LENGTHS = {
+    'station_no': 50,
+    'station_name': 500,
+    'brand': 200,
+    'city': 100,
+    'district': 100,
+    'source_file': 255,
+}
+CONNECTOR_MAX_LENGTHS = {
+    'connector_no': 50,
+    'source_file': 255,
+}
+
+class DataValidator:
+    """Checks transformed records against the schema before they reach the loader.
+
+    Rows that would violate a NOT NULL, enum, length or CHECK constraint
+    are split off as rejected entries (source_file, error_type,
+    error_message, raw_data) for ingestion_errors, so a single bad row no
+    longer aborts the bulk load of its file. Connectors whose station was
+    rejected are rejected with it.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    def validate(self, transformed):
+        """Return (clean data, rejected entries) for one file's transformed data."""
+        rejected = []
+        records = [('station', s) for s in transformed['stations']]
+        records += [('connector', c) for c in transformed['connectors']]
+
+        clean = {'stations': [], 'connectors': []}
+        for kind, record in self.validate_stream(records, rejected):
+            clean[f'{kind}s'].append(record)
+
+        if rejected:
+            logger.warning(f"Rejected {len(rejected)} invalid rows")
+        return clean, rejected
+
+    def validate_stream(self, records, rejected):
+        """Lazily pass valid ('station'|'connector', record) pairs through.
+
+        Invalid rows are appended to `rejected` as they are seen. Stations
+        are checked before their connectors, which holds for both
+        validate() and the parser's streaming order.
+        """
+        rejected_stations = set()
+        for kind, record in records:
+            if kind == 'station':
+                problems = self._station_problems(record)
+                if problems:
+                    rejected_stations.add(record.station_no)
+                    rejected.append(self._rejection(record, 'INVALID_STATION', problems))
+                    continue
+            else:
+                if record.station_no in rejected_stations:
+                    rejected.append(self._rejection(
+                        record, 'ORPHAN_CONNECTOR', [f"station {record.station_no} was rejected"]
+                    ))
+                    continue
+                problems = self._connector_problems(record)
+                if problems:
+                    rejected.append(self._rejection(record, 'INVALID_CONNECTOR', problems))
+                    continue
+            yield kind, record
+
+    @staticmethod
+    def _station_problems(station):
+        problems = [f"{field} is empty" for field in STATION_REQUIRED if not getattr(station, field)]
+        if station.service_type not in SERVICE_TYPES:
+            problems.append(f"unknown service_type {station.service_type!r}")
+        problems += _length_problems(station, STATION_MAX_LENGTHS)
+        return problems
+
+    @staticmethod
+    def _connector_problems(connector):
+        problems = []
+        if connector.connector_type not in CONNECTOR_TYPES:
+            problems.append(f"unknown connector_type {connector.connector_type!r}")
+        if connector.connector_format not in CONNECTOR_FORMATS:
+            problems.append(f"unknown connector_format {connector.connector_format!r}")
+
+        power_kw = connector.power_kw
+        if power_kw is None:
+            problems.append("power_kw is missing or not a number")
+        elif not MIN_POWER_KW < power_kw <= MAX_POWER_KW:
+            problems.append(f"power_kw {power_kw} outside ({MIN_POWER_KW}, {MAX_POWER_KW}]")
+
+        problems += _length_problems(connector, CONNECTOR_MAX_LENGTHS)
+        return problems
+
+    @staticmethod
+    def _rejection(record, error_type, problems):
+        return {
+            'source_file': record.source_file,
+            'error_type': error_type,
+            'error_message': '; '.join(problems),
+            'raw_data': asdict(record),
+        }
+
+def _length_problems(record, max_lengths):
+    return [
+        f"{field} longer than {limit} characters"
+        for field, limit in max_lengths.items()
+        if getattr(record, field) and len(getattr(record, field)) > limit
+    ]
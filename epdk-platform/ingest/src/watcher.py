@@ -0,0 +1,138 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Same order as the --input-dir listing: all .xls files, then .xlsx
+PATTERNS = ('*.xls', '*.xlsx')
+
+# inotify(7) events that can mean a spreadsheet appeared or changed
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+class _Inotify:
+    """Minimal inotify binding through libc; only used to wake the watcher up early."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f'inotify_add_watch failed for {directory}')
+
+    def wait(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if readable:
+            # The events themselves don't matter, the directory is rescanned anyway
+            try:
+                while os.read(self.fd, 64 * 1024):
+                    pass
+            except BlockingIOError:
+                pass
+
+    def close(self):
+        os.close(self.fd)
+
+class _Sleeper:
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def close(self):
+        pass
+
+class DirectoryWatcher:
+    """Reports spreadsheets in a directory that are new or changed once they stop changing.
+
+    A file counts as settled when its size and mtime have stayed the same
+    for settle_seconds, so files still being copied in are not picked up
+    half-written. inotify only wakes the scan early on Linux; elsewhere, or
+    with use_inotify=False, the directory is polled every poll_interval
+    seconds. Files already in the directory at start-up are reported too;
+    the ingestion manifest decides whether they still need loading.
+    """
+
+    def __init__(self, directory, settle_seconds=2.0, poll_interval=1.0, rescan_seconds=60.0, use_inotify=True):
+        self.directory = Path(directory)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.rescan_seconds = rescan_seconds
+        self._reported = {}  # path -> (size, mtime_ns) last handed out
+        self._changing = {}  # path -> ((size, mtime_ns), monotonic time it was first seen)
+        self._waiter = _Sleeper()
+        if use_inotify and sys.platform.startswith('linux'):
+            try:
+                self._waiter = _Inotify(self.directory)
+            except OSError as e:
+                logger.warning(f"inotify unavailable ({e}), polling every {poll_interval}s")
+        logger.info(f"Watching {self.directory} "
+                    f"({'inotify' if isinstance(self._waiter, _Inotify) else 'polling'})")
+
+    def close(self):
+        self._waiter.close()
+
+    def batches(self):
+        """Yield lists of settled new or changed files, forever."""
+        while True:
+            ready = self.scan()
+            if ready:
+                yield ready
+            self._waiter.wait(self._timeout())
+
+    def scan(self, now=None):
+        """Rescan the directory and return the files that have settled since the last scan."""
+        now = time.monotonic() if now is None else now
+        current = {}
+        for pattern in PATTERNS:
+            for path in sorted(self.directory.glob(pattern)):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                current[path] = (stat.st_size, stat.st_mtime_ns)
+
+        ready = []
+        for path, key in current.items():
+            if self._reported.get(path) == key:
+                self._changing.pop(path, None)
+                continue
+            seen = self._changing.get(path)
+            if seen is None or seen[0] != key:
+                self._changing[path] = (key, now)
+            elif now - seen[1] >= self.settle_seconds:
+                del self._changing[path]
+                self._reported[path] = key
+                ready.append(path)
+
+        for path in set(self._changing) - set(current):
+            del self._changing[path]
+        for path in set(self._reported) - set(current):
+            del self._reported[path]
+        return ready
+
+    def retry(self, paths):
+        """Report these files again on a later scan, e.g. after the database was unreachable."""
+        for path in paths:
+            key = self._reported.pop(path, None)
+            if key is not None:
+                # Already settled, so an unchanged file is ready again on the next scan
+                self._changing[path] = (key, float('-inf'))
+
+    def _timeout(self):
+        if self._changing:
+            return min(self.poll_interval, self.settle_seconds / 2)
+        if isinstance(self._waiter, _Inotify):
+            return self.rescan_seconds
+        return self.poll_interval
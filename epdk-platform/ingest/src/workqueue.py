@@ -0,0 +1,205 @@
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+from contextlib import contextmanager
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-task results summed into ingestion_batches by rollup()
+TASK_STATS = ('stations_inserted', 'stations_updated', 'stations_unchanged', 'connectors_inserted',
+              'rows_quarantined')
+
+class WorkQueue:
+    """Files of ingestion batches, shared by any number of `cli.py work` processes.
+
+    A worker claims one PENDING task at a time with FOR UPDATE SKIP LOCKED
+    and holds it under a lease that a heartbeat thread keeps extending. If
+    the worker dies, the lease runs out and another worker claims the task
+    again, up to max_attempts claims. Loading a file twice is harmless, as
+    the merge skips unchanged stations, so a task that finished loading
+    just before its worker died is simply loaded again.
+    """
+
+    def __init__(self, config, worker_id, lease_seconds=300, max_attempts=3):
+        self.config = config
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = None
+        self.cursor = None
+
+    def connect(self):
+        self.conn = psycopg2.connect(self.config.database_dsn)
+        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+
+    def disconnect(self):
+        if self.cursor:
+            self.cursor.close()
+        if self.conn:
+            self.conn.close()
+
+    def enqueue(self, batch_id, fingerprints, files_skipped=0):
+        """Add one PENDING task per file fingerprint and return the task count."""
+        if fingerprints:
+            execute_values(self.cursor, """
+                INSERT INTO ingestion_queue (batch_id, file_path, file_size, file_mtime, content_hash)
+                VALUES %s
+            """, [
+                # The hash is only known if the manifest check needed it; workers compute it otherwise
+                (str(batch_id), f.path, f.size, f.mtime, f.known_content_hash)
+                for f in fingerprints
+            ], template="(%s::uuid, %s, %s, %s, %s)")
+        self.cursor.execute("UPDATE ingestion_batches SET files_skipped = %s WHERE id = %s::uuid",
+                            (files_skipped, str(batch_id)))
+        self.conn.commit()
+        logger.info(f"Enqueued {len(fingerprints)} files for batch {batch_id}")
+        return len(fingerprints)
+
+    def claim(self, batch_id=None):
+        """Lease the oldest available task, or return None when there is none.
+
+        Tasks whose lease expired are claimable again; those already
+        claimed max_attempts times are failed instead.
+        """
+        self.cursor.execute("""
+            UPDATE ingestion_queue
+            SET status = 'FAILED', finished_at = NOW(),
+                error_message = 'Lease expired on its last attempt (worker ' || worker || ')'
+            WHERE status = 'RUNNING' AND leased_until < NOW() AND attempts >= %s
+            RETURNING batch_id
+        """, (self.max_attempts,))
+        expired_batches = {row['batch_id'] for row in self.cursor.fetchall()}
+
+        self.cursor.execute("""
+            UPDATE ingestion_queue
+            SET status = 'RUNNING', worker = %(worker)s, attempts = attempts + 1,
+                started_at = NOW(), heartbeat_at = NOW(),
+                leased_until = NOW() + make_interval(secs => %(lease)s)
+            WHERE id = (
+                SELECT id FROM ingestion_queue
+                WHERE (status = 'PENDING' OR (status = 'RUNNING' AND leased_until < NOW()))
+                  AND (%(batch_id)s::uuid IS NULL OR batch_id = %(batch_id)s::uuid)
+                ORDER BY id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING id, batch_id, file_path, file_size, file_mtime, content_hash, attempts
+        """, {'worker': self.worker_id, 'lease': self.lease_seconds,
+              'batch_id': str(batch_id) if batch_id else None})
+        task = self.cursor.fetchone()
+        self.conn.commit()
+
+        for expired in expired_batches:
+            self.rollup(expired)
+        return task
+
+    def complete(self, task, stats, timings):
+        self._finish(task, 'DONE', stats=stats, timings=timings)
+
+    def fail(self, task, error_message, timings=None):
+        """Record a failed attempt; the task goes back to PENDING until max_attempts is reached."""
+        status = 'FAILED' if task['attempts'] >= self.max_attempts else 'PENDING'
+        self._finish(task, status, timings=timings, error_message=error_message)
+
+    def _finish(self, task, status, stats=None, timings=None, error_message=None):
+        stats = stats or {}
+        timings = timings or {}
+        self.cursor.execute("""
+            UPDATE ingestion_queue
+            SET status = %s, finished_at = NOW(), leased_until = NULL, error_message = %s,
+                stations_inserted = %s, stations_updated = %s, stations_unchanged = %s,
+                connectors_inserted = %s, rows_quarantined = %s,
+                parse_seconds = %s, transform_seconds = %s, load_seconds = %s
+            WHERE id = %s AND worker = %s AND status = 'RUNNING'
+        """, (
+            status, error_message,
+            *(stats.get(key, 0) for key in TASK_STATS),
+            timings.get('parse'), timings.get('transform'), timings.get('load'),
+            task['id'], self.worker_id
+        ))
+        if self.cursor.rowcount == 0:
+            logger.warning(f"Task {task['id']} was reclaimed by another worker after its lease expired")
+        self.conn.commit()
+        self.rollup(task['batch_id'])
+
+    def rollup(self, batch_id):
+        """Sum the batch's tasks into ingestion_batches and close it once no task is left.
+
+        The batch is COMPLETED if at least one file loaded (failed files
+        count as errors) and FAILED if every task failed.
+        """
+        # Locking the batch row first makes concurrent rollups see each other's task updates
+        self.cursor.execute("SELECT id FROM ingestion_batches WHERE id = %s::uuid FOR UPDATE", (str(batch_id),))
+        self.cursor.execute(f"""
+            UPDATE ingestion_batches b
+            SET files_processed = q.done,
+                errors_count = q.failed,
+                {', '.join(f'{key} = q.{key}' for key in TASK_STATS)},
+                parse_seconds = q.parse_seconds,
+                transform_seconds = q.transform_seconds,
+                load_seconds = q.load_seconds,
+                rows_processed = q.rows_processed,
+                status = CASE WHEN q.open > 0 THEN 'RUNNING'
+                              WHEN q.done = 0 AND q.failed > 0 THEN 'FAILED'
+                              ELSE 'COMPLETED' END,
+                completed_at = CASE WHEN q.open = 0 THEN NOW() END,
+                wall_seconds = CASE WHEN q.open = 0 THEN EXTRACT(EPOCH FROM NOW() - b.started_at) END,
+                rows_per_second = CASE WHEN q.open = 0
+                    THEN q.rows_processed / GREATEST(EXTRACT(EPOCH FROM NOW() - b.started_at), 0.001) END
+            FROM (
+                SELECT
+                    COUNT(*) FILTER (WHERE status = 'DONE') AS done,
+                    COUNT(*) FILTER (WHERE status = 'FAILED') AS failed,
+                    COUNT(*) FILTER (WHERE status IN ('PENDING', 'RUNNING')) AS open,
+                    {', '.join(f'COALESCE(SUM({key}), 0) AS {key}' for key in TASK_STATS)},
+                    SUM(parse_seconds) AS parse_seconds,
+                    SUM(transform_seconds) AS transform_seconds,
+                    SUM(load_seconds) AS load_seconds,
+                    COALESCE(SUM(stations_inserted + stations_updated + stations_unchanged
+                                 + connectors_inserted) FILTER (WHERE status = 'DONE'), 0) AS rows_processed
+                FROM ingestion_queue
+                WHERE batch_id = %s::uuid
+            ) q
+            WHERE b.id = %s::uuid
+            RETURNING b.status
+        """, (str(batch_id), str(batch_id)))
+        row = self.cursor.fetchone()
+        self.conn.commit()
+        if row and row['status'] == 'COMPLETED':
+            logger.info(f"Batch {batch_id} completed")
+        elif row and row['status'] == 'FAILED':
+            logger.error(f"Batch {batch_id} failed: every file failed to load")
+
+    @contextmanager
+    def heartbeat(self, task):
+        """Keep extending the task's lease from a background thread while the block runs."""
+        stop = threading.Event()
+        thread = threading.Thread(target=self._beat, args=(task['id'], stop),
+                                  name=f"heartbeat-{task['id']}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _beat(self, task_id, stop):
+        # Own connection: the worker's connection is busy in a load transaction
+        conn = psycopg2.connect(self.config.database_dsn)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                while not stop.wait(self.lease_seconds / 3):
+                    cursor.execute("""
+                        UPDATE ingestion_queue
+                        SET heartbeat_at = NOW(), leased_until = NOW() + make_interval(secs => %s)
+                        WHERE id = %s AND worker = %s AND status = 'RUNNING'
+                    """, (self.lease_seconds, task_id, self.worker_id))
+                    if cursor.rowcount == 0:
+                        logger.warning(f"Lost the lease on task {task_id}")
+                        return
+        except psycopg2.Error as e:
+            logger.error(f"Heartbeat for task {task_id} failed: {e}")
+        finally:
+            conn.close()
@@ -4,6 +4,7 @@ from urllib.parse import quote
 sys.path.insert(0, 'api')
 
 from fastapi.testclient import TestClient
+import main
 from main import app
 
 client = TestClient(app)
@@ -244,3 +245,24 @@ class TestProtectedEndpoints:
             headers={"Authorization": f"Bearer {token}"}
         )
         assert response.status_code == 403
+
+
+class TestProfiling:
+    """Istek bazli profilleme testleri"""
+    
+    def test_profile_header_writes_folded_stacks(self, tmp_path, monkeypatch):
+        """X-Profile basligi CPU ve bellek stack dosyalari yazmali"""
+        monkeypatch.setattr(main, "PROFILE_DIR", str(tmp_path))
+        response = client.get("/stats", headers={"X-Profile": "1"})
+        assert response.status_code == 200
+        cpu = list(tmp_path.glob("*-stats-*.cpu.folded"))
+        alloc = list(tmp_path.glob("*-stats-*.alloc.folded"))
+        assert len(cpu) == 1 and len(alloc) == 1
+        assert "stats (api/main.py" in cpu[0].read_text()
+    
+    def test_profiling_is_off_without_profile_dir(self, tmp_path, monkeypatch):
+        """PROFILE_DIR yoksa profile=1 bir sey yazmamali"""
+        monkeypatch.setattr(main, "PROFILE_DIR", None)
+        response = client.get("/stations?profile=1")
+        assert response.status_code == 200
+        assert list(tmp_path.iterdir()) == []
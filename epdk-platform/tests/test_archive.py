@@ -0,0 +1,88 @@
+import os
+import tarfile
+import zipfile
+import pytest
+import sys
+sys.path.insert(0, 'ingest/src')
+
+import archive
+from archive import archive_members, find_member
+from manifest import FileFingerprint, hash_file
+from parser import ExcelParser
+from synthetic import SyntheticGenerator
+
+
+@pytest.fixture
+def spreadsheets(tmp_path):
+    return SyntheticGenerator(seed=4).generate(tmp_path / 'files', 12, stations_per_file=5)
+
+
+def make_zip(path, files):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for f in reversed(files):
+            archive.write(f, f'epdk/{f.name}')
+            archive.writestr(f'__MACOSX/epdk/._{f.name}', b'resource fork')
+        archive.writestr('epdk/notlar.txt', 'not a spreadsheet')
+    return path
+
+
+class TestArchiveMembers:
+    """Arsivden (zip/tar.gz) dogrudan okuma testleri"""
+
+    def test_zip_members_are_listed_in_order(self, tmp_path, spreadsheets):
+        """Sadece tablolar, dizin listesi sirasinda donmeli"""
+        members = archive_members(make_zip(tmp_path / 'epdk.zip', spreadsheets))
+        assert [m.name for m in members] == ['1.xlsx', '2.xlsx', '3.xlsx']
+        assert members[0].path == f"{tmp_path / 'epdk.zip'}!epdk/1.xlsx"
+
+    def test_members_parse_like_files(self, tmp_path, spreadsheets):
+        """Arsiv uyesi diskteki dosya ile ayni kayitlari vermeli"""
+        tar_path = tmp_path / 'epdk.tar.gz'
+        with tarfile.open(tar_path, 'w:gz') as archive:
+            for f in spreadsheets:
+                archive.add(f, f'epdk/{f.name}')
+
+        parser = ExcelParser(None)
+        expected = [parser.parse_file(f) for f in spreadsheets]
+        for archive_path in (make_zip(tmp_path / 'epdk.zip', spreadsheets), tar_path):
+            members = archive_members(archive_path)
+            assert [parser.parse_file(m) for m in members] == expected
+            assert list(parser.iter_records(members[0])) == list(parser.iter_records(spreadsheets[0]))
+
+    def test_fingerprint_uses_member_content(self, tmp_path, spreadsheets):
+        """Icerik hash'i cikarilmis dosyanin hash'i ile ayni olmali"""
+        member = archive_members(make_zip(tmp_path / 'epdk.zip', spreadsheets))[0]
+        fingerprint = FileFingerprint.of_member(member)
+        assert fingerprint.size == spreadsheets[0].stat().st_size
+        assert fingerprint.content_hash == hash_file(spreadsheets[0])
+
+    def test_find_member_by_path(self, tmp_path, spreadsheets):
+        """Kuyruktaki '<arsiv>!<uye>' yolu ayni uyeyi bulmali"""
+        member = archive_members(make_zip(tmp_path / 'epdk.zip', spreadsheets))[1]
+        assert find_member(member.path).read_bytes() == spreadsheets[1].read_bytes()
+        with pytest.raises(FileNotFoundError):
+            find_member(f"{tmp_path / 'epdk.zip'}!epdk/yok.xlsx")
+
+    def test_find_member_lists_archive_once(self, tmp_path, spreadsheets, monkeypatch):
+        """Ayni arsivdeki uyeler icin arsiv bir kez listelenmeli, arsiv degisince tekrar"""
+        zip_path = make_zip(tmp_path / 'epdk.zip', spreadsheets)
+        members = archive_members(zip_path)
+        listed = []
+        monkeypatch.setattr(archive, 'archive_members', lambda path: listed.append(path) or members)
+        monkeypatch.setattr(archive, '_member_index', {})
+
+        assert [find_member(m.path) for m in members] == members
+        assert len(listed) == 1
+
+        stat = zip_path.stat()
+        os.utime(zip_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        find_member(members[0].path)
+        assert len(listed) == 2
+
+    def test_not_an_archive(self, tmp_path, spreadsheets):
+        """Arsiv olmayan dosya ve tek basina xlsx ValueError vermeli"""
+        (tmp_path / 'notlar.txt').write_text('arsiv degil')
+        with pytest.raises(ValueError):
+            archive_members(tmp_path / 'notlar.txt')
+        with pytest.raises(ValueError):
+            archive_members(spreadsheets[0])
@@ -0,0 +1,106 @@
+import os
+from pathlib import Path
+import pytest
+import sys
+sys.path.insert(0, 'ingest/src')
+
+pytest.importorskip('pyarrow')
+
+import parser as excel_parser
+from cache import ParseCache
+from parser import ExcelParser, ParsedStation, ParsedConnector
+
+COLUMNS = {
+    'stations': {'station_no': ['ŞRJ/1', 'ŞRJ/2'], 'station_name': ['Birinci', None]},
+    'connectors': {'station_no': ['ŞRJ/1'], 'connector_no': ['SKT/11'], 'power_kw': ['22 kW']},
+}
+
+
+def age(cache, content_hash, seconds):
+    """Move an entry's mtime back, as if it was last used seconds ago."""
+    for path in cache.cache_dir.glob(f'{content_hash}.*.arrow'):
+        mtime = path.stat().st_mtime - seconds
+        os.utime(path, (mtime, mtime))
+
+
+class TestParseCache:
+    """Arrow parse cache testleri"""
+
+    def test_round_trip(self, tmp_path):
+        """put ile yazilan kolonlar get ile aynen okunmali"""
+        cache = ParseCache(tmp_path)
+        assert cache.get('abc', 'a.xlsx') is None
+        cache.put('abc', COLUMNS)
+        assert cache.get('abc', 'a.xlsx') == COLUMNS
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Dizin sinirini asinca en uzun suredir kullanilmayan kayit silinmeli"""
+        cache = ParseCache(tmp_path)
+        cache.put('old', COLUMNS)
+        entry_bytes = sum(p.stat().st_size for p in tmp_path.glob('*.arrow'))
+        cache.max_bytes = entry_bytes * 2
+        cache.put('used', COLUMNS)
+        age(cache, 'old', 60)
+        age(cache, 'used', 120)
+        assert cache.get('used', 'b.xlsx') is not None  # a hit makes it the most recent
+
+        cache.put('new', COLUMNS)
+        assert cache.get('old', 'a.xlsx') is None
+        assert cache.get('used', 'b.xlsx') == COLUMNS
+        assert cache.get('new', 'c.xlsx') == COLUMNS
+
+    def test_corrupt_entry_is_a_miss(self, tmp_path):
+        """Bozuk veya yarim kalmis kayit hata yerine miss olmali"""
+        cache = ParseCache(tmp_path)
+        cache.put('abc', COLUMNS)
+        (tmp_path / 'abc.connectors.arrow').write_bytes(b'not arrow')
+        assert cache.get('abc', 'a.xlsx') is None
+
+        (tmp_path / 'abc.connectors.arrow').unlink()
+        assert cache.get('abc', 'a.xlsx') is None
+
+
+class TestParserCacheKey:
+    """ExcelParser'in cache anahtari testleri"""
+
+    @pytest.fixture
+    def parser(self, tmp_path, monkeypatch):
+        """Parser whose Excel reads are counted in parser.reads."""
+        parser = ExcelParser(None, cache=ParseCache(tmp_path))
+        parser.reads = 0
+
+        def parse_excel(file_path):
+            parser.reads += 1
+            return {
+                'stations': [ParsedStation('ŞRJ/1', 'Birinci', 'Halka Açık', 'Marka', 'Ağ', 'İşletmeci',
+                                           'Evet', 'Adres', file_path.name)],
+                'connectors': [ParsedConnector('ŞRJ/1', 'SKT/11', 'AC', 'Tip 2', '22 kW', file_path.name)],
+            }
+
+        monkeypatch.setattr(parser, '_parse_excel', parse_excel)
+        return parser
+
+    def test_same_content_is_a_hit(self, parser):
+        """Ayni icerik baska dosya adiyla da cache'ten okunmali"""
+        first = parser.parse_file(Path('a.xlsx'), 'abc')
+        second = parser.parse_file(Path('b.xlsx'), 'abc')
+        assert parser.reads == 1
+        assert second['stations'][0].source_file == 'b.xlsx'
+        assert second['connectors'][0].power_kw == first['connectors'][0].power_kw
+
+    def test_parser_version_change_is_a_miss(self, parser, monkeypatch):
+        """PARSER_VERSION degisince eski kayitlar kullanilmamali"""
+        parser.parse_file(Path('a.xlsx'), 'abc')
+        monkeypatch.setattr(excel_parser, 'PARSER_VERSION', excel_parser.PARSER_VERSION + 1)
+        parser.parse_file(Path('a.xlsx'), 'abc')
+        assert parser.reads == 2
+
+    def test_field_layout_change_is_a_miss(self, parser, monkeypatch):
+        """Cache'lenen alanlar degisince eski kayitlar kullanilmamali"""
+        parser.parse_file(Path('a.xlsx'), 'abc')
+        kinds = dict(excel_parser.RECORD_KINDS)
+        record, fields = kinds['connectors']
+        kinds['connectors'] = (record, fields[:-1])
+        monkeypatch.setattr(excel_parser, 'RECORD_KINDS', kinds)
+        assert parser.cache.get(excel_parser.cache_key('abc'), 'a.xlsx') is None
@@ -0,0 +1,164 @@
+from collections import Counter
+import psycopg2
+from psycopg2.extras import RealDictCursor
+import pytest
+import sys
+sys.path.insert(0, 'ingest/src')
+sys.path.insert(0, 'ingest')
+
+from config import Config
+from gazetteer import AddressParser, OfflineGeocoder, PROVINCE_DISTRICTS, JITTER_DEGREES, fold
+from geocode_by_city import CITY_COORDINATES, locate_stations, normalize_city
+from parser import ParsedStation
+from transformer import DataTransformer
+
+
+class TestGazetteer:
+    """Il/ilce sozlugu testleri"""
+
+    def test_covers_all_provinces(self):
+        """81 il olmali ve normalize_city sonuclari CITY_COORDINATES ile eslesmeli"""
+        assert len(PROVINCE_DISTRICTS) == 81
+        assert {normalize_city(p) for p in PROVINCE_DISTRICTS} == set(CITY_COORDINATES)
+        assert all(fold(p) == normalize_city(p) for p in PROVINCE_DISTRICTS)
+
+
+class TestAddressParser:
+    """Adres ayristirma testleri"""
+
+    parser = AddressParser()
+
+    def test_canonical_names(self):
+        """Sonuc kanonik yazimla donmeli"""
+        assert self.parser.parse('Cumhuriyet Mahallesi  No:12 GÖLBAŞI / ANKARA') == ('ANKARA', 'Gölbaşı')
+        assert self.parser.parse('Hacı Halil Mah. Gebze / Kocaeli') == ('KOCAELİ', 'Gebze')
+        assert self.parser.parse('Istiklal Cad. No:5 Kusadasi / AYDIN') == ('AYDIN', 'Kuşadası')
+
+    def test_district_belongs_to_city(self):
+        """Ayni adli ilce ilin kendi ilcesi olarak cozulmeli"""
+        assert self.parser.parse('Merkez Mahallesi Gölbaşı / ADIYAMAN') == ('ADIYAMAN', 'Gölbaşı')
+        assert self.parser.parse('Yenişehir / MERSİN') == ('MERSİN', 'Yenişehir')
+        assert self.parser.parse('Bağdat Caddesi Merkez / İSTANBUL') == ('İSTANBUL', 'Merkez')
+
+    def test_aliases(self):
+        """Eski ve kisa adlar kanonik ada cevrilmeli"""
+        assert self.parser.parse('Sanayi Sitesi Merkez / AFYON') == ('AFYONKARAHİSAR', 'Merkez')
+        assert self.parser.parse('Eyüp / İSTANBUL') == ('İSTANBUL', 'Eyüpsultan')
+        assert self.parser.parse('Atatürk Bulvarı Onikişubat / K.MARAŞ') == ('KAHRAMANMARAŞ', 'Onikişubat')
+
+    def test_district_not_before_province(self):
+        """Ilce il adindan once degilse adres icinde aranmali, mahalle adi atlanmali"""
+        address = 'Konak Mahallesi Bornova Sanayi No:3 / İZMİR'
+        assert self.parser.parse(address) == ('İZMİR', 'Bornova')
+        assert self.parser.parse('Konak Mahallesi 1203 Sokağı / İZMİR') == ('İZMİR', None)
+
+    def test_unparseable(self):
+        """Il bulunamazsa iki alan da bos olmali"""
+        assert self.parser.parse('Osb Mahallesi No:21 ( Ada: - , Pafta: - , Parsel: - )') == (None, None)
+        assert self.parser.parse('') == (None, None)
+
+    def test_transformer_uses_parser(self):
+        """DataTransformer verilen ayristiriciyi kullanmali"""
+        raw = {'stations': [ParsedStation('ŞRJ/1', 'A', 'OZEL', None, None, None, None,
+                                          'Çiğdem Mahallesi Tepebaşı / ESKİŞEHİR', '1.xls')],
+               'connectors': []}
+        station = DataTransformer(None, address_parser=self.parser).transform(raw, '1.xls')['stations'][0]
+        assert (station.city, station.district) == ('ESKİŞEHİR', 'Tepebaşı')
+
+
+PLACES = """\
+# test
+province\tdistrict\tplace\tlatitude\tlongitude
+İZMİR\tBornova\t\t38.4700\t27.2200
+İZMİR\t\tCumhuriyet\t38.4793\t27.0988
+İZMİR\t\tCumhuriyet\t38.0722\t26.9205
+İZMİR\t\tKaraburun\t38.6400\t26.5100
+"""
+
+
+class TestOfflineGeocoder:
+    """Cevrimdisi mahalle/ilce/il geocoding testleri"""
+
+    def geocoder(self, tmp_path):
+        path = tmp_path / 'places.tsv'
+        path.write_text(PLACES, encoding='utf-8')
+        return OfflineGeocoder(CITY_COORDINATES, path)
+
+    def assert_near(self, located, coords, level):
+        lat, lon, got = located
+        radius = JITTER_DEGREES[level]
+        assert got == level
+        assert abs(lat - coords[0]) <= radius and abs(lon - coords[1]) <= radius
+
+    def test_most_specific_level(self, tmp_path):
+        """Mahalle, ilce ve il sirasiyla denenmeli"""
+        geocoder = self.geocoder(tmp_path)
+        located = geocoder.locate('ŞRJ/1', 'İZMİR', 'Bornova', 'Cumhuriyet Mahallesi 1203 Sokağı Bornova / İZMİR')
+        self.assert_near(located, (38.4793, 27.0988), 'place')
+        located = geocoder.locate('ŞRJ/2', 'İZMİR', 'Bornova', 'Kazımdirik Mah. 372 Sokak Bornova / İZMİR')
+        self.assert_near(located, (38.47, 27.22), 'district')
+        self.assert_near(geocoder.locate('ŞRJ/3', 'İZMİR', 'Buca', 'Buca / İZMİR'), CITY_COORDINATES['IZMIR'], 'province')
+        self.assert_near(geocoder.locate('ŞRJ/4', 'İZMİR', 'Merkez', None), CITY_COORDINATES['IZMIR'], 'district')
+        assert geocoder.locate('ŞRJ/5', 'ATLANTIS', None, 'Cumhuriyet Mahallesi') is None
+
+    def test_distant_namesake_ignored(self, tmp_path):
+        """Ilce merkezinden uzak ayni adli yer kullanilmamali"""
+        located = self.geocoder(tmp_path).locate('ŞRJ/1', 'İZMİR', 'Bornova', 'Karaburun Mahallesi Bornova / İZMİR')
+        self.assert_near(located, (38.47, 27.22), 'district')
+
+    def test_deterministic_jitter(self, tmp_path):
+        """Ayni istasyon hep ayni noktaya, farkli istasyonlar farkli noktalara dusmeli"""
+        geocoder = self.geocoder(tmp_path)
+        first = geocoder.locate('ŞRJ/1', 'İZMİR', 'Bornova', None)
+        assert geocoder.locate('ŞRJ/1', 'İZMİR', 'Bornova', None) == first
+        assert self.geocoder(tmp_path).locate('ŞRJ/1', 'İZMİR', 'Bornova', None) == first
+        assert len({geocoder.locate(f'ŞRJ/{i}', 'İZMİR', 'Bornova', None) for i in range(100)}) == 100
+
+    def test_bundled_gazetteer(self):
+        """Paketteki gazetteer ilcelerin cogunu kapsamali"""
+        geocoder = OfflineGeocoder(CITY_COORDINATES)
+        assert len(geocoder.districts) > 850
+        assert geocoder.locate('ŞRJ/1', 'ANTALYA', 'Manavgat', 'Manavgat / ANTALYA')[2] == 'district'
+
+
+@pytest.fixture
+def db():
+    """RealDictCursor in a transaction that is rolled back afterwards."""
+    conn = psycopg2.connect(Config().database_dsn)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    yield cursor
+    conn.rollback()
+    conn.close()
+
+
+class TestLocateStations:
+    """geocode_by_city.py akisi testleri (gercek veritabani ile)"""
+
+    def test_locations_and_level_counts(self, db, tmp_path):
+        """Konumlar tek UPDATE ile yazilmali, il bazinda seviyeler sayilmali"""
+        # Leave other stations without a location out of the run
+        db.execute("UPDATE stations SET city = NULL WHERE location IS NULL")
+        stations = [
+            ('TEST/1', 'İZMİR', 'Bornova', 'Cumhuriyet Mahallesi 1203 Sokağı Bornova / İZMİR'),
+            ('TEST/2', 'İZMİR', 'Bornova', 'Kazımdirik Mah. 372 Sokak Bornova / İZMİR'),
+            ('TEST/3', 'İZMİR', 'Buca', 'Buca / İZMİR'),
+            ('TEST/4', 'ANKARA', 'Merkez', 'Atatürk Bulvarı No:1'),
+            ('TEST/5', 'ATLANTIS', None, 'Cumhuriyet Mahallesi'),
+        ]
+        for station in stations:
+            db.execute("""
+                INSERT INTO stations (station_no, station_name, city, district, address)
+                VALUES (%s, 'Test', %s, %s, %s)
+            """, station)
+
+        path = tmp_path / 'places.tsv'
+        path.write_text(PLACES, encoding='utf-8')
+        located, levels, unknown = locate_stations(db, OfflineGeocoder(CITY_COORDINATES, path))
+
+        assert located == 4
+        assert levels == {'İZMİR': Counter(place=1, district=1, province=1), 'ANKARA': Counter(district=1)}
+        assert unknown == Counter({'ATLANTIS': 1})
+        db.execute("SELECT station_no FROM stations WHERE station_no LIKE 'TEST/%' AND location IS NOT NULL "
+                   "ORDER BY station_no")
+        assert [row['station_no'] for row in db.fetchall()] == ['TEST/1', 'TEST/2', 'TEST/3', 'TEST/4']
+        assert locate_stations(db, OfflineGeocoder(CITY_COORDINATES, path))[0] == 0
@@ -0,0 +1,270 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import psycopg2
+from psycopg2.extras import RealDictCursor
+import pytest
+import sys
+sys.path.insert(0, 'ingest/src')
+sys.path.insert(0, 'ingest')
+
+from config import Config
+from geocoder import Geocoder, GeocodeCache, GeocodeError, GeocodeProgress, LOCATED, NOT_FOUND, ERROR, FAILED
+from geocode_stations import cache_key, geocode_batch
+
+
+class StubNominatim(BaseHTTPRequestHandler):
+    """Answers /search like Nominatim: 'FLAKY' addresses get a 429 first, 'BAD' ones a 400."""
+    protocol_version = 'HTTP/1.1'  # keep-alive, so connection reuse is visible
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)['q'][0]
+        self.server.queries.append(query)
+        if query.startswith('FLAKY') and self.server.queries.count(query) == 1:
+            return self.reply(429, [], {'Retry-After': '0'})
+        if query.startswith('BAD'):
+            return self.reply(400, {'error': 'bad request'})
+        if query.startswith('YOK'):
+            return self.reply(200, [])
+        return self.reply(200, [{'lat': '41.0', 'lon': str(28 + len(query) / 100)}])
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubNominatim)
+    server.queries = []
+    server.connections = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def geocode_all(url, stations, **kwargs):
+    async def run():
+        async with Geocoder(url, backoff=0.01, **kwargs) as geocoder:
+            return [result async for result in geocoder.geocode_all(stations)]
+    return asyncio.run(run())
+
+
+class TestGeocoder:
+    """Async geocoding motoru testleri (yerel stub sunucu ile)"""
+
+    def test_geocodes_over_pooled_connections(self, stub):
+        """Tum adresler cozulmeli, baglantilar yeniden kullanilmali"""
+        url = f'http://127.0.0.1:{stub.server_port}'
+        stations = [{'id': i, 'address': f'Adres {i}', 'city': 'ISTANBUL'} for i in range(40)]
+        stations.append({'id': 40, 'address': 'YOK', 'city': 'ANKARA'})
+
+        results = geocode_all(url, stations, rate=1000, burst=10, concurrency=4)
+        assert sorted(s['id'] for s, _, _ in results) == list(range(41))
+        by_id = {s['id']: (coords, error) for s, coords, error in results}
+        assert by_id[0] == ((41.0, 28 + len('Adres 0, ISTANBUL, Turkey') / 100), None)
+        assert by_id[40] == (None, None)
+        assert len(stub.queries) == 41
+        assert stub.connections <= 4
+
+    def test_retries_and_permanent_errors(self, stub):
+        """429 tekrar denenmeli, 400 denenmeden hata olarak donmeli"""
+        url = f'http://127.0.0.1:{stub.server_port}'
+        stations = [{'id': 1, 'address': 'FLAKY', 'city': 'IZMIR'}, {'id': 2, 'address': 'BAD', 'city': 'IZMIR'}]
+
+        by_id = {s['id']: (coords, error) for s, coords, error in geocode_all(url, stations, rate=1000)}
+        assert by_id[1][0] is not None
+        assert by_id[2][0] is None and 'HTTP 400' in by_id[2][1]
+        assert stub.queries.count('FLAKY, IZMIR, Turkey') == 2
+        assert stub.queries.count('BAD, IZMIR, Turkey') == 1
+
+    def test_gives_up_after_retries(self):
+        """Ulasilamayan sunucu icin GeocodeError verilmeli"""
+        async def run():
+            async with Geocoder('http://127.0.0.1:9', rate=1000, retries=1, backoff=0.01) as geocoder:
+                await geocoder.geocode('Adres', 'ISTANBUL')
+        with pytest.raises(GeocodeError):
+            asyncio.run(run())
+
+    def test_rate_limit(self, stub):
+        """Token bucket istek hizini sinirlamali"""
+        url = f'http://127.0.0.1:{stub.server_port}'
+        stations = [{'id': i, 'address': f'Adres {i}', 'city': 'ISTANBUL'} for i in range(11)]
+        start = time.monotonic()
+        geocode_all(url, stations, rate=50, burst=1, concurrency=8)
+        assert time.monotonic() - start >= 10 / 50 * 0.9
+
+
+@pytest.fixture
+def db():
+    """RealDictCursor in a transaction that is rolled back afterwards."""
+    conn = psycopg2.connect(Config().database_dsn)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    yield cursor
+    conn.rollback()
+    conn.close()
+
+
+def add_stations(cursor, *station_nos, address='Adres'):
+    """Stations without a location, each with the address '<address> <station_no>'."""
+    for station_no in station_nos:
+        cursor.execute("""
+            INSERT INTO stations (station_no, station_name, address, city)
+            VALUES (%s, 'Test', %s, 'ANKARA')
+        """, (station_no, f'{address} {station_no}'))
+
+
+def age(cursor, table, days, key, values):
+    """Move the rows' last lookup back by days."""
+    column = 'geocoded_at' if table == 'geocode_cache' else 'attempted_at'
+    cursor.execute(f"UPDATE {table} SET {column} = NOW() - make_interval(days => %s) WHERE {key} = ANY(%s)",
+                   (days, list(values)))
+
+
+def candidates(progress, cursor, retry_failed=False):
+    return [row['station_no'] for row in progress.candidates(retry_failed=retry_failed)
+            if row['station_no'].startswith('TEST/')]
+
+
+class TestCacheKey:
+    """Geocode onbellek anahtari normalizasyon testleri"""
+
+    def test_case_and_turkish_letters(self):
+        """Buyuk/kucuk harf ve Turkce karakterler ayni anahtari vermeli"""
+        assert cache_key('Gölbaşı Cad. No:5', 'ANKARA') == ('GOLBASI CAD NO 5', 'ANKARA')
+        assert cache_key('GÖLBAŞI CAD NO 5', 'ankara') == cache_key('gölbaşı cad no 5', 'Ankara')
+        assert cache_key('İnönü Bulvarı', 'İZMİR') == cache_key('inönü bulvarı', 'izmir')
+
+    def test_punctuation_and_spaces(self):
+        """Noktalama ve fazla bosluk anahtari degistirmemeli"""
+        assert cache_key('  Atatürk Cd.,  No: 12/A ', 'İstanbul') == cache_key('Atatürk Cd No 12 A', 'ISTANBUL')
+        assert cache_key('Adres', None) == ('ADRES', '')
+
+
+class TestGeocodeCache:
+    """geocode_cache TTL testleri (gercek veritabani ile)"""
+
+    def test_fresh_and_expired_entries(self, db):
+        """Bulunan adres ttl_days, bulunamayan negative_ttl_days gun gecerli olmali"""
+        cache = GeocodeCache(db, ttl_days=365, negative_ttl_days=30)
+        found, missing = ('TEST BULUNAN', 'ANKARA'), ('TEST YOK', 'ANKARA')
+        cache.store([(found, (39.9, 32.8)), (missing, None)])
+        assert cache.lookup([found, missing]) == {found: (39.9, 32.8), missing: None}
+
+        age(db, 'geocode_cache', 31, 'address_key', [found[0], missing[0]])
+        assert cache.lookup([found, missing]) == {found: (39.9, 32.8)}
+        age(db, 'geocode_cache', 366, 'address_key', [found[0], missing[0]])
+        assert cache.lookup([found, missing]) == {}
+
+        assert cache.evict() >= 2
+        cache.store([(missing, (39.0, 32.0))])  # found after all
+        assert cache.lookup([found, missing]) == {missing: (39.0, 32.0)}
+
+    def test_not_found_expires_with_negative_ttl(self, db):
+        """Bulunamayan istasyon negative_ttl_days sonra tekrar aday olmali"""
+        add_stations(db, 'TEST/1', 'TEST/2')
+        progress = GeocodeProgress(db, negative_ttl_days=30)
+        progress.start(restart=True)
+        progress.record([('TEST/1', 'Adres TEST/1', NOT_FOUND, None), ('TEST/2', 'Adres TEST/2', LOCATED, None)])
+        assert candidates(progress, db) == ['TEST/2']  # LOCATED is kept only until the location is set
+
+        age(db, 'geocode_attempts', 29, 'station_no', ['TEST/1'])
+        assert candidates(progress, db) == ['TEST/2']
+        age(db, 'geocode_attempts', 31, 'station_no', ['TEST/1'])
+        assert candidates(progress, db) == ['TEST/1', 'TEST/2']
+
+
+def status(cursor, station_no):
+    cursor.execute("SELECT status, attempts FROM geocode_attempts WHERE station_no = %s", (station_no,))
+    return tuple(cursor.fetchone().values())
+
+
+class TestGeocodeProgress:
+    """geocode_attempts / geocode_runs devam etme testleri (gercek veritabani ile)"""
+
+    def test_resumes_after_limit(self, db):
+        """--limit ile duran calisma checkpoint sonrasindan devam etmeli, bitince bastan baslamali"""
+        add_stations(db, 'TEST/1', 'TEST/2', 'TEST/3')
+        progress = GeocodeProgress(db)
+        assert not progress.start(restart=True)
+        assert candidates(progress, db)[:2] == ['TEST/1', 'TEST/2']
+        progress.record([('TEST/1', 'Adres TEST/1', NOT_FOUND, None), ('TEST/2', 'Adres TEST/2', ERROR, 'HTTP 503')],
+                        'TEST/2', requests=2)
+
+        resumed = GeocodeProgress(db)
+        assert resumed.start()
+        assert (resumed.run_id, resumed.last_station_no) == (progress.run_id, 'TEST/2')
+        assert candidates(resumed, db) == ['TEST/3']
+        resumed.record([('TEST/3', 'Adres TEST/3', LOCATED, None)], 'TEST/3', requests=1)
+        resumed.finish()
+        db.execute("SELECT located, not_found, errors, requests, finished_at IS NOT NULL AS finished "
+                   "FROM geocode_runs WHERE id = %s", (progress.run_id,))
+        assert db.fetchone() == {'located': 1, 'not_found': 1, 'errors': 1, 'requests': 3, 'finished': True}
+
+        # A new pass retries the error but not the recent NOT_FOUND
+        assert not resumed.start()
+        assert candidates(resumed, db) == ['TEST/2', 'TEST/3']
+
+    def test_checkpoint_stays_when_batch_stops_on_errors(self, db, stub):
+        """Ust uste hatalarla kesilen batch checkpoint'i ilerletmemeli, kalanlar tekrar aday olmali"""
+        add_stations(db, 'TEST/1')
+        add_stations(db, 'TEST/2', 'TEST/3', 'TEST/4', address='BAD')
+        progress = GeocodeProgress(db)
+        progress.start(restart=True)
+        stations = [row for row in progress.candidates() if row['station_no'].startswith('TEST/')]
+
+        async def run():
+            async with Geocoder(f'http://127.0.0.1:{stub.server_port}', rate=1000, concurrency=1) as geocoder:
+                return await geocode_batch(geocoder, None, stations, max_errors=2)
+        attempts, located, _, banned = asyncio.run(run())
+        assert banned
+        assert [a[0] for a in attempts] == ['TEST/1', 'TEST/2', 'TEST/3']
+        progress.record(attempts, None if banned else stations[-1]['station_no'])
+
+        assert progress.last_station_no is None
+        assert GeocodeProgress(db).start() and candidates(progress, db) == ['TEST/1', 'TEST/2', 'TEST/3', 'TEST/4']
+
+    def test_error_becomes_failed_after_max_attempts(self, db):
+        """Ayni adreste max_attempts calisma ust uste hata FAILED olmali"""
+        add_stations(db, 'TEST/1')
+        progress = GeocodeProgress(db, max_attempts=3)
+        for attempt in (1, 2, 3):
+            assert progress.start(restart=True) is False
+            assert candidates(progress, db) == ['TEST/1']
+            progress.record([('TEST/1', 'Adres TEST/1', ERROR, 'HTTP 503')], 'TEST/1')
+            assert status(db, 'TEST/1') == (ERROR if attempt < 3 else FAILED, attempt)
+
+        progress.start(restart=True)
+        assert candidates(progress, db) == []
+        assert candidates(progress, db, retry_failed=True) == ['TEST/1']
+
+    def test_changed_address_is_retried(self, db):
+        """Adresi degisen FAILED veya NOT_FOUND istasyon tekrar denenmeli, sayac sifirlanmali"""
+        add_stations(db, 'TEST/1', 'TEST/2')
+        progress = GeocodeProgress(db, max_attempts=1)
+        progress.start(restart=True)
+        progress.record([('TEST/1', 'Adres TEST/1', ERROR, 'HTTP 503'), ('TEST/2', 'Adres TEST/2', NOT_FOUND, None)])
+        assert status(db, 'TEST/1') == (FAILED, 1)
+        assert candidates(progress, db) == []
+
+        db.execute("UPDATE stations SET address = address || ' No 5' WHERE station_no IN ('TEST/1', 'TEST/2')")
+        assert candidates(progress, db) == ['TEST/1', 'TEST/2']
+        progress.record([('TEST/1', 'Adres TEST/1 No 5', NOT_FOUND, None)])
+        assert status(db, 'TEST/1') == (NOT_FOUND, 1)
@@ -0,0 +1,207 @@
+import time
+import uuid
+import psycopg2
+import pytest
+import sys
+sys.path.insert(0, 'ingest/src')
+
+from config import Config
+from loader import DatabaseLoader, STAGE_STATION_FIELDS
+from transformer import Station, Connector
+
+# Columns a refresh stamps on rows it changed
+STAMPED = ('updated_at', 'ingestion_batch_id')
+
+
+def schema(cursor):
+    """Indexes, constraints, triggers and owned sequences of stations/connectors."""
+    cursor.execute("""
+        SELECT 'index', indexname || ' ' || regexp_replace(indexdef, '^.* USING ', '')
+        FROM pg_indexes WHERE tablename IN ('stations', 'connectors')
+        UNION ALL
+        SELECT 'constraint', conname || ' ' || pg_get_constraintdef(oid)
+        FROM pg_constraint WHERE conrelid IN ('stations'::regclass, 'connectors'::regclass)
+        UNION ALL
+        SELECT 'trigger', tgname || ' ' || tgrelid::regclass::text
+        FROM pg_trigger WHERE tgrelid IN ('stations'::regclass, 'connectors'::regclass) AND NOT tgisinternal
+        UNION ALL
+        SELECT 'sequence', pg_get_serial_sequence(t, 'id') FROM unnest(ARRAY['stations', 'connectors']) t
+    """)
+    return sorted(cursor.fetchall())
+
+
+def rows(cursor, table):
+    cursor.execute(f"SELECT * FROM {table} ORDER BY id")
+    names = [column.name for column in cursor.description]
+    return [{k: v for k, v in zip(names, row) if k not in STAMPED} for row in cursor.fetchall()]
+
+
+def refresh(loader, station=None, connector=None, lock_timeout='2s'):
+    """Full refresh with the live rows, but station=(name, data_hash) for the first station
+    and connector=(power_kw, connector_no) for that connector."""
+    loader.begin_full_refresh()
+    fields = ', '.join(STAGE_STATION_FIELDS)
+    loader.cursor.execute(f"INSERT INTO refresh_stations ({fields}) SELECT {fields} FROM stations ORDER BY id")
+    loader.cursor.execute("""
+        INSERT INTO refresh_connectors (station_no, connector_no, connector_type, connector_format, power_kw, source_file)
+        SELECT s.station_no, c.connector_no, c.connector_type, c.connector_format, c.power_kw, c.source_file
+        FROM connectors c JOIN stations s ON s.id = c.station_id ORDER BY c.id
+    """)
+    if station:
+        loader.cursor.execute("""
+            UPDATE refresh_stations SET station_name = %s, data_hash = %s
+            WHERE station_no = (SELECT min(station_no) FROM refresh_stations)
+        """, station)
+    if connector:
+        loader.cursor.execute("UPDATE refresh_connectors SET power_kw = %s WHERE connector_no = %s", connector)
+    return loader.finish_full_refresh(lock_timeout=lock_timeout)
+
+
+def live_station(cursor, offset):
+    """The offset-th live station that has connectors, as a Station and its Connectors."""
+    cursor.execute("""
+        SELECT * FROM stations s WHERE EXISTS (SELECT 1 FROM connectors c WHERE c.station_id = s.id)
+        ORDER BY station_no OFFSET %s LIMIT 1
+    """, (offset,))
+    row = cursor.fetchone()
+    station = Station(**{f: row[f] for f in Station.__slots__})
+    cursor.execute("SELECT * FROM connectors WHERE station_id = %s ORDER BY connector_no", (row['id'],))
+    connectors = [Connector(row['station_no'], c['connector_no'], c['connector_type'], c['connector_format'],
+                            float(c['power_kw']), c['source_file']) for c in cursor.fetchall()]
+    return station, connectors
+
+
+def connector_rows(cursor, connector_nos):
+    """(connector_no, station_id, row version) of connectors; xmin changes whenever a row is rewritten."""
+    cursor.execute("SELECT connector_no, station_id, xmin::text FROM connectors WHERE connector_no = ANY(%s) "
+                   "ORDER BY connector_no", (connector_nos,))
+    return [tuple(row.values()) for row in cursor.fetchall()]
+
+
+@pytest.fixture
+def loader():
+    loader = DatabaseLoader(Config(), uuid.uuid4())
+    loader.connect()
+    loader.start_batch()
+    yield loader
+    loader.rollback()
+    loader.disconnect()
+
+
+class TestFullRefresh:
+    """--full-refresh golge tablo degisimi testleri (gercek veritabani ile)"""
+
+    def test_swap_keeps_schema_ids_and_locations(self, loader):
+        """Indeks, trigger, FK, sequence, id ve location degisimden sonra korunmali"""
+        cursor = loader.conn.cursor()
+        before_schema = schema(cursor)
+        before_stations = rows(cursor, 'stations')
+        before_connectors = rows(cursor, 'connectors')
+        loader.conn.commit()
+
+        cursor.execute("SELECT station_name, data_hash FROM stations ORDER BY station_no LIMIT 1")
+        name, data_hash = cursor.fetchone()
+        cursor.execute("SELECT power_kw, connector_no FROM connectors WHERE power_kw > 0 ORDER BY connector_no LIMIT 1")
+        power_kw, connector_no = cursor.fetchone()
+        loader.conn.commit()
+
+        try:
+            stats = refresh(loader, station=(f'{name} (test)', 'test'), connector=(power_kw + 1, connector_no))
+            assert stats['stations_updated'] == 1 and stats['stations_deleted'] == 0
+            assert stats['connectors_deleted'] == 0
+            cursor.execute("SELECT station_name FROM stations ORDER BY station_no LIMIT 1")
+            assert cursor.fetchone()[0] == f'{name} (test)'
+            loader.conn.commit()
+        finally:
+            # Put the original values back for the other tests
+            refresh(loader, station=(name, data_hash), connector=(power_kw, connector_no))
+
+        assert schema(cursor) == before_schema
+        assert rows(cursor, 'stations') == before_stations
+        assert rows(cursor, 'connectors') == before_connectors
+        # The id sequences still hand out new ids
+        cursor.execute("SELECT nextval(pg_get_serial_sequence('stations', 'id')) > max(id) FROM stations")
+        assert cursor.fetchone()[0]
+        loader.conn.rollback()
+
+    def test_swap_fails_once_lock_times_out(self, loader):
+        """Uzun suren okuyucu varken degisim tek denemede basarisiz olmali, tablolar degismemeli"""
+        reader = psycopg2.connect(loader.config.database_dsn)
+        reader_cursor = reader.cursor()
+        reader_cursor.execute("SELECT COUNT(*) FROM stations")  # holds ACCESS SHARE until rollback
+        count = reader_cursor.fetchone()[0]
+        try:
+            with pytest.raises(psycopg2.errors.LockNotAvailable):
+                refresh(loader, lock_timeout='100ms')
+            loader.abort_full_refresh()
+        finally:
+            reader.rollback()
+            reader.close()
+
+        cursor = loader.conn.cursor()
+        cursor.execute("SELECT COUNT(*), to_regclass('stations_shadow') FROM stations")
+        assert cursor.fetchone() == (count, None)
+        loader.conn.rollback()
+
+    def test_unsupported_objects_fail_before_building(self, loader):
+        """Kopyalanamayan nesneler (bagimli view) degisimi baslamadan durdurmali"""
+        cursor = loader.conn.cursor()
+        cursor.execute("CREATE VIEW test_refresh_view AS SELECT station_no FROM stations")
+        loader.conn.commit()
+        try:
+            with pytest.raises(ValueError, match='dependent view test_refresh_view'):
+                refresh(loader)
+            loader.abort_full_refresh()
+        finally:
+            cursor.execute("DROP VIEW test_refresh_view")
+            loader.conn.commit()
+
+
+class TestConnectorUpsert:
+    """Connector upsert'inin degismeyen satirlari yeniden yazmama testleri (gercek veritabani ile)"""
+
+    @pytest.mark.parametrize('bulk', [True, False])
+    def test_unchanged_connectors_are_not_rewritten(self, loader, bulk):
+        """Ayni veriyi tekrar yuklemek connector satirlarina dokunmamali, tasinan connector guncellenmeli"""
+        loader.bulk = bulk
+        first, first_connectors = live_station(loader.cursor, 0)
+        second, second_connectors = live_station(loader.cursor, 1)
+        numbers = [c.connector_no for c in first_connectors + second_connectors]
+        before = connector_rows(loader.cursor, numbers)
+        loader.conn.commit()
+
+        stats = loader.load_data({'stations': [first, second], 'connectors': first_connectors + second_connectors})
+        assert stats['connectors_inserted'] == len(numbers)
+        assert connector_rows(loader.cursor, numbers) == before
+
+        moved = first_connectors[0]
+        try:
+            loader.load_data({'stations': [second], 'connectors': [Connector(
+                second.station_no, moved.connector_no, moved.connector_type, moved.connector_format,
+                moved.power_kw, moved.source_file)]})
+            loader.cursor.execute("SELECT s.station_no FROM connectors c JOIN stations s ON s.id = c.station_id "
+                                  "WHERE c.connector_no = %s", (moved.connector_no,))
+            assert loader.cursor.fetchone()['station_no'] == second.station_no
+            loader.conn.commit()
+        finally:
+            # Put the connector back for the other tests
+            loader.load_data({'stations': [first], 'connectors': [moved]})
+        assert [row[:2] for row in connector_rows(loader.cursor, numbers)] == [row[:2] for row in before]
+        loader.conn.commit()
+
+
+class TestBatchStatus:
+    """ingestion_batches durum testleri (gercek veritabani ile)"""
+
+    def test_last_success_ignores_failed_batches(self, loader):
+        """Son basarili zaman FAILED batch'lerden etkilenmemeli"""
+        loader.complete_batch({}, status='COMPLETED')
+        completed = loader.last_success_timestamp()
+        assert abs(completed - time.time()) < 60
+
+        failed = DatabaseLoader(loader.config, uuid.uuid4())
+        failed.connect()
+        failed.start_batch()
+        failed.complete_batch({}, status='FAILED')
+        assert failed.last_success_timestamp() == completed
+        failed.disconnect()
@@ -0,0 +1,87 @@
+import os
+import sys
+sys.path.insert(0, 'ingest/src')
+sys.path.insert(0, 'ingest')
+
+from manifest import FileFingerprint, FileManifest
+from cli import _pending_files
+
+
+class FakeLoader:
+    """Stands in for DatabaseLoader.loaded_files() with rows recorded for the given fingerprints."""
+
+    def __init__(self, *fingerprints):
+        self.rows = [
+            {'file_path': f.path, 'file_size': f.size, 'file_mtime': f.mtime, 'content_hash': f.content_hash}
+            for f in fingerprints
+        ]
+
+    def loaded_files(self):
+        return self.rows
+
+
+def write(path, content, mtime=1_700_000_000):
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def pending(loader, *files, force=False):
+    fingerprints = {f: FileFingerprint.of(f) for f in files}
+    return _pending_files(loader, list(files), fingerprints, force)
+
+
+class TestFileManifest:
+    """Yuklenmis dosya manifest testleri"""
+
+    def test_same_path_size_mtime_is_loaded_without_hashing(self, tmp_path):
+        """Yol, boyut ve mtime ayniysa dosya okunmadan atlanmali"""
+        path = write(tmp_path / 'a.xlsx', b'istasyonlar')
+        loaded = FileFingerprint.of(path)
+        manifest = FileManifest(FakeLoader(loaded).rows)
+
+        path.unlink()  # hashing would now fail
+        assert manifest.is_loaded(FileFingerprint(loaded.path, loaded.size, loaded.mtime))
+
+    def test_touched_file_with_same_content_is_loaded(self, tmp_path):
+        """mtime degisse de icerik hash'i ayniysa dosya atlanmali"""
+        path = write(tmp_path / 'a.xlsx', b'istasyonlar')
+        manifest = FileManifest(FakeLoader(FileFingerprint.of(path)).rows)
+
+        write(path, b'istasyonlar', mtime=1_800_000_000)
+        assert manifest.is_loaded(FileFingerprint.of(path))
+
+    def test_copy_under_another_path_is_loaded(self, tmp_path):
+        """Ayni icerik baska bir yolda da yuklenmis sayilmali"""
+        manifest = FileManifest(FakeLoader(FileFingerprint.of(write(tmp_path / 'a.xlsx', b'istasyonlar'))).rows)
+        assert manifest.is_loaded(FileFingerprint.of(write(tmp_path / 'b.xlsx', b'istasyonlar')))
+
+    def test_changed_content_is_not_loaded(self, tmp_path):
+        """Icerigi degisen dosya tekrar yuklenmeli"""
+        path = write(tmp_path / 'a.xlsx', b'istasyonlar')
+        manifest = FileManifest(FakeLoader(FileFingerprint.of(path)).rows)
+
+        write(path, b'istasyonlar v2', mtime=1_800_000_000)
+        assert not manifest.is_loaded(FileFingerprint.of(path))
+
+
+class TestPendingFiles:
+    """cli._pending_files testleri"""
+
+    def test_skips_loaded_files(self, tmp_path):
+        """Degismeyen ve sadece mtime'i degisen dosyalar atlanmali, degisen yuklenmeli"""
+        same = write(tmp_path / 'same.xlsx', b'ayni')
+        touched = write(tmp_path / 'touched.xlsx', b'dokunulmus')
+        changed = write(tmp_path / 'changed.xlsx', b'eski')
+        loader = FakeLoader(*(FileFingerprint.of(f) for f in (same, touched, changed)))
+        new = write(tmp_path / 'new.xlsx', b'yeni')
+
+        write(touched, b'dokunulmus', mtime=1_800_000_000)
+        write(changed, b'yeni icerik', mtime=1_800_000_000)
+        assert pending(loader, same, touched, changed, new) == ([changed, new], 2)
+
+    def test_force_loads_everything(self, tmp_path):
+        """--force ile manifest'e bakilmadan tum dosyalar yuklenmeli"""
+        files = [write(tmp_path / 'a.xlsx', b'a'), write(tmp_path / 'b.xlsx', b'b')]
+        loader = FakeLoader(*(FileFingerprint.of(f) for f in files))
+        assert pending(loader, *files, force=True) == (files, 0)
@@ -0,0 +1,53 @@
+import sys
+sys.path.insert(0, 'ingest/src')
+
+from merger import BatchMerger
+from transformer import Connector, Station
+
+
+def station(station_no, source_file, data_hash='h1', **overrides):
+    row = {'station_no': station_no, 'station_name': 'İstasyon', 'service_type': 'HALKA_ACIK',
+           'brand': None, 'charge_network_operator': None, 'station_operator': None, 'is_green': False,
+           'address': 'Beykoz / İSTANBUL', 'city': 'İSTANBUL', 'district': 'Beykoz',
+           'source_file': source_file, 'data_hash': data_hash}
+    row.update(overrides)
+    return Station(**row)
+
+
+def connector(station_no, connector_no, source_file, power_kw=22.0):
+    return Connector(station_no, connector_no, 'AC', 'AC_TYPE2', power_kw, source_file)
+
+
+class TestBatchMerger:
+    """Dosyalar arasi birlestirme testleri"""
+
+    def test_later_file_wins(self):
+        """Ayni anahtar tekrar gelirse sonraki dosyanin satiri kalmali"""
+        merger = BatchMerger()
+        merger.add({'stations': [station('ŞRJ/1', '1.xls'), station('ŞRJ/2', '1.xls')],
+                    'connectors': [connector('ŞRJ/1', 'SKT/1', '1.xls'), connector('ŞRJ/2', 'SKT/2', '1.xls')]})
+        merger.add({'stations': [station('ŞRJ/1', '2.xls')],
+                    'connectors': [connector('ŞRJ/1', 'SKT/1', '2.xls')]})
+
+        merged = merger.result()
+        assert [(s.station_no, s.source_file) for s in merged['stations']] == [('ŞRJ/1', '2.xls'), ('ŞRJ/2', '1.xls')]
+        assert [c.source_file for c in merged['connectors']] == ['2.xls', '1.xls']
+        assert merger.duplicates == 2
+        assert merger.conflicts == []
+        assert merger.file_stats('1.xls') == {'stations_count': 1, 'connectors_count': 1, 'rows_quarantined': 0}
+
+    def test_conflicts_are_reported(self):
+        """Icerigi farkli tekrarlar ingestion_errors formatinda raporlanmali"""
+        merger = BatchMerger()
+        merger.add({'stations': [station('ŞRJ/1', '1.xls')], 'connectors': [connector('ŞRJ/1', 'SKT/1', '1.xls')]})
+        merger.add({'stations': [station('ŞRJ/1', '2.xls', data_hash='h2', district=None)],
+                    'connectors': [connector('ŞRJ/1', 'SKT/1', '2.xls', power_kw=50.0)]},
+                   [{'source_file': '2.xls', 'error_type': 'INVALID_CONNECTOR', 'error_message': '', 'raw_data': {}}])
+
+        merged = merger.result()
+        assert merged['stations'][0].data_hash == 'h2'
+        assert [c['error_type'] for c in merger.conflicts] == ['MERGE_CONFLICT', 'MERGE_CONFLICT']
+        assert merger.conflicts[0]['source_file'] == '1.xls'
+        assert 'data_hash, district' in merger.conflicts[0]['error_message']
+        assert merger.conflicts[1]['raw_data']['power_kw'] == 22.0
+        assert merger.file_stats('2.xls') == {'stations_count': 1, 'connectors_count': 1, 'rows_quarantined': 1}
@@ -0,0 +1,58 @@
+import sys
+import time
+sys.path.insert(0, 'ingest/src')
+
+from metrics import IngestionMetrics, TimedIterator, new_timings
+
+
+class TestTimedIterator:
+    """Lazy stream zamanlama testleri"""
+
+    def test_nested_stages_are_not_double_counted(self):
+        """Ic asamanin suresi dis asamaya eklenmemeli"""
+        def slow(items):
+            for item in items:
+                time.sleep(0.01)
+                yield item
+
+        timings = new_timings()
+        inner = TimedIterator(slow(range(3)), timings, 'parse')
+        outer = TimedIterator((x * 2 for x in inner), timings, 'transform', exclude='parse')
+        assert list(outer) == [0, 2, 4]
+        assert timings['parse'] >= 0.03
+        assert timings['transform'] < 0.01
+
+
+class TestPrometheusExport:
+    """Prometheus text format testleri"""
+
+    def test_batch_metrics_are_rendered(self):
+        """Asama sureleri ve dosya sonuclari metrik olarak yazilmali"""
+        metrics = IngestionMetrics()
+        metrics.record_file('1.xls', {'parse': 1.5, 'transform': 0.25, 'load': 2.0}, 100, 'LOADED')
+        text = metrics.to_prometheus({'files_processed': 1, 'errors_count': 0}, 'COMPLETED')
+        assert 'epdk_ingest_stage_seconds{stage="parse"} 1.5' in text
+        assert 'epdk_ingest_rows 100' in text
+        assert 'epdk_ingest_success 1' in text
+        assert 'epdk_ingest_file_stage_seconds{file="1.xls",stage="load"} 2.0' in text
+
+    def test_batch_level_load_time_and_deletes(self):
+        """Tablo degisimi yukleme suresine eklenmeli, silinen istasyonlar raporlanmali"""
+        metrics = IngestionMetrics()
+        metrics.record_file('1.xls', {'parse': 1.0, 'transform': 0.5, 'load': 2.0}, 100, 'LOADED')
+        metrics.record_stage('load', 0.5)
+        text = metrics.to_prometheus({'stations_deleted': 7}, 'COMPLETED')
+        assert 'epdk_ingest_stage_seconds{stage="load"} 2.5' in text
+        assert 'epdk_ingest_stations{result="deleted"} 7' in text
+
+    def test_failed_batch_keeps_last_success(self):
+        """Basarisiz batch son basarili zamani tasimali, yoksa yazmamali"""
+        metrics = IngestionMetrics()
+        text = metrics.to_prometheus({'files_processed': 0, 'errors_count': 0}, 'FAILED', last_success=1700000000.0)
+        assert 'epdk_ingest_success 0' in text
+        assert 'epdk_ingest_errors 0' in text
+        assert 'epdk_ingest_last_success_timestamp_seconds 1700000000.0' in text
+        assert 'epdk_ingest_last_run_timestamp_seconds ' in text
+
+        text = metrics.to_prometheus({}, 'FAILED')
+        assert 'epdk_ingest_last_success_timestamp_seconds' not in text
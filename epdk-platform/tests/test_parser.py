@@ -0,0 +1,90 @@
+import pytest
+import sys
+import numpy as np
+import pandas as pd
+sys.path.insert(0, 'ingest/src')
+
+from parser import ExcelParser
+
+HEADER = ['Sıra No', 'İstasyon No', 'İstasyon Adı', 'Hizmet Şekli', 'Marka',
+          'Şarj Ağı İşletmecisi', 'Şarj İstasyonu İşletmecisi', 'Yeşil Şarj İstasyonu mu',
+          'Adres', 'Soket Bilgileri', np.nan, np.nan, np.nan]
+SOCKET_HEADER = ['Soket No', 'Soket Tipi', 'Soket Türü', 'Soket Gücü (kW)']
+
+
+def station_row(sira, station_no, name, address):
+    return [sira, station_no, name, 'HALKA_ACIK', 'Marka', 'OP A.Ş.', 'OP A.Ş.', np.nan, address] + SOCKET_HEADER
+
+
+def connector_row(connector_no, power):
+    return [np.nan] * 9 + [connector_no, 'AC', 'AC_TYPE2', power]
+
+
+def sample_frame():
+    rows = [
+        ['EPDK Şarj İstasyonları'] + [np.nan] * 12,
+        HEADER,
+        station_row(1, 'ŞRJ/1', 'Birinci ', 'Beykoz / İSTANBUL'),
+        connector_row('SKT/11', 3.4),
+        connector_row('SKT/12', '22 kW'),
+        station_row(2, 'ŞRJ/2', 'İkinci', '  '),
+        connector_row('  ', 7.4),
+        connector_row('SKT/21', 7.4),
+    ]
+    return pd.DataFrame(rows)
+
+
+class TestParseFrame:
+    """Kolon bazli parse testleri"""
+
+    def test_header_row_is_found(self):
+        """Baslik satiri ilk satirda olmasa da bulunmali"""
+        assert ExcelParser._find_header_row(sample_frame()) == 1
+
+    def test_missing_header_raises(self):
+        """Baslik yoksa ValueError vermeli"""
+        with pytest.raises(ValueError):
+            ExcelParser(None).parse_frame(pd.DataFrame([[1, 2, 3]]), 'x.xls')
+
+    def test_stations_are_parsed(self):
+        """Istasyon satirlari temizlenmis string olarak donmeli"""
+        stations, _ = ExcelParser(None).parse_frame(sample_frame(), '1.xls')
+        assert [s.station_no for s in stations] == ['ŞRJ/1', 'ŞRJ/2']
+        assert stations[0].station_name == 'Birinci'
+        assert stations[0].is_green is None
+        assert stations[1].address is None
+        assert stations[0].source_file == '1.xls'
+
+    def test_connectors_get_parent_station(self):
+        """Connector satirlarina ust istasyon numarasi tasinmali"""
+        _, connectors = ExcelParser(None).parse_frame(sample_frame(), '1.xls')
+        assert [(c.station_no, c.connector_no) for c in connectors] == [
+            ('ŞRJ/1', 'SKT/11'), ('ŞRJ/1', 'SKT/12'), ('ŞRJ/2', 'SKT/21')
+        ]
+        assert connectors[0].power_kw == '3.4'
+        assert connectors[1].power_kw == '22 kW'
+
+
+class TestStreamingParse:
+    """Satir satir (streaming) parse testleri"""
+
+    def test_stream_matches_frame_parse(self):
+        """Streaming parse kolon bazli parse ile ayni kayitlari vermeli"""
+        df = sample_frame()
+        parser = ExcelParser(None)
+        stations, connectors = parser.parse_frame(df, '1.xls')
+        records = list(parser._classify_rows(df.itertuples(index=False), '1.xls'))
+        assert [r for kind, r in records if kind == 'station'] == stations
+        assert [r for kind, r in records if kind == 'connector'] == connectors
+
+    def test_stream_is_lazy(self):
+        """Ilk kayit tum satirlar okunmadan donmeli"""
+        def rows():
+            yield HEADER
+            yield station_row(1, 'ŞRJ/1', 'Birinci', 'Adres')
+            raise AssertionError("generator fazla okundu")
+
+        records = ExcelParser(None)._classify_rows(rows(), '1.xls')
+        kind, station = next(records)
+        assert kind == 'station'
+        assert station.station_no == 'ŞRJ/1'
@@ -0,0 +1,115 @@
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, 'ingest/src')
+sys.path.insert(0, 'ingest')
+
+from pipeline import pipelined_files, StageError
+from manifest import FileFingerprint
+from metrics import IngestionMetrics
+from synthetic import SyntheticGenerator
+from validator import DataValidator
+from cli import _transformed_files, _load_files, _new_batch_stats
+
+
+class RecordingLoader:
+    """DatabaseLoader stand-in that keeps loaded rows and counts them like the merge would."""
+
+    def __init__(self):
+        self.stations = {}
+        self.connectors = []
+        self.files = []
+
+    def load_data(self, transformed, rejected):
+        stats = {'stations_inserted': 0, 'stations_updated': 0, 'stations_unchanged': 0,
+                 'connectors_inserted': len(transformed['connectors']), 'rows_quarantined': len(rejected)}
+        for station in transformed['stations']:
+            previous = self.stations.get(station.station_no)
+            key = 'stations_inserted' if previous is None else (
+                'stations_unchanged' if previous == station else 'stations_updated')
+            stats[key] += 1
+            self.stations[station.station_no] = station
+        self.connectors.extend(transformed['connectors'])
+        return stats
+
+    def record_file(self, fingerprint, status, stats=None, error_message=None, timings=None):
+        self.files.append((fingerprint.path, status))
+
+    def record_error(self, *args):
+        raise AssertionError(f"unexpected error: {args}")
+
+    def rollback(self):
+        pass
+
+
+class TestPipelinedFiles:
+    """Asamali (pipeline) ingestion testleri"""
+
+    def test_results_keep_input_order(self):
+        """Sonuclar dosya sirasiyla donmeli"""
+        files = [Path(f"{i}.xls") for i in range(10)]
+        results = [
+            (f.name, get())
+            for f, get in pipelined_files(files, lambda f: f.stem, lambda f, raw: int(raw) * 2)
+        ]
+        assert results == [(f"{i}.xls", i * 2) for i in range(10)]
+
+    def test_stage_errors_are_per_file(self):
+        """Bir dosyadaki hata sadece o dosyayi etkilemeli"""
+        def parse(f):
+            if f.name == 'bad.xls':
+                raise ValueError("bozuk dosya")
+            return f.name
+
+        files = [Path('a.xls'), Path('bad.xls'), Path('b.xls')]
+        outcomes = []
+        for f, get in pipelined_files(files, parse, lambda f, raw: raw.upper()):
+            try:
+                outcomes.append(get())
+            except StageError as e:
+                assert e.error_type == 'PARSE_ERROR'
+                outcomes.append(None)
+        assert outcomes == ['A.XLS', None, 'B.XLS']
+
+    def test_consumer_stop_does_not_hang(self):
+        """Tuketici erken durursa thread'ler kapanmali"""
+        files = [Path(f"{i}.xls") for i in range(100)]
+        for f, get in pipelined_files(files, lambda f: f, lambda f, raw: raw, queue_size=1):
+            break
+
+    def test_crashed_stage_is_raised(self):
+        """Asama disi bir hata tuketiciye iletilmeli"""
+        class Boom(BaseException):
+            pass
+
+        def parse(f):
+            raise Boom()
+
+        with pytest.raises(Boom):
+            for _ in pipelined_files([Path('a.xls')], parse, lambda f, raw: raw):
+                pass
+
+
+class TestWorkerPool:
+    """--workers ile paralel parse/transform testleri"""
+
+    def ingest(self, excel_files, workers):
+        fingerprints = {f: FileFingerprint.of(f) for f in excel_files}
+        loader = RecordingLoader()
+        stats = _new_batch_stats()
+        files = _transformed_files(None, excel_files, fingerprints, workers)
+        _load_files(files, loader, DataValidator(None), fingerprints, IngestionMetrics(), stats)
+        return loader, stats
+
+    def test_workers_match_sequential_run(self, tmp_path):
+        """2 worker ile yukleme sirali yukleme ile ayni istasyon, connector ve istatistikleri vermeli"""
+        excel_files = SyntheticGenerator(seed=7).generate(tmp_path, 40, stations_per_file=10)
+        sequential, sequential_stats = self.ingest(excel_files, workers=1)
+        pooled, pooled_stats = self.ingest(excel_files, workers=2)
+
+        assert len(sequential.stations) == 40 and sequential.connectors
+        assert list(pooled.stations.items()) == list(sequential.stations.items())
+        assert pooled.connectors == sequential.connectors
+        assert pooled.files == sequential.files
+        assert pooled_stats == sequential_stats
+        assert sequential_stats['files_processed'] == 4
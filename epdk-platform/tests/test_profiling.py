@@ -0,0 +1,43 @@
+import sys
+sys.path.insert(0, 'ingest/src')
+
+from profiling import Profiler, checkpoint
+
+
+def build_rows(n):
+    return [{'station_no': str(i), 'power_kw': float(i)} for i in range(n)]
+
+
+def copy_rows(rows):
+    return [dict(r) for r in rows]
+
+
+class TestProfiler:
+    """--profile cikti testleri"""
+
+    def test_writes_collapsed_stacks(self, tmp_path):
+        """CPU stack'leri cagri yolunu, bellek stack'leri en buyuk checkpoint'i icermeli"""
+        with Profiler(tmp_path / 'run'):
+            rows = build_rows(5000)
+            copies = copy_rows(rows)
+            checkpoint()
+            del rows, copies
+
+        cpu = (tmp_path / 'run.cpu.folded').read_text().splitlines()
+        assert all(line.rsplit(' ', 1)[1].isdigit() for line in cpu)
+        stacks = [line.rsplit(' ', 1)[0].split(';') for line in cpu]
+        assert ['build_rows (tests/test_profiling.py:7)', '<listcomp> (tests/test_profiling.py:8)'] in stacks
+        assert ['copy_rows (tests/test_profiling.py:11)', '<listcomp> (tests/test_profiling.py:12)'] in stacks
+
+        alloc = (tmp_path / 'run.alloc.folded').read_text().splitlines()
+        total = sum(int(line.rsplit(' ', 1)[1]) for line in alloc)
+        assert total > 256 * 1024  # the rows were live at the checkpoint
+        assert (tmp_path / 'run.prof').exists()
+
+    def test_cpu_only(self, tmp_path):
+        """frames=0 ile bellek izlenmemeli"""
+        with Profiler(tmp_path / 'run', frames=0):
+            build_rows(1000)
+            checkpoint()
+        assert (tmp_path / 'run.cpu.folded').exists()
+        assert not (tmp_path / 'run.alloc.folded').exists()
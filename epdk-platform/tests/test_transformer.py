@@ -0,0 +1,69 @@
+import hashlib
+import json
+import sys
+from dataclasses import asdict
+sys.path.insert(0, 'ingest/src')
+
+from parser import ParsedConnector, ParsedStation
+from transformer import DataTransformer
+
+
+def raw_station(station_no, **overrides):
+    row = {'station_no': station_no, 'station_name': 'Öztürk "Park"', 'service_type': 'HALKA ACIK',
+           'brand': 'zes', 'charge_network_operator': 'ZES A.Ş.', 'station_operator': 'ZES A.Ş.',
+           'is_green': None, 'address': 'Çiğdem Mahallesi Beykoz / İSTANBUL', 'source_file': '1.xls'}
+    row.update(overrides)
+    return ParsedStation(**row)
+
+
+def raw_connector(station_no, connector_no, power_kw):
+    return ParsedConnector(station_no, connector_no, 'dc', 'dc ccs', power_kw, '1.xls')
+
+
+def sample_raw():
+    return {
+        'stations': [raw_station('ŞRJ/1'), raw_station('ŞRJ/2', service_type='özel', address=None),
+                     raw_station(None)],
+        'connectors': [raw_connector('ŞRJ/1', 'SKT/1', '7,4 kW'), raw_connector('ŞRJ/1', 'SKT/2', '22'),
+                       raw_connector('ŞRJ/2', 'SKT/3', '-'), raw_connector('ŞRJ/2', None, '22')],
+    }
+
+
+class TestBatchTransform:
+    """Kolon bazli transform testleri"""
+
+    def test_matches_per_record_transform(self):
+        """Toplu transform kayit kayit transform ile ayni sonucu vermeli"""
+        raw = sample_raw()
+        transformer = DataTransformer(None)
+        batch = transformer.transform(raw, '1.xls')
+        records = [('station', s) for s in raw['stations']] + [('connector', c) for c in raw['connectors']]
+        streamed = list(transformer.transform_stream(records))
+        assert batch['stations'] == [r for kind, r in streamed if kind == 'station']
+        assert batch['connectors'] == [r for kind, r in streamed if kind == 'connector']
+
+    def test_columns_are_normalized(self):
+        """Guc, servis tipi ve soket tipleri normalize edilmeli"""
+        result = DataTransformer(None).transform(sample_raw(), '1.xls')
+        assert [s.service_type for s in result['stations']] == ['HALKA_ACIK', 'OZEL']
+        assert [(s.city, s.district) for s in result['stations']] == [('İSTANBUL', 'Beykoz'), (None, None)]
+        assert [c.power_kw for c in result['connectors']] == [7.4, 22.0, None]
+        assert {(c.connector_type, c.connector_format) for c in result['connectors']} == {('DC', 'DC_CCS')}
+
+    def test_data_hash_is_md5_of_sorted_json(self):
+        """data_hash, source_file haric json.dumps(sort_keys=True) MD5'i olmali"""
+        raw = sample_raw()
+        result = DataTransformer(None).transform(raw, '1.xls')
+        content = {k: v for k, v in asdict(raw['stations'][0]).items() if k != 'source_file'}
+        expected = hashlib.md5(json.dumps(content, sort_keys=True).encode('utf-8')).hexdigest()
+        assert result['stations'][0].data_hash == expected
+
+    def test_batch_hashes_match_row_hashes(self):
+        """_fingerprints her satir icin _fingerprint ile ayni olmali"""
+        rows = [
+            raw_station('1'),
+            raw_station('2', station_name=None, brand=None, is_green=True),
+            raw_station('3', station_name='{x} "y" \\ \n', address='Şişli {0} / İSTANBUL'),
+            raw_station('4', station_name='\u2603 ☃ 𝄞', is_green=False, service_type=7),
+        ]
+        assert DataTransformer._fingerprints(rows) == [DataTransformer._fingerprint(r) for r in rows]
@@ -0,0 +1,60 @@
+import sys
+sys.path.insert(0, 'ingest/src')
+
+from transformer import Connector, Station
+from validator import DataValidator
+
+
+def station(station_no, **overrides):
+    row = {'station_no': station_no, 'station_name': 'İstasyon', 'service_type': 'HALKA_ACIK',
+           'brand': None, 'charge_network_operator': None, 'station_operator': None, 'is_green': False,
+           'address': 'Beykoz / İSTANBUL', 'city': 'İSTANBUL', 'district': 'Beykoz',
+           'source_file': '1.xls', 'data_hash': None}
+    row.update(overrides)
+    return Station(**row)
+
+
+def connector(station_no, connector_no, **overrides):
+    row = {'station_no': station_no, 'connector_no': connector_no, 'connector_type': 'AC',
+           'connector_format': 'AC_TYPE2', 'power_kw': 22.0, 'source_file': '1.xls'}
+    row.update(overrides)
+    return Connector(**row)
+
+
+class TestDataValidator:
+    """Yukleme oncesi toplu dogrulama testleri"""
+
+    def test_valid_rows_pass_through(self):
+        """Gecerli satirlar aynen donmeli"""
+        data = {'stations': [station('ŞRJ/1')], 'connectors': [connector('ŞRJ/1', 'SKT/1')]}
+        clean, rejected = DataValidator(None).validate(data)
+        assert clean == data
+        assert rejected == []
+
+    def test_schema_violations_are_rejected(self):
+        """Enum, NOT NULL ve chk_power_range ihlalleri ayiklanmali"""
+        data = {
+            'stations': [station('ŞRJ/1'), station('ŞRJ/2', address=None)],
+            'connectors': [
+                connector('ŞRJ/1', 'SKT/1', power_kw=720.0),
+                connector('ŞRJ/1', 'SKT/2', power_kw=None),
+                connector('ŞRJ/1', 'SKT/3', connector_format='AC_TYPE9'),
+                connector('ŞRJ/1', 'SKT/4', power_kw=500.0),
+            ],
+        }
+        clean, rejected = DataValidator(None).validate(data)
+        assert [s.station_no for s in clean['stations']] == ['ŞRJ/1']
+        assert [c.connector_no for c in clean['connectors']] == ['SKT/4']
+        assert [r['error_type'] for r in rejected] == [
+            'INVALID_STATION', 'INVALID_CONNECTOR', 'INVALID_CONNECTOR', 'INVALID_CONNECTOR'
+        ]
+        assert rejected[0]['error_message'] == 'address is empty'
+        assert rejected[1]['raw_data']['power_kw'] == 720.0
+
+    def test_connectors_of_rejected_station_are_orphans(self):
+        """Reddedilen istasyonun connectorlari da ayiklanmali"""
+        data = {'stations': [station('ŞRJ/1', station_name=None)],
+                'connectors': [connector('ŞRJ/1', 'SKT/1')]}
+        clean, rejected = DataValidator(None).validate(data)
+        assert clean == {'stations': [], 'connectors': []}
+        assert [r['error_type'] for r in rejected] == ['INVALID_STATION', 'ORPHAN_CONNECTOR']
@@ -0,0 +1,52 @@
+import os
+import sys
+sys.path.insert(0, 'ingest/src')
+
+from watcher import DirectoryWatcher
+
+
+def write(path, content, mtime_ns):
+    path.write_bytes(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestDirectoryWatcher:
+    """Izleme modu: dosya yerlesene kadar bekleme testleri"""
+
+    def test_reports_files_once_settled(self, tmp_path):
+        """Dosya settle suresi boyunca degismeyince bir kez raporlanmali"""
+        watcher = DirectoryWatcher(tmp_path, settle_seconds=2, use_inotify=False)
+        write(tmp_path / '1.xlsx', b'a', 10**9)
+        (tmp_path / 'notlar.txt').write_text('tablo degil')
+
+        assert watcher.scan(now=0) == []
+        assert watcher.scan(now=1) == []
+        assert watcher.scan(now=2) == [tmp_path / '1.xlsx']
+        assert watcher.scan(now=10) == []
+
+    def test_still_copying_file_waits(self, tmp_path):
+        """Kopyalanmaya devam eden dosya degismeyi birakana kadar beklemeli"""
+        watcher = DirectoryWatcher(tmp_path, settle_seconds=2, use_inotify=False)
+        write(tmp_path / '1.xlsx', b'a', 10**9)
+        watcher.scan(now=0)
+        write(tmp_path / '1.xlsx', b'ab', 2 * 10**9)
+
+        assert watcher.scan(now=2) == []
+        assert watcher.scan(now=4) == [tmp_path / '1.xlsx']
+
+        # Degisen dosya tekrar raporlanmali
+        write(tmp_path / '1.xlsx', b'abc', 3 * 10**9)
+        assert watcher.scan(now=5) == []
+        assert watcher.scan(now=7) == [tmp_path / '1.xlsx']
+
+    def test_retry_reports_again(self, tmp_path):
+        """Veritabani hatasindan sonra ayni dosyalar sonraki taramada donmeli"""
+        watcher = DirectoryWatcher(tmp_path, settle_seconds=2, use_inotify=False)
+        write(tmp_path / '2.xls', b'a', 10**9)
+        write(tmp_path / '1.xlsx', b'a', 10**9)
+        watcher.scan(now=0)
+        ready = watcher.scan(now=2)
+        assert ready == [tmp_path / '2.xls', tmp_path / '1.xlsx']
+
+        watcher.retry(ready)
+        assert watcher.scan(now=3) == ready
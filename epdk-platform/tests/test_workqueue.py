@@ -0,0 +1,204 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+import pytest
+import sys
+sys.path.insert(0, 'ingest/src')
+
+from config import Config
+from loader import DatabaseLoader
+from manifest import FileFingerprint
+from workqueue import WorkQueue
+
+MTIME = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def batch():
+    """A RUNNING ingestion batch, deleted with its tasks afterwards."""
+    loader = DatabaseLoader(Config(), uuid.uuid4())
+    loader.connect()
+    loader.start_batch()
+    yield loader.batch_id
+    loader.cursor.execute("DELETE FROM ingestion_queue WHERE batch_id = %s::uuid", (str(loader.batch_id),))
+    loader.cursor.execute("DELETE FROM ingestion_batches WHERE id = %s::uuid", (str(loader.batch_id),))
+    loader.conn.commit()
+    loader.disconnect()
+
+
+@pytest.fixture
+def queues():
+    """Connected WorkQueue factory; every queue is disconnected afterwards."""
+    opened = []
+
+    def make(worker_id, **kwargs):
+        queue = WorkQueue(Config(), worker_id, **kwargs)
+        queue.connect()
+        opened.append(queue)
+        return queue
+
+    yield make
+    for queue in opened:
+        queue.disconnect()
+
+
+def enqueue(queue, batch_id, count):
+    fingerprints = [FileFingerprint(f'/data/{i}.xlsx', 100 + i, MTIME) for i in range(count)]
+    return queue.enqueue(batch_id, fingerprints)
+
+
+def expire(queue, task):
+    """Let the task's lease run out, as if its worker died."""
+    queue.cursor.execute("UPDATE ingestion_queue SET leased_until = NOW() - INTERVAL '1 second' WHERE id = %s",
+                         (task['id'],))
+    queue.conn.commit()
+
+
+def task_row(queue, task):
+    queue.cursor.execute("SELECT * FROM ingestion_queue WHERE id = %s", (task['id'],))
+    return queue.cursor.fetchone()
+
+
+def batch_row(queue, batch_id):
+    queue.cursor.execute("SELECT * FROM ingestion_batches WHERE id = %s::uuid", (str(batch_id),))
+    return queue.cursor.fetchone()
+
+
+class TestEnqueue:
+    """Kuyruga ekleme testleri (gercek veritabani ile)"""
+
+    def test_known_hash_is_stored_without_hashing(self, batch, queues):
+        """Bilinen hash yazilmali, bilinmeyen icin dosya okunmadan NULL kalmali"""
+        queue = queues('coordinator')
+        fingerprints = [
+            FileFingerprint('/data/hashed.xlsx', 1, MTIME, _content_hash='abc'),
+            FileFingerprint('/data/missing.xlsx', 2, MTIME),  # reading it would raise
+        ]
+        assert queue.enqueue(batch, fingerprints, files_skipped=3) == 2
+
+        queue.cursor.execute("SELECT file_path, content_hash FROM ingestion_queue WHERE batch_id = %s::uuid "
+                             "ORDER BY id", (str(batch),))
+        assert [(row['file_path'], row['content_hash']) for row in queue.cursor.fetchall()] == [
+            ('/data/hashed.xlsx', 'abc'), ('/data/missing.xlsx', None)]
+        assert batch_row(queue, batch)['files_skipped'] == 3
+
+
+class TestClaim:
+    """Gorev alma ve kira testleri (gercek veritabani ile)"""
+
+    def test_locked_task_is_skipped(self, batch, queues):
+        """Baska bir islemin kilitledigi gorev atlanmali"""
+        first = queues('a')
+        enqueue(first, batch, 2)
+        first.cursor.execute("SELECT id FROM ingestion_queue WHERE batch_id = %s::uuid ORDER BY id LIMIT 1 "
+                             "FOR UPDATE", (str(batch),))
+        locked = first.cursor.fetchone()['id']
+
+        task = queues('b').claim(batch)
+        first.conn.rollback()
+        assert task['id'] != locked
+        assert queues('c').claim(batch)['id'] == locked
+
+    def test_concurrent_workers_never_share_a_task(self, batch, queues):
+        """Ayni anda calisan worker'lar ayni gorevi iki kez almamali"""
+        enqueue(queues('coordinator'), batch, 40)
+        workers = [queues(f'worker-{i}') for i in range(4)]
+        claimed = {queue.worker_id: [] for queue in workers}
+        start = threading.Barrier(len(workers))
+
+        def work(queue):
+            start.wait()
+            while (task := queue.claim(batch)) is not None:
+                claimed[queue.worker_id].append(task['id'])
+
+        threads = [threading.Thread(target=work, args=(queue,)) for queue in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ids = [task_id for tasks in claimed.values() for task_id in tasks]
+        assert len(ids) == 40
+        assert len(set(ids)) == 40
+
+    def test_expired_lease_is_reclaimed(self, batch, queues):
+        """Kirasi dolan gorevi baska worker almali, eski worker sonucu yazamamali"""
+        dead, alive = queues('dead'), queues('alive')
+        enqueue(dead, batch, 1)
+        task = dead.claim(batch)
+        assert alive.claim(batch) is None
+
+        expire(dead, task)
+        reclaimed = alive.claim(batch)
+        assert reclaimed['id'] == task['id']
+        assert reclaimed['attempts'] == 2
+
+        dead.complete(task, {'stations_inserted': 5}, {})
+        row = task_row(alive, task)
+        assert (row['status'], row['worker'], row['stations_inserted']) == ('RUNNING', 'alive', 0)
+
+    def test_heartbeat_extends_the_lease(self, batch, queues):
+        """Heartbeat calisirken kira dolmamali"""
+        queue = queues('a', lease_seconds=0.6)
+        enqueue(queue, batch, 1)
+        task = queue.claim(batch)
+        with queue.heartbeat(task):
+            time.sleep(1)
+            assert queues('b').claim(batch) is None
+        assert task_row(queue, task)['heartbeat_at'] > task_row(queue, task)['started_at']
+
+
+class TestRetries:
+    """Tekrar deneme ve batch sonucu testleri (gercek veritabani ile)"""
+
+    def test_failed_task_is_retried_until_max_attempts(self, batch, queues):
+        """Hata alan gorev max_attempts'e kadar tekrar denenmeli, sonra FAILED olmali"""
+        queue = queues('a', max_attempts=2)
+        enqueue(queue, batch, 1)
+        queue.fail(queue.claim(batch), 'bozuk dosya')
+        task = queue.claim(batch)
+        assert task['attempts'] == 2
+
+        queue.fail(task, 'bozuk dosya')
+        assert task_row(queue, task)['status'] == 'FAILED'
+        assert queue.claim(batch) is None
+
+    def test_expired_last_attempt_fails(self, batch, queues):
+        """Son denemede kirasi dolan gorev tekrar alinmamali, FAILED olmali"""
+        queue = queues('a', max_attempts=1)
+        enqueue(queue, batch, 1)
+        task = queue.claim(batch)
+        expire(queue, task)
+
+        assert queue.claim(batch) is None
+        row = task_row(queue, task)
+        assert row['status'] == 'FAILED'
+        assert 'Lease expired' in row['error_message']
+        assert batch_row(queue, batch)['status'] == 'FAILED'
+
+    def test_batch_with_a_loaded_file_completes(self, batch, queues):
+        """En az bir dosya yuklenirse batch COMPLETED olmali, hatalar sayilmali"""
+        queue = queues('a', max_attempts=1)
+        enqueue(queue, batch, 2)
+        queue.complete(queue.claim(batch), {'stations_inserted': 3, 'connectors_inserted': 7}, {'parse': 0.5})
+        assert batch_row(queue, batch)['status'] == 'RUNNING'
+
+        queue.fail(queue.claim(batch), 'bozuk dosya')
+        row = batch_row(queue, batch)
+        assert row['status'] == 'COMPLETED'
+        assert (row['files_processed'], row['errors_count']) == (1, 1)
+        assert (row['stations_inserted'], row['connectors_inserted'], row['rows_processed']) == (3, 7, 10)
+        assert row['completed_at'] is not None
+
+    def test_batch_with_only_failed_files_fails(self, batch, queues):
+        """Tum dosyalar hata alirsa batch FAILED olmali"""
+        queue = queues('a', max_attempts=1)
+        enqueue(queue, batch, 2)
+        queue.fail(queue.claim(batch), 'bozuk dosya')
+        queue.fail(queue.claim(batch), 'bozuk dosya')
+
+        row = batch_row(queue, batch)
+        assert row['status'] == 'FAILED'
+        assert (row['files_processed'], row['errors_count']) == (0, 2)
+        assert row['completed_at'] is not None